@@ -4,107 +4,190 @@ config.py
 Centralized configuration file for the PDF to SwiperJS converter.
 """
 
-import os
+import warnings
+from types import MappingProxyType
 
 # --- Paths and Filenames ---
 DEFAULT_PDF_FILE = "presentation.pdf"
 OUTPUT_JSON_FILE_NAME = "video_metadata.json"
 MEDIA_OUTPUT_DIR_NAME = "videos"
+# Directory (in the output directory) of the records letting the next run
+# reuse work; not part of the presentation: leave it out when publishing
+CACHE_DIR_NAME = ".pdf2web_cache"
+# Records of processed media (inside CACHE_DIR_NAME), reused by the next
+# run when the embedded stream and the settings are unchanged
+MEDIA_CACHE_DIR_NAME = "media"
 SVG_OUTPUT_DIR_NAME = "slides_svg"
+# Record of the SVG pages (inside the SVG directory), kept by the next run
+# when the PDF file and the settings are unchanged
+SVG_CACHE_RECORD_NAME = ".svg_cache.json"
 OUTPUT_HTML_FILE_NAME = "presentation_swiper.html"
 SVG_OUTPUT_EXTENSION = ".svg"
 
 # --- SVG Conversion Configuration ---
 SVG_CONVERSION_METHOD = 'pymupdf' # 'pymupdf' or 'pdf2svg'
+# PyMuPDF only: draw the text as glyph outlines. The pages look the same
+# everywhere; False keeps <text> elements (SVGs several times smaller and
+# faster to render) but the browser then needs the PDF's fonts installed
+SVG_TEXT_AS_PATH = True
 
 # --- Library Copying Configuration ---
 SOURCE_LIBS_DIR = "libs"
 TARGET_LIBS_DIR_NAME = "libs"
 
 # --- Video Transcoding Configuration ---
+# Option lists are tuples and lookup tables read-only mappings, so the
+# values can be shared and cached safely by the processing code.
 
 # -- Codec Selection --
 DEFAULT_VIDEO_CODEC = 'h264'
-ALLOWED_VIDEO_CODECS = ['h264', 'vp9', 'av1']
+ALLOWED_VIDEO_CODECS = ('h264', 'vp9', 'av1')
 
 # -- Preferred Formats (for skipping unnecessary transcoding) --
-PREFERRED_FORMATS = {
-    '.mp4': ['h264'],
-    '.webm': ['vp9', 'av1'],
-}
+PREFERRED_FORMATS = MappingProxyType({
+    '.mp4': ('h264',),
+    '.webm': ('vp9', 'av1'),
+})
 
 # -- Format Mapping (Codec -> Extension, MIME Type, Container Opts) --
-CODEC_FORMAT_MAP = {
-    'h264': {
+CODEC_FORMAT_MAP = MappingProxyType({
+    'h264': MappingProxyType({
         'ext': '.mp4', 'mime': 'video/mp4',
-        'container_opts': ['-movflags', '+faststart']
-    },
-    'vp9':  {
+        'container_opts': ('-movflags', '+faststart')
+    }),
+    'vp9':  MappingProxyType({
         'ext': '.webm', 'mime': 'video/webm',
-        'container_opts': []
-    },
-    'av1':  {
+        'container_opts': ()
+    }),
+    'av1':  MappingProxyType({
         'ext': '.webm', 'mime': 'video/webm',
-        'container_opts': []
-    },
-}
+        'container_opts': ()
+    }),
+})
 
 # -- Pre-Resizing for Oversized Videos --
 MAX_PRE_RESIZE_WIDTH = 3840
 MAX_PRE_RESIZE_HEIGHT = 2160
-FFMPEG_PRE_RESIZE_OPTIONS = [
+FFMPEG_PRE_RESIZE_OPTIONS = (
     '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '8',
     '-c:a', 'copy', '-sn',
-]
+)
+# Used instead when VAAPI is enabled and the source is VAAPI-decodable
+# (decode, scale and encode on the GPU; the CPU options are the fallback)
+FFMPEG_PRE_RESIZE_OPTIONS_VAAPI = (
+    '-c:v', 'h264_vaapi', '-rc_mode', 'CQP', '-qp', '10',
+    '-c:a', 'copy', '-sn',
+)
+
+# -- Scaling (--scale-videos) to H.264/MP4 --
+# Its output is the final file for H.264/MP4 targets (other targets scale
+# within the final transcode)
+FFMPEG_SCALE_OPTIONS = (
+    '-c:v', 'libx264', '-preset', 'faster', '-crf', '20',
+    '-c:a', 'copy', '-movflags', '+faststart',
+)
 
 # -- FFMPEG Options for Main Transcoding --
 # Common options (Audio handled conditionally)
-FFMPEG_COMMON_OPTIONS = [
+FFMPEG_COMMON_OPTIONS = (
     '-map_metadata', '0', '-map_chapters', '0', '-threads', '0',
-]
+)
+# Audio of MP4 outputs in Opus (faster to encode, better at a lower
+# bitrate) instead of AAC; WebM outputs always use Opus. Off by default:
+# Safari only plays Opus in MP4 since version 17
+ALLOW_OPUS_IN_MP4 = False
 
 # CPU Encoding Options
-FFMPEG_CODEC_OPTIONS_CPU = {
-    'h264': [
+FFMPEG_CODEC_OPTIONS_CPU = MappingProxyType({
+    'h264': (
         '-c:v', 'libx264', '-preset', 'medium', '-crf', '23',
         '-profile:v', 'high', '-level:v', '4.1'
-    ],
-    'vp9':  [
+    ),
+    'vp9':  (
         '-c:v', 'libvpx-vp9', '-crf', '31', '-b:v', '0',
         '-deadline', 'good', '-row-mt', '1'
-    ],
-    'av1':  [
+    ),
+    'av1':  (
         '-c:v', 'libaom-av1', '-crf', '35', '-b:v', '0',
         '-cpu-used', '6', '-row-mt', '1',
         '-tile-columns', '2', '-tile-rows', '2'
-    ]
-}
+    )
+})
 
 # VAAPI Hardware Encoding Options
-FFMPEG_CODEC_OPTIONS_VAAPI = {
-    'h264': [
-        '-c:v', 'h264_vaapi', '-qp', '23', '-profile:v', 'high'
-    ],
-    'vp9':  [
-        '-c:v', 'vp9_vaapi',  '-qp', '31'
-    ],
+FFMPEG_CODEC_OPTIONS_VAAPI = MappingProxyType({
+    # Constant QP: no rate-control lookahead, predictable quality
+    'h264': (
+        '-c:v', 'h264_vaapi', '-rc_mode', 'CQP', '-qp', '23', '-profile:v', 'high'
+    ),
+    'vp9':  (
+        '-c:v', 'vp9_vaapi', '-rc_mode', 'CQP', '-qp', '31'
+    ),
     # --- MODIFIED based on working command ---
     # Using bitrate control as required by rc_mode 2 on user's system
-    'av1':  [
+    'av1':  (
         '-c:v', 'av1_vaapi', '-rc_mode', '2', '-b:v', '1M' # Example bitrate
-    ]
+    )
     # -----------------------------------------
-}
+})
+# Adds '-low_power 1' to VAAPI encodes: the fixed-function encoder (VDENC)
+# of recent Intel GPUs, much faster. Off by default, as drivers without it
+# (AMD, older Intel) reject it: the encode is then retried, and the
+# remaining media encoded, without it
+VAAPI_LOW_POWER = False
 
 ENABLE_TRANSCODING = True
 VAAPI_DEVICE_PATH = "" # e.g., '/dev/dri/renderD128'
+# Codec used instead of the requested one when the GPU cannot encode that
+# one with VAAPI but can encode this one (e.g. 'h264': a fast GPU encode in
+# another format rather than a slow CPU encode). None keeps the requested
+# codec, encoded on the CPU
+VAAPI_FALLBACK_CODEC = None
 
 # --- HTML Generation Configuration ---
 HTML_TEMPLATE_DIR = "templates"
 HTML_TEMPLATE_NAME = "template.html.j2"
+# Subdirectory of the system temp dir holding compiled Jinja2 bytecode
+# (the user id is appended; the directory must be private to the user)
+JINJA_BYTECODE_CACHE_DIR_NAME = "pdf2web_jinja_cache"
+# Suffix of the file next to the HTML recording what it was rendered from
+HTML_STAMP_SUFFIX = ".stamp"
 FALLBACK_PAGE_DIMENSIONS = {"width_pt": 960.0, "height_pt": 540.0}
 
 # --- JS/CSS Library Paths ---
-SWIPER_CSS_PATH = f"{TARGET_LIBS_DIR_NAME}/swiper/swiper-bundle.min.css"
-SWIPER_JS_PATH = f"{TARGET_LIBS_DIR_NAME}/swiper/swiper-bundle.min.js"
+# Swiper paths are derived from TARGET_LIBS_DIR_NAME when requested (not at
+# import), so overriding the libs directory name at runtime is honoured.
+def _libs_file_path(libs_dir_name, relative_path):
+    """Returns the HTML-relative path of a file inside the libs directory."""
+    return f"{libs_dir_name}/{relative_path}"
+
+
+def swiper_css_path():
+    """Relative path of the Swiper stylesheet, as referenced by the HTML."""
+    return _libs_file_path(TARGET_LIBS_DIR_NAME, "swiper/swiper-bundle.min.css")
+
+
+def swiper_js_path():
+    """Relative path of the Swiper script, as referenced by the HTML."""
+    return _libs_file_path(TARGET_LIBS_DIR_NAME, "swiper/swiper-bundle.min.js")
+
+
+# The former constants, kept as aliases of the functions above
+_DERIVED_PATH_ALIASES = {
+    'SWIPER_CSS_PATH': swiper_css_path,
+    'SWIPER_JS_PATH': swiper_js_path,
+}
+
+
+def __getattr__(name):
+    """Resolves SWIPER_CSS_PATH and SWIPER_JS_PATH (deprecated)."""
+    if name in _DERIVED_PATH_ALIASES:
+        function = _DERIVED_PATH_ALIASES[name]
+        warnings.warn(f"config.{name} is deprecated; use config."
+                      f"{function.__name__}() instead.",
+                      DeprecationWarning, stacklevel=2)
+        return function()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 PRESENTATION_JS_PATH = "presentation.js"
@@ -4,14 +4,144 @@ html_generator.py
 Generates the final HTML presentation file using Jinja2 templates.
 """
 
-import html
+import collections
+import functools
+import hashlib
+import itertools
+import json
+import logging
 import os
-import traceback
+import pathlib
+import stat
+import tempfile
+from dataclasses import dataclass
 
 import jinja2
 
-# Local import
-import config
+logger = logging.getLogger(__name__)
+
+# One processed video on a slide; the template reads the fields by name
+VideoEntry = collections.namedtuple(
+    'VideoEntry', ['videoPath', 'videoMime', 'pdfRect']
+)
+
+# Autoescape policy shared by every environment (built once at import)
+_AUTOESCAPE = jinja2.select_autoescape(['html', 'xml'])
+
+
+def _create_bytecode_cache(cache_dir_name):
+    """
+    Creates an on-disk bytecode cache so compiled templates survive
+    process restarts.
+
+    Jinja2 loads (and runs) the bytecode it finds there, so the directory
+    is private to the user: created with mode 0700, and used only if it is
+    a real directory owned by the user that no one else can write to.
+
+    Args:
+        cache_dir_name (str): Name of the cache subdirectory inside the
+                              system temp directory (the user id is
+                              appended to it).
+
+    Returns:
+        jinja2.FileSystemBytecodeCache or None: The cache, or None if the
+        cache directory could not be created or is unsafe (templates are
+        then simply compiled in memory).
+    """
+    if not hasattr(os, 'getuid'):
+        # No uid to check (Windows): let Jinja2 pick its per-user directory
+        return jinja2.FileSystemBytecodeCache(pattern='%s.cache')
+    uid = os.getuid()
+    cache_dir = os.path.join(tempfile.gettempdir(), f"{cache_dir_name}-{uid}")
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        cache_stat = os.lstat(cache_dir)
+    except OSError as cache_error:
+        logger.warning(
+            "WARN: Jinja2 bytecode cache disabled (cannot create '%s'): %s",
+            cache_dir, cache_error
+        )
+        return None
+    if (not stat.S_ISDIR(cache_stat.st_mode) or cache_stat.st_uid != uid
+            or stat.S_IMODE(cache_stat.st_mode) & 0o077):
+        logger.warning(
+            "WARN: Jinja2 bytecode cache disabled ('%s' is not a private "
+            "directory of the current user).", cache_dir
+        )
+        return None
+    return jinja2.FileSystemBytecodeCache(cache_dir, '%s.cache')
+
+
+@functools.lru_cache(maxsize=8)
+def _get_jinja_env(template_dir, bytecode_cache_dir_name):
+    """
+    Returns the Jinja2 environment for a template directory, building it
+    on first use. Environments (and their compiled template caches) are
+    shared by every HtmlBuilder of the process.
+
+    Args:
+        template_dir (str): Directory containing the templates.
+        bytecode_cache_dir_name (str): See _create_bytecode_cache().
+
+    Returns:
+        jinja2.Environment: The configured environment.
+    """
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(template_dir),
+        autoescape=_AUTOESCAPE,
+        # Trim blocks to clean up whitespace around Jinja blocks
+        trim_blocks=True,
+        lstrip_blocks=True,
+        # Templates do not change during a run: skip the mtime check
+        auto_reload=False,
+        # Never evict compiled templates from the in-memory cache
+        cache_size=-1,
+        bytecode_cache=_create_bytecode_cache(bytecode_cache_dir_name)
+    )
+    # Compile every template up front so the first render does not pay
+    # for it; a broken template is reported again when it is requested
+    for template_name in env.list_templates(extensions=['j2']):
+        try:
+            env.get_template(template_name)
+        except jinja2.exceptions.TemplateError as template_error:
+            logger.warning("WARN: Could not precompile template '%s': %s",
+                           template_name, template_error)
+    logger.info("Jinja2 environment loaded from '%s'", template_dir)
+    return env
+
+
+@dataclass(frozen=True)
+class HtmlConfig:
+    """Snapshot of the config.py values used to build the HTML file."""
+    __slots__ = (
+        'template_dir', 'template_name', 'bytecode_cache_dir_name',
+        'swiper_css_path', 'swiper_js_path', 'presentation_js_path',
+        'svg_extension', 'fallback_dimensions', 'stamp_suffix',
+    )
+    template_dir: str
+    template_name: str
+    bytecode_cache_dir_name: str
+    swiper_css_path: str
+    swiper_js_path: str
+    presentation_js_path: str
+    svg_extension: str
+    fallback_dimensions: dict
+    stamp_suffix: str
+
+    @classmethod
+    def from_config(cls, config_obj):
+        """Reads the required values from a config module/object."""
+        return cls(
+            template_dir=config_obj.HTML_TEMPLATE_DIR,
+            template_name=config_obj.HTML_TEMPLATE_NAME,
+            bytecode_cache_dir_name=config_obj.JINJA_BYTECODE_CACHE_DIR_NAME,
+            swiper_css_path=config_obj.swiper_css_path(),
+            swiper_js_path=config_obj.swiper_js_path(),
+            presentation_js_path=config_obj.PRESENTATION_JS_PATH,
+            svg_extension=config_obj.SVG_OUTPUT_EXTENSION,
+            fallback_dimensions=config_obj.FALLBACK_PAGE_DIMENSIONS,
+            stamp_suffix=config_obj.HTML_STAMP_SUFFIX,
+        )
 
 
 class HtmlBuilder:
@@ -24,180 +154,201 @@ class HtmlBuilder:
         Args:
             config_obj: The configuration object (from config.py).
         """
-        self.config = config_obj
-        self.template_dir = self.config.HTML_TEMPLATE_DIR
-        self.template_name = self.config.HTML_TEMPLATE_NAME
+        self.cfg = HtmlConfig.from_config(config_obj)
         self.jinja_env = None
+        self._template = None
         try:
-            # Configure the Jinja2 environment
-            self.jinja_env = jinja2.Environment(
-                loader=jinja2.FileSystemLoader(self.template_dir),
-                autoescape=jinja2.select_autoescape(['html', 'xml']),
-                # Trim blocks to clean up whitespace around Jinja blocks
-                trim_blocks=True,
-                lstrip_blocks=True
+            self.jinja_env = _get_jinja_env(
+                self.cfg.template_dir, self.cfg.bytecode_cache_dir_name
             )
-            # Add 'round' as a global filter if needed (for data attributes)
-            self.jinja_env.filters['round'] = round
-            print(f"Jinja2 environment loaded from '{self.template_dir}'")
         except Exception as jinja_init_error:
-            print(
-                f"ERROR: Failed to initialize Jinja2 (check path "
-                f"'{self.template_dir}'): {jinja_init_error}"
+            logger.error(
+                "ERROR: Failed to initialize Jinja2 (check path '%s'): %s",
+                self.cfg.template_dir, jinja_init_error
             )
             # self.jinja_env remains None
 
+        if self.jinja_env:
+            # Compile the template once; generate() reuses it on every call
+            try:
+                self._template = self.jinja_env.get_template(self.cfg.template_name)
+            except jinja2.exceptions.TemplateNotFound:
+                logger.error(
+                    "ERROR: Jinja2 template '%s' not found in '%s'. "
+                    "Please check the path.",
+                    self.cfg.template_name, self.cfg.template_dir
+                )
+            except jinja2.exceptions.TemplateError:
+                logger.exception("ERROR: Jinja2 template error during loading")
+
     def _prepare_context(self, all_page_data, num_total_pages, svg_dir_rel,
-                         media_dir_rel, output_html_path):
-        """Prepares the context dictionary for the Jinja2 template."""
+                         media_dir_rel, html_output_dir):
+        """Prepares the context dictionary for the Jinja2 template.
+
+        ``html_output_dir`` is the directory (a ``pathlib.Path``) the HTML
+        file is written to; relative asset paths are resolved against it.
+        """
+        # Bind config values used in the loops below to locals once
+        cfg = self.cfg
+        fallback_dims = cfg.fallback_dimensions
+        fallback_width = fallback_dims['width_pt']
+        fallback_height = fallback_dims['height_pt']
+        svg_name_template = "page_{}" + cfg.svg_extension
+        # Relative URL prefix for the src attribute in HTML; only the
+        # directory can hold backslashes, so normalize it a single time
+        svg_path_prefix = svg_dir_rel.replace("\\", "/") + "/"
+
         context = {
             'html_title': "Swiper.js Presentation",
             'slides': [],
             'num_total_pages': num_total_pages,
             'svg_dir': svg_dir_rel,
             'media_dir': media_dir_rel,
-            'swiper_css_path': self.config.SWIPER_CSS_PATH,
-            'swiper_js_path': self.config.SWIPER_JS_PATH,
-            'presentation_js_path': self.config.PRESENTATION_JS_PATH,
-            'fallback_slide_width': self.config.FALLBACK_PAGE_DIMENSIONS['width_pt'],
-            'fallback_slide_height': self.config.FALLBACK_PAGE_DIMENSIONS['height_pt'],
-            # --- NEW: Default aspect ratio as a safe fallback ---
-            'ref_aspect_ratio': 16 / 9
-            # ---------------------------------------------------
+            'swiper_css_path': cfg.swiper_css_path,
+            'swiper_js_path': cfg.swiper_js_path,
+            'presentation_js_path': cfg.presentation_js_path,
+            'fallback_slide_width': fallback_width,
+            'fallback_slide_height': fallback_height,
         }
 
-        # Find dimensions of the first valid page to use as CSS reference
-        first_valid_dims = None
+        # --- Read every metadata entry once into per-field lists ---
+        # Both the reference search and the per-slide fill below work on
+        # these lists, so each entry is looked up and validated only once.
+        item_pages = []
+        item_dims = []
+        item_dims_valid = []
+        item_has_video = []
+        item_output_paths = []
+        item_rects = []
+        item_mimes = []
         for item in all_page_data:
-            page_dims = item.get('pageDimensions')
-            if (page_dims and isinstance(page_dims, dict) and
-                    page_dims.get('width_pt', 0) > 0 and
-                    page_dims.get('height_pt', 0) > 0):
-                first_valid_dims = page_dims
-                break  # Found the first valid one
+            idx = item.get('pageIndex')
+            if idx is None:
+                continue
+            dims = item.get('pageDimensions')
+            item_pages.append(idx)
+            item_dims.append(dims)
+            item_dims_valid.append(
+                isinstance(dims, dict) and
+                dims.get('width_pt', 0) > 0 and dims.get('height_pt', 0) > 0
+            )
+            item_has_video.append(item.get('hasVideo'))
+            item_output_paths.append(item.get('outputPath'))
+            item_rects.append(item.get('pdfRect'))
+            item_mimes.append(item.get('contentTypeDetected', 'video/unknown'))
+
+        # Find dimensions of the first valid page to use as CSS reference
+        first_valid_dims = next(
+            itertools.compress(item_dims, item_dims_valid), None
+        )
 
         # If no valid dimension found, use fallback from config
         if not first_valid_dims:
-            print("WARN: No valid page dimensions found in metadata. "
-                  "Using fallback dimensions for reference.")
-            first_valid_dims = self.config.FALLBACK_PAGE_DIMENSIONS
+            logger.warning("WARN: No valid page dimensions found in metadata. "
+                           "Using fallback dimensions for reference.")
+            first_valid_dims = fallback_dims
 
-        ref_width = first_valid_dims.get(
-            'width_pt', self.config.FALLBACK_PAGE_DIMENSIONS['width_pt']
-        )
-        ref_height = first_valid_dims.get(
-            'height_pt', self.config.FALLBACK_PAGE_DIMENSIONS['height_pt']
-        )
-
-        # Ensure they are valid numbers before calculation
-        ref_width_num = ref_width if (
-            isinstance(ref_width, (int, float)) and ref_width > 0
-        ) else self.config.FALLBACK_PAGE_DIMENSIONS['width_pt']
-
-        ref_height_num = ref_height if (
-            isinstance(ref_height, (int, float)) and ref_height > 0
-        ) else self.config.FALLBACK_PAGE_DIMENSIONS['height_pt']
-
-        # --- MODIFIED: Calculate and store aspect ratio ---
-        # Check for division by zero
-        if ref_height_num > 0:
-            calculated_ratio = ref_width_num / ref_height_num
-            context['ref_aspect_ratio'] = calculated_ratio
-        else:
-            # Use the default ratio already set if height is invalid
-            print(
-                f"WARN: Reference height ({ref_height_num}) is invalid, "
-                f"using default aspect ratio {context['ref_aspect_ratio']}."
-            )
+        # Both candidates are known to be positive: the search above only
+        # accepts dimensions > 0 and the config fallback is always valid
+        ref_width = first_valid_dims['width_pt']
+        ref_height = first_valid_dims['height_pt']
+        context['ref_aspect_ratio'] = ref_width / ref_height
 
         # Store rounded dimensions (less critical now for layout)
-        context['ref_slide_width'] = round(ref_width_num)
-        context['ref_slide_height'] = round(ref_height_num)
-        # -------------------------------------------------
-
-        print(
-            f"Reference size for CSS/JS: "
-            f"{context['ref_slide_width']}x{context['ref_slide_height']}px "
-            f"(Aspect Ratio: {context['ref_aspect_ratio']:.4f})"
+        context['ref_slide_width'] = round(ref_width)
+        context['ref_slide_height'] = round(ref_height)
+
+        logger.info(
+            "Reference size for CSS/JS: %dx%dpx (Aspect Ratio: %.4f)",
+            context['ref_slide_width'], context['ref_slide_height'],
+            context['ref_aspect_ratio']
         )
 
         # --- Organize data per slide for the template ---
-        # Create an entry for each page, even if it has no extracted media
-        slides_dict = {
-            i: {'pageIndex': i, 'videos': [], 'dimensions': None, 'svg_exists': False}
-            for i in range(num_total_pages)
-        }
-        # Get the directory where the HTML will be written
-        html_output_dir = os.path.dirname(output_html_path) or '.'
-
-        for item in all_page_data:
-            idx = item.get('pageIndex')
-            if idx is not None and 0 <= idx < num_total_pages:
-                page_entry = slides_dict[idx]
-
-                # Store page dimensions (use the first valid one found)
-                if not page_entry['dimensions'] and item.get('pageDimensions'):
-                    dims = item['pageDimensions']
-                    # Validate dimensions before storing
-                    if (isinstance(dims, dict) and
-                            dims.get('width_pt', 0) > 0 and
-                            dims.get('height_pt', 0) > 0):
-                        page_entry['dimensions'] = dims
-                    else:
-                        print(
-                            f"WARN Slide {idx + 1}: Received invalid dimensions: "
-                            f"{dims}. Fallback will be used in template."
-                        )
-
-                # If this item represents a successfully processed video
-                if (item.get('hasVideo') and item.get('outputPath') and
-                        item.get('pdfRect')):
-                    # 'outputPath' should already be the correct relative path
-                    # (e.g., 'videos/file.mp4')
-                    video_data_for_template = {
-                        'videoPath': item['outputPath'],  # Path used in src=""
-                        'videoMime': item.get('contentTypeDetected', 'video/unknown'),
-                        'pdfRect': item['pdfRect']  # Contains llx, lly, urx, ury
-                    }
-                    page_entry['videos'].append(video_data_for_template)
-
-        # --- Check SVG existence and ensure dimensions for all slides ---
-        for i in range(num_total_pages):
-            page_entry = slides_dict[i]
-            svg_file_name = f"page_{i + 1}{self.config.SVG_OUTPUT_EXTENSION}"
-
-            # Check existence using absolute path relative to HTML output dir
-            svg_abs_path = os.path.abspath(
-                os.path.join(html_output_dir, svg_dir_rel, svg_file_name)
-            )
-            page_entry['svg_exists'] = os.path.exists(svg_abs_path)
-
-            # Relative path for the src attribute in HTML
-            # Ensure forward slashes for web compatibility
-            page_entry['svg_path'] = f"{svg_dir_rel}/{svg_file_name}".replace("\\", "/")
+        # First valid dimensions and the processed videos of each page
+        page_dims = [None] * num_total_pages
+        page_videos = {}
+        for k, idx in enumerate(item_pages):
+            if not 0 <= idx < num_total_pages:
+                continue
+            # Store page dimensions (use the first valid one found)
+            dims = item_dims[k]
+            if not page_dims[idx] and dims:
+                if item_dims_valid[k]:
+                    page_dims[idx] = dims
+                else:
+                    logger.warning(
+                        "WARN Slide %d: Received invalid dimensions: %s. "
+                        "Fallback will be used in template.", idx + 1, dims
+                    )
+
+            # If this item represents a successfully processed video
+            if item_has_video[k] and item_output_paths[k] and item_rects[k]:
+                # 'outputPath' should already be the correct relative path
+                # (e.g., 'videos/file.mp4')
+                video_data_for_template = VideoEntry(
+                    videoPath=item_output_paths[k],  # Path used in src=""
+                    videoMime=item_mimes[k],
+                    pdfRect=item_rects[k]  # Contains llx, lly, urx, ury
+                )
+                page_videos.setdefault(idx, []).append(video_data_for_template)
 
-            # Assign fallback dimensions if none were found for this page
-            if not page_entry['dimensions']:
-                page_entry['dimensions'] = self.config.FALLBACK_PAGE_DIMENSIONS
-                print(
-                    f"INFO Slide {i + 1}: Using fallback dimensions "
-                    f"(not found in metadata)."
+        # List the SVG directory once instead of stat'ing every page
+        svg_dir_abs = html_output_dir / svg_dir_rel
+        try:
+            with os.scandir(svg_dir_abs) as svg_entries:
+                existing_svg_files = frozenset(
+                    entry.name for entry in svg_entries if entry.is_file()
                 )
-            # Final check: ensure dimensions are a dict (should be by now)
-            elif not isinstance(page_entry['dimensions'], dict):
-                print(
-                    f"ERROR Slide {i + 1}: Incorrect dimensions format "
-                    f"({type(page_entry['dimensions'])}). Using fallback."
+        except (FileNotFoundError, NotADirectoryError):
+            existing_svg_files = frozenset()
+        except OSError as svg_dir_error:
+            # E.g. an unreadable directory: the slides get no background
+            logger.warning("WARN: Cannot list the SVG directory '%s': %s",
+                           svg_dir_abs, svg_dir_error)
+            existing_svg_files = frozenset()
+
+        # --- Build one entry per page (even without extracted media) ---
+        slides = []
+        svg_file_names = map(svg_name_template.format, range(1, num_total_pages + 1))
+        for i, svg_file_name in enumerate(svg_file_names):
+            # Assign fallback dimensions if none were found for this page
+            dims = page_dims[i]
+            if not dims:
+                dims = fallback_dims
+                logger.info(
+                    "INFO Slide %d: Using fallback dimensions "
+                    "(not found in metadata).", i + 1
                 )
-                page_entry['dimensions'] = self.config.FALLBACK_PAGE_DIMENSIONS
+
+            slides.append({
+                'pageIndex': i,
+                'videos': page_videos.get(i, []),
+                'dimensions': dims,
+                'svg_exists': svg_file_name in existing_svg_files,
+                'svg_path': svg_path_prefix + svg_file_name,
+            })
 
         # Add the processed list of slide data to the context
-        context['slides'] = list(slides_dict.values())
-        # --- DEBUGGING ---
-        print(f"DEBUG: Number of slides being passed to template: {len(context['slides'])}")
-        # --- END DEBUGGING ---
+        context['slides'] = slides
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("DEBUG: Number of slides being passed to template: %d",
+                         len(slides))
         return context
 
+    def _compute_stamp(self, context):
+        """
+        Returns a digest of everything the rendered HTML depends on: the
+        template context and the template file's modification time.
+        Returns None if the template file cannot be stat'ed.
+        """
+        try:
+            template_mtime = os.stat(self._template.filename).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+        payload = json.dumps([context, template_mtime], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
     def generate(self, all_page_data, num_total_pages, output_html_path,
                  svg_dir_rel, media_dir_rel):
         """
@@ -218,59 +369,85 @@ class HtmlBuilder:
             bool: True if HTML generation was successful, False otherwise.
         """
         if not self.jinja_env:
-            print(
+            logger.error(
                 "ERROR: Jinja2 environment not initialized. "
                 "HTML generation cancelled."
             )
             return False
+        if not self._template:
+            logger.error(
+                "ERROR: Jinja2 template '%s' could not be loaded from '%s'. "
+                "HTML generation cancelled.", self.cfg.template_name, self.cfg.template_dir
+            )
+            return False
 
-        print(f"\nGenerating Swiper.js HTML to: {output_html_path}")
-        print(
-            f"  Using Template: {os.path.join(self.template_dir, self.template_name)}"
-        )
-        print(f"  Relative SVG path for HTML: {svg_dir_rel}/")
-        print(f"  Relative Videos path for HTML: {media_dir_rel}/")
+        logger.info("\nGenerating Swiper.js HTML to: %s", output_html_path)
+        logger.info("  Using Template: %s",
+                    os.path.join(self.cfg.template_dir, self.cfg.template_name))
+        logger.info("  Relative SVG path for HTML: %s/", svg_dir_rel)
+        logger.info("  Relative Videos path for HTML: %s/", media_dir_rel)
+
+        # --- Ensure Output Directory Exists ---
+        out_path = pathlib.Path(output_html_path)
+        html_output_dir = out_path.parent
+        try:
+            html_output_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            logger.exception("ERROR: Could not create output directory '%s'",
+                             html_output_dir)
+            return False
 
         # --- Prepare Context ---
         try:
             context = self._prepare_context(
                 all_page_data, num_total_pages, svg_dir_rel, media_dir_rel,
-                output_html_path
+                html_output_dir
             )
-        except Exception as context_error:
-            print(f"ERROR: Failed to prepare context for HTML generation: {context_error}")
-            traceback.print_exc()
+        except Exception:
+            logger.exception("ERROR: Failed to prepare context for HTML generation")
             return False
 
+        # --- Skip Rendering If The Output Is Up To Date ---
+        stamp_path = out_path.with_name(out_path.name + self.cfg.stamp_suffix)
+        stamp = self._compute_stamp(context)
+        if stamp and out_path.is_file():
+            try:
+                previous_stamp = stamp_path.read_text(encoding="utf-8")
+            except OSError:
+                previous_stamp = None
+            if previous_stamp == stamp:
+                logger.info("HTML file is up to date, skipping rendering: %s",
+                            output_html_path)
+                return True
+
         # --- Render and Write File ---
         try:
-            template = self.jinja_env.get_template(self.template_name)
-            html_content = template.render(context)
-
-            # Ensure output directory exists
-            output_dir = os.path.dirname(output_html_path) or '.'
-            os.makedirs(output_dir, exist_ok=True)
-
-            with open(output_html_path, "w", encoding="utf-8") as file_handle:
-                file_handle.write(html_content)
-
-            print(f"Successfully generated Swiper.js HTML file: {output_html_path}")
-            return True
-
-        except jinja2.exceptions.TemplateNotFound:
-            print(
-                f"ERROR: Jinja2 template '{self.template_name}' not found "
-                f"in '{self.template_dir}'. Please check the path."
-            )
-            return False
-        except jinja2.exceptions.TemplateError as template_error:
-            print(f"ERROR: Jinja2 template error during rendering: {template_error}")
-            traceback.print_exc(limit=2)
+            # Drop the old stamp first so a failed write is never trusted
+            if stamp_path.exists():
+                stamp_path.unlink()
+
+            # Stream the rendered chunks to disk instead of building the
+            # whole document in memory; buffering groups small writes
+            html_stream = self._template.stream(context)
+            html_stream.enable_buffering(size=64)
+            with out_path.open("w", encoding="utf-8") as file_handle:
+                html_stream.dump(file_handle)
+
+            logger.info("Successfully generated Swiper.js HTML file: %s",
+                        output_html_path)
+        except jinja2.exceptions.TemplateError:
+            logger.exception("ERROR: Jinja2 template error during rendering")
             return False
-        except Exception as render_error:
-            print(
-                f"ERROR: Unexpected error during HTML rendering/writing: "
-                f"{render_error}"
-            )
-            traceback.print_exc()
+        except Exception:
+            logger.exception("ERROR: Unexpected error during HTML rendering/writing")
             return False
+
+        # The stamp only enables skipping the next run: failing to write it
+        # does not affect the generated file
+        if stamp:
+            try:
+                stamp_path.write_text(stamp, encoding="utf-8")
+            except OSError as stamp_error:
+                logger.warning("WARN: Could not write stamp file '%s': %s",
+                               stamp_path, stamp_error)
+        return True
@@ -10,20 +10,181 @@ target video codec, optional video scaling, and VAAPI hardware acceleration (Lin
 """
 
 import argparse
+import concurrent.futures
+import functools
+import itertools
 import json
+import logging
+import multiprocessing
 import os
 import pathlib
 import shutil
+import subprocess
 import sys
-import traceback
 
-# Import refactored modules
+# Optional faster JSON encoder for the metadata file
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Import refactored modules. The others (utils, html_generator,
+# media_extractor, pdf_processor, svg_converter) pull in PyMuPDF, pikepdf,
+# libmagic and Jinja2: they are imported where they are used, once the
+# command line is valid, so `--help` and usage errors return immediately.
 import config
-import utils
-from html_generator import HtmlBuilder
-from media_extractor import MediaProcessor
-from pdf_processor import PdfAnalyzer
-from svg_converter import SvgConverter
+
+logger = logging.getLogger(__name__)
+# Loggers whose INFO records are shown (progress); other libraries only
+# show their warnings (e.g. pikepdf logs its setup at INFO)
+_PROJECT_LOGGER_NAMES = (
+    __name__, 'media_extractor', 'pdf_processor', 'svg_converter',
+    'html_generator', 'utils',
+)
+
+
+class _BufferedStreamHandler(logging.StreamHandler):
+    """
+    StreamHandler that does not flush after INFO records: they are left
+    to the stream's buffer and flushed explicitly (see _flush_output).
+    Warnings and errors are flushed right away, so they are neither
+    delayed nor lost if the process dies.
+    """
+
+    def emit(self, record):
+        """Writes the record; flushes the stream if it is a warning or worse."""
+        super().emit(record)
+        if record.levelno >= logging.WARNING:
+            super().flush()
+
+    def flush(self):
+        """Does nothing; use _flush_output()."""
+
+
+def _configure_logging():
+    """
+    Shows log records as plain lines on stdout: INFO and above for this
+    program, warnings and errors for the libraries. On a terminal, each line
+    is shown as soon as it is logged; when stdout is redirected, it is
+    block-buffered (shared with the modules that still print), so a long
+    run does not pay for one write and flush per line.
+    """
+    if sys.stdout.isatty():
+        handler = logging.StreamHandler(sys.stdout)
+    else:
+        if hasattr(sys.stdout, 'reconfigure'):
+            sys.stdout.reconfigure(line_buffering=False)
+        handler = _BufferedStreamHandler(sys.stdout)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s",
+                        handlers=[handler])
+    for logger_name in _PROJECT_LOGGER_NAMES:
+        logging.getLogger(logger_name).setLevel(logging.INFO)
+
+
+def _flush_output():
+    """Writes out the buffered log output (at step and page boundaries)."""
+    sys.stdout.flush()
+
+
+def _copy_tree_threaded(source_dir, target_dir):
+    """
+    Copies a directory tree, dispatching the file copies to a thread pool.
+
+    The tree is walked once with os.scandir: directories are created on the
+    way, files are copied (with metadata) by the workers. Faster than
+    shutil.copytree for trees made of many small files.
+
+    Args:
+        source_dir (str): Directory to copy.
+        target_dir (str): Destination; must not exist yet.
+    """
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        copy_futures = []
+        pending_dirs = [(source_dir, target_dir)]
+        while pending_dirs:
+            current_source, current_target = pending_dirs.pop()
+            os.makedirs(current_target)
+            with os.scandir(current_source) as entries:
+                for entry in entries:
+                    entry_target = os.path.join(current_target, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_dirs.append((entry.path, entry_target))
+                    else:
+                        copy_futures.append(executor.submit(
+                            shutil.copy2, entry.path, entry_target
+                        ))
+        # Re-raise the first copy error, if any
+        for copy_future in copy_futures:
+            copy_future.result()
+
+
+def _copy_tree(source_dir, target_dir):
+    """
+    Copies a directory tree with the fastest copier available: robocopy
+    (multithreaded) on Windows, a thread pool elsewhere, and
+    shutil.copytree as a last resort.
+
+    Args:
+        source_dir (str): Directory to copy.
+        target_dir (str): Destination; must not exist yet.
+    """
+    robocopy_path = shutil.which('robocopy') if sys.platform == 'win32' else None
+    if robocopy_path:
+        result = subprocess.run(
+            [robocopy_path, source_dir, target_dir, '/MT:16', '/E',
+             '/NFL', '/NDL', '/NJH', '/NJS'],
+            capture_output=True, check=False
+        )
+        # Robocopy exit codes below 8 all mean success (1 = files copied)
+        if result.returncode < 8:
+            return
+        logger.warning(
+            "WARN: robocopy failed (code: %s). Falling back to a Python copy.",
+            result.returncode
+        )
+        shutil.rmtree(target_dir, ignore_errors=True)
+    else:
+        try:
+            _copy_tree_threaded(source_dir, target_dir)
+            return
+        except OSError as threaded_copy_error:
+            logger.warning(
+                "WARN: Threaded copy failed (%s). Falling back to shutil.copytree.",
+                threaded_copy_error
+            )
+            shutil.rmtree(target_dir, ignore_errors=True)
+    shutil.copytree(source_dir, target_dir)
+
+
+def _tree_stamp(source_dir):
+    """
+    Returns a string identifying the current state of a directory tree:
+    the relative path, size and modification time of each of its files.
+    Reading it only stats the files, it never opens them.
+
+    Args:
+        source_dir (str): Root of the tree.
+
+    Returns:
+        str: The stamp, one line per file, in sorted order.
+    """
+    stamp_lines = []
+    pending_dirs = [source_dir]
+    while pending_dirs:
+        with os.scandir(pending_dirs.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending_dirs.append(entry.path)
+                else:
+                    entry_stat = entry.stat()
+                    relative_path = os.path.relpath(entry.path, source_dir)
+                    stamp_lines.append(
+                        f"{relative_path}\t{entry_stat.st_size}\t"
+                        f"{entry_stat.st_mtime_ns}"
+                    )
+    stamp_lines.sort()
+    return "\n".join(stamp_lines)
 
 
 def copy_libs(source_dir, target_dir):
@@ -35,8 +196,8 @@ def copy_libs(source_dir, target_dir):
         target_dir (str): Path to the main output directory ('output').
 
     Returns:
-        bool: True if copying succeeds or if the directory already exists
-              after cleanup, False on error.
+        bool: True if copying succeeds or if the target already holds an
+              up-to-date copy, False on error.
     """
     # Path to the source 'swiper' directory inside 'libs'
     source_swiper_path = os.path.join(source_dir, config.SOURCE_LIBS_DIR, 'swiper')
@@ -44,16 +205,33 @@ def copy_libs(source_dir, target_dir):
     target_libs_path = os.path.join(target_dir, config.TARGET_LIBS_DIR_NAME)
     # Final path for the 'swiper' directory in the output folder
     target_swiper_path = os.path.join(target_libs_path, 'swiper')
+    # Records which source tree the current copy was made from
+    stamp_path = os.path.join(target_libs_path, '.swiper_stamp')
 
     if not os.path.isdir(source_swiper_path):
-        print(f"WARN: Swiper source directory not found: '{source_swiper_path}'. "
-              "Libs will not be copied.")
+        logger.warning(
+            "WARN: Swiper source directory not found: '%s'. Libs will not be copied.",
+            source_swiper_path
+        )
         return False
 
     try:
+        # Skip the copy if the target is a copy of the unchanged source
+        source_stamp = _tree_stamp(source_swiper_path)
+        if os.path.isdir(target_swiper_path) and os.path.isfile(stamp_path):
+            with open(stamp_path, 'r', encoding='utf-8') as stamp_file:
+                if stamp_file.read() == source_stamp:
+                    logger.info(
+                        "Swiper libraries already up to date in: %s",
+                        target_swiper_path
+                    )
+                    return True
+            # Stale copy: its stamp must not survive a failed re-copy
+            os.remove(stamp_path)
+
         # Clean up destination before copying
         if os.path.isdir(target_swiper_path):
-            print(f"Cleaning up old directory: {target_swiper_path}")
+            logger.info("Cleaning up old directory: %s", target_swiper_path)
             shutil.rmtree(target_swiper_path)
         elif os.path.exists(target_swiper_path):
             # Just in case it's a file by mistake
@@ -63,21 +241,310 @@ def copy_libs(source_dir, target_dir):
         os.makedirs(target_libs_path, exist_ok=True)
 
         # Copy the directory tree
-        print(f"Copying '{source_swiper_path}' to '{target_swiper_path}'...")
-        shutil.copytree(source_swiper_path, target_swiper_path)
-        print("Swiper libraries copied successfully.")
+        logger.info("Copying '%s' to '%s'...", source_swiper_path, target_swiper_path)
+        _copy_tree(source_swiper_path, target_swiper_path)
+        with open(stamp_path, 'w', encoding='utf-8') as stamp_file:
+            stamp_file.write(source_stamp)
+        logger.info("Swiper libraries copied successfully.")
         return True
     except Exception as error:
-        print(f"ERROR copying Swiper libraries: {error}")
-        traceback.print_exc(limit=1)
+        logger.exception("ERROR copying Swiper libraries: %s", error)
         return False
 
 
-def main():
-    """Main function orchestrating the conversion process."""
-    print(f"***** STARTING ORCHESTRATOR ({os.path.basename(__file__)}) *****")
+def _copy_assets(script_dir, output_base_dir, presentation_js_output_path):
+    """
+    Copies the Swiper libraries and the custom presentation script into
+    the output directory.
 
-    # --- Argument Parsing ---
+    Only touches the output directory, so it can run alongside Step 1.
+
+    Args:
+        script_dir (str): Directory of this script (contains 'libs' and
+                          the custom script).
+        output_base_dir (str): Main output directory.
+        presentation_js_output_path (str or os.PathLike): Destination of
+                                                          the custom script.
+    """
+    logger.info("\n--- Copying JS/CSS libraries and custom script ---")
+    # copy_libs expects the parent directory containing 'libs'
+    source_libs_dir_parent = script_dir
+    libs_copied_ok = copy_libs(source_libs_dir_parent, output_base_dir)
+    if not libs_copied_ok:
+        logger.warning("WARN: Swiper libraries could not be copied.")
+
+    # Copy custom JS
+    js_filename = os.path.basename(config.PRESENTATION_JS_PATH)
+    source_presentation_js = os.path.join(script_dir, js_filename)
+    if os.path.exists(source_presentation_js):
+        try:
+            shutil.copy2(source_presentation_js, presentation_js_output_path)
+            logger.info("Copied '%s' successfully.", js_filename)
+        except Exception as copy_js_error:
+            logger.error("ERROR copying %s: %s", js_filename, copy_js_error)
+    else:
+        logger.warning(
+            "WARN: Custom script '%s' not found in '%s'. Output HTML might lack "
+            "functionality.",
+            js_filename, script_dir
+        )
+    _flush_output()
+
+
+def _page_placeholder(page_num, page_dims):
+    """Returns the metadata record of a page without processed media."""
+    logger.info("  Adding placeholder for page %s.", page_num + 1)
+    return {
+        "pageIndex": page_num,
+        "pageDimensions": page_dims,
+        "hasVideo": False
+    }
+
+
+def _process_page(pdf_analyzer, media_processor, page_num, num_pages, page_dims,
+                  annotation_jobs=1):
+    """
+    Extracts and processes the media annotations of one PDF page.
+
+    Args:
+        pdf_analyzer (PdfAnalyzer): Analyzer of the opened input PDF.
+        media_processor (MediaProcessor): Processor used for the media.
+        page_num (int): The 0-based index of the page.
+        num_pages (int): Total number of pages (for progress messages).
+        page_dims (dict): Validated dimensions of the page.
+        annotation_jobs (int): Maximum number of media annotations of the
+                               page processed concurrently (threads).
+
+    Returns:
+        list: The metadata records of the page: one per processed media, or
+              a single placeholder if no media could be processed.
+    """
+    page_records = []
+    logger.info("\n--- Processing Page %s/%s ---", page_num + 1, num_pages)
+    page_has_processed_video = False
+
+    media_annotations = pdf_analyzer.find_media_annotations(page_num)
+
+    if not media_annotations:
+        logger.info("  No media annotations found on this page.")
+    else:
+        logger.info("  Found %s media annotation(s).", len(media_annotations))
+        # Check for required annotation data before dispatching any work
+        annotation_tasks = []
+        for annot_index, annot_info in enumerate(media_annotations):
+            if annot_info.get('stream_ref') and annot_info.get('rect'):
+                annotation_tasks.append((annot_index, annot_info))
+            else:
+                logger.warning(
+                    "    WARN: Skipping annotation %s (missing stream or rect).",
+                    annot_index+1
+                )
+
+        task_results = media_processor.process_annotations_batch(
+            page_num, annotation_tasks, max_workers=annotation_jobs
+        )
+
+        for (annot_index, _), processed_media_info in zip(annotation_tasks, task_results):
+            if processed_media_info:
+                processed_media_info['pageDimensions'] = page_dims
+                processed_media_info['hasVideo'] = True
+                page_records.append(processed_media_info)
+                page_has_processed_video = True
+                logger.info(
+                    "    +++ Media processed successfully -> %s (Type: %s)",
+                    processed_media_info.get('outputPath'),
+                    processed_media_info.get('contentTypeDetected')
+                )
+            else:
+                logger.info(
+                    "    --- Failed to process media annotation %s.",
+                    annot_index+1
+                )
+
+    # Add a placeholder if no media was processed for this page
+    if not page_has_processed_video:
+        page_records.append(_page_placeholder(page_num, page_dims))
+
+    # Emit the page's output in one go (also from worker processes)
+    _flush_output()
+    return page_records
+
+
+def _run_svg(svg_method_to_use, svg_dir_abs, pdf_input_path, num_pages,
+             dependencies, svg_jobs=1, cancel_event=None):
+    """
+    Converts every page of the PDF to SVG (Step 2 of the orchestrator).
+
+    Only touches the PDF and the SVG directory, so it can run alongside
+    the media processing of Step 1.
+
+    Args:
+        svg_method_to_use (str): The available method ('pymupdf'/'pdf2svg').
+        svg_dir_abs (str): Output directory for the SVG files.
+        pdf_input_path (str): Path to the input PDF file.
+        num_pages (int): Number of pages expected in the PDF.
+        dependencies (dict): Result of utils.check_dependencies().
+        svg_jobs (int): Number of worker processes rendering the pages
+                        with PyMuPDF (pdf2svg converts them all at once).
+        cancel_event (optional): Set to stop the PyMuPDF rendering early
+                                 (see SvgConverter).
+
+    Returns:
+        bool: True if all pages were converted, False otherwise.
+    """
+    from svg_converter import SvgConverter
+
+    logger.info("\n--- Step 2: Converting PDF to SVG ---")
+    svg_success = False
+    svg_converter = None
+    try:
+        logger.info("Initializing SVG converter using %s...", svg_method_to_use)
+        if svg_method_to_use == 'pymupdf':
+            try:
+                svg_converter = SvgConverter(
+                    config_obj=config,
+                    svg_output_dir=svg_dir_abs,
+                    method='pymupdf',
+                    workers=svg_jobs,
+                    cancel_event=cancel_event
+                )
+            except ImportError as import_error:
+                # The dependency check only located PyMuPDF: it may still
+                # fail to load (broken install, unrelated 'fitz' package)
+                if not dependencies['pdf2svg']:
+                    raise
+                logger.warning("WARN: %s", import_error)
+                logger.info("INFO: Attempting to use 'pdf2svg' as fallback.")
+                svg_method_to_use = 'pdf2svg'
+        if svg_method_to_use == 'pdf2svg':
+            svg_converter = SvgConverter(
+                config_obj=config,
+                svg_output_dir=svg_dir_abs,
+                method='pdf2svg',
+                pdf2svg_path=dependencies['pdf2svg']
+            )
+
+        # Execute conversion if converter was successfully initialized
+        if svg_converter:
+            logger.info("Starting SVG conversion via %s...", svg_method_to_use)
+            svg_success = svg_converter.convert_all(
+                pdf_path=pdf_input_path,
+                num_pages_expected=num_pages
+            )
+            if not svg_success:
+                logger.warning(
+                    "WARN: SVG conversion via '%s' failed or was incomplete.",
+                    svg_method_to_use
+                )
+        # else: Should not happen if logic is correct
+
+    except (ImportError, ValueError, NotImplementedError) as init_error:
+        logger.error(
+            "ERROR initializing SVG converter (%s): %s",
+            svg_method_to_use, init_error
+        )
+        svg_success = False # Ensure failure state
+    except Exception as runtime_error:
+        logger.exception(
+            "ERROR during SVG conversion (%s): %s",
+            svg_method_to_use, runtime_error
+        )
+        svg_success = False # Ensure failure state
+    _flush_output()
+    return svg_success
+
+
+def _save_json_metadata(all_page_data, json_output_path):
+    """
+    Writes the page metadata as indented UTF-8 JSON.
+
+    Uses orjson when it is installed (several times faster), with the
+    standard json module as fallback; both produce the same layout.
+
+    Args:
+        all_page_data (list): The metadata records of all pages.
+        json_output_path (str or os.PathLike): Destination file.
+    """
+    if orjson is not None:
+        try:
+            json_bytes = orjson.dumps(all_page_data, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            pass  # Value orjson cannot serialize: use the json module
+        else:
+            pathlib.Path(json_output_path).write_bytes(json_bytes)
+            return
+    with open(json_output_path, 'w', encoding='utf-8') as json_file:
+        json.dump(all_page_data, json_file, indent=2, ensure_ascii=False)
+
+
+def _dir_has_file(dir_path):
+    """
+    Tells whether a directory contains at least one regular file.
+
+    Stops at the first file found; the directory handle is closed right
+    away, and the entry types come from scandir (no extra stat call).
+
+    Args:
+        dir_path (str or os.PathLike): Directory to check.
+
+    Returns:
+        bool: True if a file was found, False otherwise (or if the
+              directory does not exist or cannot be read).
+    """
+    try:
+        with os.scandir(dir_path) as entries:
+            return next((e for e in entries if e.is_file()), None) is not None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    except OSError as dir_error:
+        logger.warning("WARN: Cannot list '%s': %s", dir_path, dir_error)
+        return False
+
+
+# Per-process state of the page workers, filled by _init_page_worker()
+_page_worker_state = {}
+
+
+def _init_page_worker(pdf_path, media_options, annotation_jobs):
+    """
+    Initializer of the page worker processes: opens the PDF and creates the
+    MediaProcessor once per process. Both live until the process exits.
+
+    Args:
+        pdf_path (str): Path to the input PDF file.
+        media_options (dict): Keyword arguments for MediaProcessor.
+        annotation_jobs (int): See _process_page().
+    """
+    from media_extractor import MediaProcessor
+    from pdf_processor import PdfAnalyzer
+
+    _configure_logging()
+    _page_worker_state['pdf_analyzer'] = PdfAnalyzer(pdf_path)
+    _page_worker_state['media_processor'] = MediaProcessor(
+        config_obj=config, **media_options
+    )
+    _page_worker_state['annotation_jobs'] = annotation_jobs
+
+
+def _process_page_in_worker(page_num, num_pages, page_dims):
+    """Runs _process_page() with the state of the current worker process."""
+    return _process_page(
+        _page_worker_state['pdf_analyzer'],
+        _page_worker_state['media_processor'],
+        page_num, num_pages, page_dims,
+        _page_worker_state['annotation_jobs']
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """
+    Builds the command-line parser once; later calls (e.g. when main() is
+    called repeatedly by a batch script) reuse it.
+
+    Returns:
+        argparse.ArgumentParser: The orchestrator's argument parser.
+    """
     parser = argparse.ArgumentParser(
         description="Converts PDF to a SwiperJS web presentation."
     )
@@ -121,30 +588,57 @@ def main():
         help=("Target video codec (default: %(default)s). Also determines "
               "the container (mp4/webm).")
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        metavar='N',
+        default=min(os.cpu_count() or 1, 4),
+        help=("Number of worker processes used to process pages and their "
+              "media, and to render the SVG pages, in parallel; 1 "
+              "processes them sequentially "
+              "(default: %(default)s).")
+    )
+    return parser
+
+
+def main(argv=None):
+    """
+    Main function orchestrating the conversion process.
+
+    Args:
+        argv (list, optional): Command-line arguments to parse instead of
+                               sys.argv[1:].
+    """
+    # Modules report through `logging`; show their messages like prints
+    _configure_logging()
+    logger.info("***** STARTING ORCHESTRATOR (%s) *****", os.path.basename(__file__))
+
+    # --- Argument Parsing ---
+    parser = _build_parser()
+    args = parser.parse_args(argv)
 
     # --- Determine Input and Output Paths ---
     pdf_input_path = os.path.abspath(args.pdf_file)
 
     # Determine output directory based on argument or PDF filename
+    # (a Path built once; every output path below is derived from it)
     if args.output_dir:
-        output_base_dir = os.path.abspath(args.output_dir)
+        output_base_dir = pathlib.Path(os.path.abspath(args.output_dir))
     else:
-        pdf_basename = os.path.basename(pdf_input_path)
-        pdf_name_without_ext, _ = os.path.splitext(pdf_basename)
         # Default output dir is named after the PDF, in the current working dir
-        output_base_dir = os.path.abspath(pdf_name_without_ext)
+        output_base_dir = pathlib.Path.cwd() / pathlib.Path(pdf_input_path).stem
 
     # Store other arguments
     svg_method_to_use = args.svg_method
     use_vaapi_arg = args.vaapi
     codec_choice_arg = args.codec
     scaling_factor_arg = args.scale_videos  # Validation happens below
+    jobs_arg = args.jobs
 
-    print(f"Input PDF file: {pdf_input_path}")
-    print(f"Output directory: {output_base_dir}")
-    print(f"Chosen SVG method: '{svg_method_to_use}'")
-    print(f"Chosen video codec: '{codec_choice_arg}'")
+    logger.info("Input PDF file: %s", pdf_input_path)
+    logger.info("Output directory: %s", output_base_dir)
+    logger.info("Chosen SVG method: '%s'", svg_method_to_use)
+    logger.info("Chosen video codec: '%s'", codec_choice_arg)
 
     # --- Validate and Log Optional Arguments ---
     if scaling_factor_arg is not None:
@@ -152,81 +646,103 @@ def main():
             parser.error(
                 f"--scale-videos: value {scaling_factor_arg} must be between 1 and 100."
             )
-        print(f"INFO: Video scaling enabled: {scaling_factor_arg}%.")
+        logger.info("INFO: Video scaling enabled: %s%%.", scaling_factor_arg)
     if use_vaapi_arg:
-        print("VAAPI acceleration requested.")
+        logger.info("VAAPI acceleration requested.")
+    if jobs_arg < 1:
+        parser.error(f"--jobs: value {jobs_arg} must be at least 1.")
 
     # --- Verify Input PDF Exists ---
     if not os.path.exists(pdf_input_path):
-        print(f"ERROR: Input PDF file '{pdf_input_path}' not found!")
+        logger.error("ERROR: Input PDF file '%s' not found!", pdf_input_path)
         sys.exit(1)
 
-    # --- Create Output Directory and Define Paths ---
-    try:
-        os.makedirs(output_base_dir, exist_ok=True)
-        print(f"Output directory ensured: {output_base_dir}")
-    except OSError as error:
-        print(f"ERROR: Could not create output directory "
-              f"'{output_base_dir}': {error}")
-        sys.exit(1)
+    # --- Import the Processing Modules (arguments are valid) ---
+    import utils
+    from html_generator import HtmlBuilder
+    from media_extractor import MediaProcessor
+    from pdf_processor import PdfAnalyzer
 
+    # --- Define Paths and Create Output Directories ---
     # Define absolute paths for subdirectories and output files
-    media_dir_abs = os.path.join(output_base_dir, config.MEDIA_OUTPUT_DIR_NAME)
-    svg_dir_abs = os.path.join(output_base_dir, config.SVG_OUTPUT_DIR_NAME)
-    json_output_abs = os.path.join(
-        output_base_dir, config.OUTPUT_JSON_FILE_NAME
-    )
-    html_output_abs = os.path.join(
-        output_base_dir, config.OUTPUT_HTML_FILE_NAME
-    )
-    presentation_js_output_path = os.path.join(
-        output_base_dir, os.path.basename(config.PRESENTATION_JS_PATH)
-    )
+    media_dir_abs = output_base_dir / config.MEDIA_OUTPUT_DIR_NAME
+    svg_dir_abs = output_base_dir / config.SVG_OUTPUT_DIR_NAME
+    json_output_abs = output_base_dir / config.OUTPUT_JSON_FILE_NAME
+    html_output_abs = output_base_dir / config.OUTPUT_HTML_FILE_NAME
+    js_filename = os.path.basename(config.PRESENTATION_JS_PATH)
+    presentation_js_output_path = output_base_dir / js_filename
+    target_libs_dir = output_base_dir / config.TARGET_LIBS_DIR_NAME
 
-    # Create media and SVG subdirectories
-    os.makedirs(media_dir_abs, exist_ok=True)
-    os.makedirs(svg_dir_abs, exist_ok=True)
+    # Create the output directory and its media/SVG/libs subdirectories in
+    # one pass; mkdir() only walks up to the parents when the first try fails
+    for dir_path in (output_base_dir, media_dir_abs, svg_dir_abs, target_libs_dir):
+        try:
+            dir_path.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            logger.error(
+                "ERROR: Could not create output directory '%s': %s",
+                dir_path, error
+            )
+            sys.exit(1)
+    logger.info("Output directory ensured: %s", output_base_dir)
 
     # --- Check Dependencies ---
     dependencies = utils.check_dependencies()
-    print("--- External Dependency Check ---")
-    print(f"  python-magic: {'Found' if dependencies['magic'] else 'Not Found'}")
-    print(f"  pymupdf (fitz): {'Available' if dependencies['pymupdf'] else 'Unavailable'}")
-    print(f"  pdf2svg: {'Found ('+str(dependencies['pdf2svg'])+')' if dependencies['pdf2svg'] else 'Not Found'}")
-    print(f"  ffmpeg: {'Found ('+str(dependencies['ffmpeg'])+')' if dependencies['ffmpeg'] else 'Not Found'}")
-    print(f"  ffprobe: {'Found ('+str(dependencies['ffprobe'])+')' if dependencies['ffprobe'] else 'Not Found (pre-resize unavailable)'}")
+    logger.info("--- External Dependency Check ---")
+    logger.info("  python-magic: %s", 'Found' if dependencies['magic'] else 'Not Found')
+    logger.info(
+        "  pymupdf (fitz): %s",
+        'Available' if dependencies['pymupdf'] else 'Unavailable'
+    )
+    logger.info(
+        "  pdf2svg: %s",
+        'Found ('+str(dependencies['pdf2svg'])+')' if dependencies['pdf2svg'] else 'Not Found'
+    )
+    logger.info(
+        "  ffmpeg: %s",
+        'Found ('+str(dependencies['ffmpeg'])+')' if dependencies['ffmpeg'] else 'Not Found'
+    )
+    logger.info(
+        "  ffprobe: %s",
+        'Found ('+str(dependencies['ffprobe'])+')' if dependencies['ffprobe'] else 'Not Found (pre-resize unavailable)'
+    )
 
     # --- Check VAAPI Feasibility ---
     # Even if requested, check basic conditions
     if use_vaapi_arg:
         vaapi_possible = True # Assume possible initially
         if not dependencies['ffmpeg']:
-            print("WARN: VAAPI requested but ffmpeg not found.")
+            logger.warning("WARN: VAAPI requested but ffmpeg not found.")
             vaapi_possible = False
         elif not sys.platform.startswith('linux'):
-            print("WARN: VAAPI requested but OS is not Linux.")
+            logger.warning("WARN: VAAPI requested but OS is not Linux.")
             vaapi_possible = False
         elif codec_choice_arg not in config.FFMPEG_CODEC_OPTIONS_VAAPI:
-            print(f"WARN: VAAPI requested but not configured for codec '{codec_choice_arg}'.")
+            logger.warning(
+                "WARN: VAAPI requested but not configured for codec '%s'.",
+                codec_choice_arg
+            )
             vaapi_possible = False
         elif not dependencies['ffprobe']:
-            print("WARN: VAAPI potentially usable but ffprobe not found "
-                  "(cannot pre-check resolution).")
+            logger.warning(
+                "WARN: VAAPI potentially usable but ffprobe not found (cannot "
+                "pre-check resolution)."
+            )
         else:
             # Basic check for VAAPI render nodes
             try:
-                render_devices = [d for d in os.listdir('/dev/dri/') if d.startswith('renderD')]
-                if not render_devices:
-                    print("WARN: VAAPI requested but no /dev/dri/renderD* devices found.")
+                render_devices = utils.find_vaapi_render_nodes()
+                if render_devices is None:
+                    logger.warning("WARN: VAAPI requested but /dev/dri directory not found.")
+                    vaapi_possible = False
+                elif not render_devices:
+                    logger.warning("WARN: VAAPI requested but no /dev/dri/renderD* devices found.")
                 # else: print(f"INFO: Potential VAAPI render devices found: {render_devices}")
-            except FileNotFoundError:
-                print("WARN: VAAPI requested but /dev/dri directory not found.")
-                vaapi_possible = False
             except Exception as dri_error:
-                print(f"WARN: Error checking /dev/dri: {dri_error}.")
+                logger.warning("WARN: Error checking /dev/dri: %s.", dri_error)
 
         if not vaapi_possible:
-            print("INFO: VAAPI usage disabled due to failed checks.")
+            logger.info("INFO: VAAPI usage disabled due to failed checks.")
             use_vaapi_arg = False # Update the flag passed to MediaProcessor
 
     # --- Check SVG Method Availability and Fallback ---
@@ -238,25 +754,25 @@ def main():
     # Check and potentially switch SVG method based on availability
     if svg_method_to_use == 'pymupdf':
         if not can_use_pymupdf:
-            print("WARN: Method 'pymupdf' requested but PyMuPDF is unavailable.")
+            logger.warning("WARN: Method 'pymupdf' requested but PyMuPDF is unavailable.")
             valid_svg_method_found = False
             if can_use_pdf2svg:
                 svg_method_to_use = 'pdf2svg'
-                print("INFO: Attempting to use 'pdf2svg' as fallback.")
+                logger.info("INFO: Attempting to use 'pdf2svg' as fallback.")
                 valid_svg_method_found = True
             else:
-                print("ERROR: No available SVG conversion method.")
+                logger.error("ERROR: No available SVG conversion method.")
                 svg_method_to_use = None
     elif svg_method_to_use == 'pdf2svg':
         if not can_use_pdf2svg:
-            print("WARN: Method 'pdf2svg' requested but pdf2svg not found.")
+            logger.warning("WARN: Method 'pdf2svg' requested but pdf2svg not found.")
             valid_svg_method_found = False
             if can_use_pymupdf:
                 svg_method_to_use = 'pymupdf'
-                print("INFO: Attempting to use 'pymupdf' as fallback.")
+                logger.info("INFO: Attempting to use 'pymupdf' as fallback.")
                 valid_svg_method_found = True
             else:
-                print("ERROR: No available SVG conversion method.")
+                logger.error("ERROR: No available SVG conversion method.")
                 svg_method_to_use = None
     # This else case should not be reached due to argparse choices
     # else:
@@ -266,171 +782,180 @@ def main():
 
     # Log final SVG method decision
     if valid_svg_method_found and svg_method_to_use != original_svg_method_request:
-        print(f"INFO: Using fallback SVG method '{svg_method_to_use}'.")
+        logger.info("INFO: Using fallback SVG method '%s'.", svg_method_to_use)
     elif not valid_svg_method_found:
-        print("INFO: SVG conversion will be skipped (no valid method available).")
+        logger.info("INFO: SVG conversion will be skipped (no valid method available).")
 
     # --- Copy Libraries and Custom JS ---
-    print("\n--- Copying JS/CSS libraries and custom script ---")
+    # Pure file I/O independent of the PDF: it runs in the background
+    # during Step 1 (see below)
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    # copy_libs expects the parent directory containing 'libs'
-    source_libs_dir_parent = script_dir
-    libs_copied_ok = copy_libs(source_libs_dir_parent, output_base_dir)
-    if not libs_copied_ok:
-        print("WARN: Swiper libraries could not be copied.")
-
-    # Copy custom JS
-    js_filename = os.path.basename(config.PRESENTATION_JS_PATH)
-    source_presentation_js = os.path.join(script_dir, js_filename)
-    if os.path.exists(source_presentation_js):
-        try:
-            shutil.copy2(source_presentation_js, presentation_js_output_path)
-            print(f"Copied '{js_filename}' successfully.")
-        except Exception as copy_js_error:
-            print(f"ERROR copying {js_filename}: {copy_js_error}")
-    else:
-        print(f"WARN: Custom script '{js_filename}' not found in "
-              f"'{script_dir}'. Output HTML might lack functionality.")
 
     # --- Initializations before main processing block ---
     all_page_data = []
     num_pages = 0
     svg_success = False
+    svg_future = None
+    assets_future = None
+    # Runs the asset copy and Step 2 (SVG) while Step 1 processes the media
+    background_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+    # Set on a fatal error, so exiting does not wait for every SVG page
+    svg_cancel_event = multiprocessing.get_context('spawn').Event()
+    submit_assets = functools.partial(
+        background_executor.submit, _copy_assets, script_dir,
+        str(output_base_dir), presentation_js_output_path
+    )
 
     # --- Main Processing Block ---
     try:
         # --- Step 1: Analyze PDF and Process Media ---
-        print("\n--- Step 1: Analyzing PDF and Processing Media ---")
+        logger.info("\n--- Step 1: Analyzing PDF and Processing Media ---")
+        _flush_output()
         with PdfAnalyzer(pdf_input_path) as pdf_analyzer:
             num_pages = pdf_analyzer.get_num_pages()
             if num_pages <= 0:
                 raise ValueError("PDF contains no pages or could not be read.")
-            print(f"Detected {num_pages} total PDF pages.")
-            page_dimensions_map = pdf_analyzer.get_all_page_dimensions()
-
-            # Initialize MediaProcessor with all options
-            media_processor = MediaProcessor(
-                config_obj=config,
-                media_output_dir=media_dir_abs,
-                ffmpeg_path=dependencies['ffmpeg'],
-                scaling_factor=scaling_factor_arg,
-                use_vaapi=use_vaapi_arg, # Pass potentially adjusted flag
-                codec_choice=codec_choice_arg,
-                ffprobe_path=dependencies['ffprobe']
-            )
+            logger.info("Detected %s total PDF pages.", num_pages)
 
-            # Process each page
+            page_dimensions_map = pdf_analyzer.get_all_page_dimensions()
+            # Validate the dimensions of every page once, before processing
+            page_dimensions = []
             for page_num in range(num_pages):
-                print(f"\n--- Processing Page {page_num + 1}/{num_pages} ---")
-                page_has_processed_video = False
                 page_dims = page_dimensions_map.get(
                     page_num, config.FALLBACK_PAGE_DIMENSIONS
                 )
-                # Validate dimensions again before use
                 if (not page_dims or not isinstance(page_dims, dict) or
                         page_dims.get('width_pt', 0) <= 0):
-                    print(f"  WARN: Invalid/missing dimensions for page "
-                          f"{page_num+1}. Using fallback.")
+                    logger.warning("  WARN: Invalid/missing dimensions for page "
+                                   "%s. Using fallback.", page_num+1)
                     page_dims = config.FALLBACK_PAGE_DIMENSIONS
+                page_dimensions.append(page_dims)
 
-                media_annotations = pdf_analyzer.find_media_annotations(page_num)
+            # Options shared by the MediaProcessor of every page worker
+            media_options = {
+                'media_output_dir': str(media_dir_abs),
+                'ffmpeg_path': dependencies['ffmpeg'],
+                'scaling_factor': scaling_factor_arg,
+                'use_vaapi': use_vaapi_arg,  # Pass potentially adjusted flag
+                'codec_choice': codec_choice_arg,
+                'ffprobe_path': dependencies['ffprobe'],
+                'cache_dir': str(output_base_dir / config.CACHE_DIR_NAME /
+                                 config.MEDIA_CACHE_DIR_NAME),
+            }
+            # Records of each page, stored at the page's index
+            page_slots = [None] * num_pages
+            # Only pages with annotations can hold media: the others get
+            # their placeholder here, without reaching the workers
+            annotated_pages = sorted(pdf_analyzer.pages_with_annotations())
+            if len(annotated_pages) < num_pages:
+                logger.info("%s page(s) without annotations.",
+                            num_pages - len(annotated_pages))
+                skipped_pages = set(range(num_pages)).difference(annotated_pages)
+                for page_num in sorted(skipped_pages):
+                    page_slots[page_num] = [
+                        _page_placeholder(page_num, page_dimensions[page_num])
+                    ]
+            page_jobs = max(1, min(jobs_arg, len(annotated_pages)))
+            cpu_count = os.cpu_count() or 1
+            # The PyMuPDF SVG workers run at the same time as the page
+            # workers: they get the cores the page workers leave, and
+            # the media encodes the cores the SVG workers leave
+            svg_jobs = 1
+            media_cpu_count = cpu_count
+            if svg_method_to_use == 'pymupdf':
+                busy_page_jobs = page_jobs if annotated_pages else 0
+                svg_jobs = max(1, min(jobs_arg, cpu_count - busy_page_jobs))
+                media_cpu_count = max(page_jobs, cpu_count - svg_jobs)
+            # Annotations of a page are encoded concurrently with the cores
+            # left over by the page workers; each ffmpeg run then gets its
+            # share of the cores so the jobs do not thrash
+            annotation_jobs = max(1, media_cpu_count // (2 * page_jobs))
+            if annotation_jobs > 1 or svg_jobs > 1:
+                media_options['ffmpeg_threads'] = max(
+                    1, media_cpu_count // (page_jobs * annotation_jobs)
+                )
+            # Step 2 (SVG) only needs the PDF: run it in a background
+            # thread while Step 1 processes the media. A thread is enough,
+            # as pdf2svg is a subprocess and PyMuPDF releases the GIL.
+            if svg_method_to_use:
+                submit_svg = functools.partial(
+                    background_executor.submit, _run_svg, svg_method_to_use,
+                    str(svg_dir_abs), pdf_input_path, num_pages, dependencies,
+                    svg_jobs=svg_jobs, cancel_event=svg_cancel_event
+                )
 
-                if not media_annotations:
-                    print("  No media annotations found on this page.")
-                else:
-                    print(f"  Found {len(media_annotations)} media annotation(s).")
-                    for annot_index, annot_info in enumerate(media_annotations):
-                        print(f"    Processing media annotation {annot_index+1}...")
-                        # Check for required annotation data
-                        if annot_info.get('stream_ref') and annot_info.get('rect'):
-                            processed_media_info = media_processor.process_annotation(
-                                page_num, annot_index, annot_info['stream_ref'],
-                                annot_info['rect'],
-                                annot_info.get('content_type',
-                                               'application/octet-stream')
-                            )
-                            if processed_media_info:
-                                processed_media_info['pageDimensions'] = page_dims
-                                processed_media_info['hasVideo'] = True
-                                all_page_data.append(processed_media_info)
-                                page_has_processed_video = True
-                                print(f"    +++ Media processed successfully -> "
-                                      f"{processed_media_info.get('outputPath')} "
-                                      f"(Type: {processed_media_info.get('contentTypeDetected')})")
-                            else:
-                                print(f"    --- Failed to process media annotation "
-                                      f"{annot_index+1}.")
-                        else:
-                            print(f"    WARN: Skipping annotation {annot_index+1} "
-                                  "(missing stream or rect).")
-
-                # Add a placeholder if no media was processed for this page
-                if not page_has_processed_video:
-                    print(f"  Adding placeholder for page {page_num + 1}.")
-                    all_page_data.append({
-                        "pageIndex": page_num,
-                        "pageDimensions": page_dims,
-                        "hasVideo": False
-                    })
-
-        print("\n--- Finished Step 1: PDF Analysis and Media Processing ---")
-        # Sort final data by page index for consistency
-        all_page_data.sort(key=lambda item: item.get('pageIndex', -1))
+            if page_jobs <= 1:
+                assets_future = submit_assets()
+                if svg_method_to_use:
+                    svg_future = submit_svg()
+                # Process each page in this process, reusing the open PDF
+                media_processor = MediaProcessor(config_obj=config, **media_options)
+                for page_num in annotated_pages:
+                    page_slots[page_num] = _process_page(
+                        pdf_analyzer, media_processor, page_num, num_pages,
+                        page_dimensions[page_num], annotation_jobs
+                    )
+            else:
+                # Pages are independent: each worker process opens its own
+                # PdfAnalyzer (pikepdf objects cannot be shared) and
+                # MediaProcessor, so PDF parsing and ffmpeg runs overlap
+                logger.info("Processing pages with %s worker processes.", page_jobs)
+                worker_media_options = media_options
+                if use_vaapi_arg:
+                    # One lock for the workers: their VAAPI runs share the
+                    # render device, like the threads of a single process
+                    worker_media_options = dict(
+                        media_options, vaapi_lock=multiprocessing.Lock()
+                    )
+                # Flush first so forked workers do not inherit pending output
+                _flush_output()
+                with concurrent.futures.ProcessPoolExecutor(
+                        max_workers=page_jobs,
+                        initializer=_init_page_worker,
+                        initargs=(pdf_input_path, worker_media_options,
+                                  annotation_jobs)) as executor:
+                    page_results = executor.map(
+                        _process_page_in_worker,
+                        annotated_pages,
+                        itertools.repeat(num_pages),
+                        [page_dimensions[page_num] for page_num in annotated_pages],
+                        # Batch small pages, but never starve a worker
+                        chunksize=max(1, min(4, len(annotated_pages) // page_jobs))
+                    )
+                    # Start the background jobs only now that the workers
+                    # have been forked, so none of them inherits a busy thread
+                    assets_future = submit_assets()
+                    if svg_method_to_use:
+                        svg_future = submit_svg()
+                    for page_num, page_records in zip(annotated_pages,
+                                                      page_results):
+                        page_slots[page_num] = page_records
+
+        logger.info("\n--- Finished Step 1: PDF Analysis and Media Processing ---")
+        # Each page's records sit in its slot: flattening the slots gives
+        # the data ordered by page index, without sorting it
+        all_page_data = list(itertools.chain.from_iterable(page_slots))
 
         # Save JSON metadata (useful for debugging)
         try:
-            with open(json_output_abs, 'w', encoding='utf-8') as json_file:
-                json.dump(all_page_data, json_file, indent=2, ensure_ascii=False)
-            print(f"Media metadata saved to: '{json_output_abs}'")
+            _save_json_metadata(all_page_data, json_output_abs)
+            logger.info("Media metadata saved to: '%s'", json_output_abs)
         except Exception as json_error:
-            print(f"WARN: Failed to save JSON metadata: {json_error}")
+            logger.warning("WARN: Failed to save JSON metadata: %s", json_error)
 
-        # --- Step 2: Convert PDF to SVG ---
-        print("\n--- Step 2: Converting PDF to SVG ---")
-        svg_converter = None
-        if svg_method_to_use: # Only proceed if a valid method was determined
-            try:
-                print(f"Initializing SVG converter using {svg_method_to_use}...")
-                if svg_method_to_use == 'pymupdf':
-                    svg_converter = SvgConverter(
-                        config_obj=config,
-                        svg_output_dir=svg_dir_abs,
-                        method='pymupdf'
-                    )
-                elif svg_method_to_use == 'pdf2svg':
-                    svg_converter = SvgConverter(
-                        config_obj=config,
-                        svg_output_dir=svg_dir_abs,
-                        method='pdf2svg',
-                        pdf2svg_path=dependencies['pdf2svg']
-                    )
-
-                # Execute conversion if converter was successfully initialized
-                if svg_converter:
-                    print(f"Starting SVG conversion via {svg_method_to_use}...")
-                    svg_success = svg_converter.convert_all(
-                        pdf_path=pdf_input_path,
-                        num_pages_expected=num_pages
-                    )
-                    if not svg_success:
-                        print(f"WARN: SVG conversion via '{svg_method_to_use}' "
-                              "failed or was incomplete.")
-                # else: Should not happen if logic is correct
-
-            except (ImportError, ValueError, NotImplementedError) as init_error:
-                print(f"ERROR initializing SVG converter ({svg_method_to_use}): "
-                      f"{init_error}")
-                svg_success = False # Ensure failure state
-            except Exception as runtime_error:
-                print(f"ERROR during SVG conversion ({svg_method_to_use}): "
-                      f"{runtime_error}")
-                traceback.print_exc(limit=1)
-                svg_success = False # Ensure failure state
+        # --- Step 2: Collect the SVG Conversion Result ---
+        if svg_future is not None:
+            svg_success = svg_future.result()
         else:
-            print("SVG conversion skipped (no valid method available).")
+            logger.info("\n--- Step 2: Converting PDF to SVG ---")
+            logger.info("SVG conversion skipped (no valid method available).")
+        # The copied libraries are needed by the generated HTML
+        assets_future.result()
+        background_executor.shutdown()
 
         # --- Step 3: Generate HTML File ---
-        print("\n--- Step 3: Generating Swiper.js HTML File ---")
+        logger.info("\n--- Step 3: Generating Swiper.js HTML File ---")
+        _flush_output()
         # Define relative paths for use within the generated HTML
         svg_dir_rel_for_html = config.SVG_OUTPUT_DIR_NAME
         media_dir_rel_for_html = config.MEDIA_OUTPUT_DIR_NAME
@@ -438,67 +963,75 @@ def main():
         html_success = html_builder.generate(
             all_page_data=all_page_data,
             num_total_pages=num_pages,
-            output_html_path=html_output_abs,
+            output_html_path=str(html_output_abs),
             svg_dir_rel=svg_dir_rel_for_html,
             media_dir_rel=media_dir_rel_for_html
         )
         if not html_success:
             # Log error but potentially continue to show summary
-            print("ERROR: Failed to generate the HTML file.")
+            logger.error("ERROR: Failed to generate the HTML file.")
 
     # --- Global Error Handling ---
     except Exception as error:
-        print("\n!!! FATAL ERROR IN ORCHESTRATOR !!!")
-        print(f"{type(error).__name__}: {error}")
-        traceback.print_exc()
+        logger.error("\n!!! FATAL ERROR IN ORCHESTRATOR !!!")
+        logger.exception("%s: %s", type(error).__name__, error)
+        # Stop the background jobs instead of finishing them: the
+        # interpreter waits for its threads before exiting (cancelling
+        # the futures by hand, as shutdown's cancel_futures needs 3.9)
+        svg_cancel_event.set()
+        for future in (svg_future, assets_future):
+            if future is not None:
+                future.cancel()
+        background_executor.shutdown(wait=False)
         sys.exit(1) # Exit with a non-zero code indicating failure
 
     # --- Final Summary ---
-    print("\n--- Processing Finished ---")
-    print(f"Presentation generated in directory: {output_base_dir}")
-    print(f"  Main HTML file: {html_output_abs}")
+    logger.info("\n--- Processing Finished ---")
+    logger.info("Presentation generated in directory: %s", output_base_dir)
+    logger.info("  Main HTML file: %s", html_output_abs)
 
     # Check existence of generated assets for summary
-    media_files_exist = os.path.exists(media_dir_abs) and any(
-        f.is_file() for f in os.scandir(media_dir_abs)
-    )
-    svg_files_exist = os.path.exists(svg_dir_abs) and any(
-        f.is_file() for f in os.scandir(svg_dir_abs)
-    )
-    libs_copied = os.path.exists(
-        os.path.join(output_base_dir, config.TARGET_LIBS_DIR_NAME, 'swiper')
-    )
-    custom_js_copied = os.path.exists(presentation_js_output_path)
+    media_files_exist = _dir_has_file(media_dir_abs)
+    svg_files_exist = _dir_has_file(svg_dir_abs)
+    libs_copied = (target_libs_dir / 'swiper').exists()
+    custom_js_copied = presentation_js_output_path.exists()
 
     # Report status of generated assets
     if media_files_exist:
-        print(f"  Media files present in: {media_dir_abs}")
+        logger.info("  Media files present in: %s", media_dir_abs)
     else:
-        print(f"  No media files were extracted/processed in {media_dir_abs}")
+        logger.info("  No media files were extracted/processed in %s", media_dir_abs)
 
     if svg_success and svg_files_exist:
-        print(f"  SVG backgrounds (via {svg_method_to_use}) present in: {svg_dir_abs}")
+        logger.info(
+            "  SVG backgrounds (via %s) present in: %s",
+            svg_method_to_use, svg_dir_abs
+        )
     elif svg_method_to_use and not svg_success:
-        print(f"  WARN: SVG generation failed (method tried: {svg_method_to_use}).")
+        logger.warning(
+            "  WARN: SVG generation failed (method tried: %s).",
+            svg_method_to_use
+        )
     elif not svg_method_to_use:
-        print("  SVG generation was not performed.")
+        logger.info("  SVG generation was not performed.")
     else: # Should not happen, indicates logic error
-        print(f"  WARN: Inconsistent SVG status (success={svg_success}, "
-              f"method={svg_method_to_use}).")
+        logger.warning(
+            "  WARN: Inconsistent SVG status (success=%s, method=%s).",
+            svg_success, svg_method_to_use
+        )
 
     if libs_copied:
-        print(f"  Swiper libraries copied to: "
-              f"{os.path.join(output_base_dir, config.TARGET_LIBS_DIR_NAME)}")
+        logger.info("  Swiper libraries copied to: %s", target_libs_dir)
     else:
-        print("  WARN: Swiper libraries were not copied.")
+        logger.warning("  WARN: Swiper libraries were not copied.")
 
     if custom_js_copied:
-        print(f"  Custom script copied: {presentation_js_output_path}")
+        logger.info("  Custom script copied: %s", presentation_js_output_path)
     else:
-        print("  WARN: Custom script was not copied.")
+        logger.warning("  WARN: Custom script was not copied.")
 
-    if os.path.exists(json_output_abs):
-        print(f"  Metadata JSON (for debugging): {json_output_abs}")
+    if json_output_abs.exists():
+        logger.info("  Metadata JSON (for debugging): %s", json_output_abs)
 
     # Display relative path if possible
     try:
@@ -507,28 +1040,40 @@ def main():
         # Fallback to absolute path if on different drives (Windows)
         output_display = output_base_dir
 
-    print(f"\n>>> You can now copy the entire '{output_display}' directory.")
-    print(f">>> Then open the '{config.OUTPUT_HTML_FILE_NAME}' file "
-          "(inside that directory) in your web browser. <<<")
+    logger.info("\n>>> You can now copy the entire '%s' directory.", output_display)
+    logger.info(
+        ">>> Then open the '%s' file (inside that directory) in your web browser. <<<",
+        config.OUTPUT_HTML_FILE_NAME
+    )
 
     # Summary of options used
-    print("\n    Options Used:")
-    print(f"      - Input PDF: {pdf_input_path}")
-    print(f"      - SVG Method: {svg_method_to_use if svg_method_to_use else 'None'}")
-    print(f"      - Target Video Codec: {codec_choice_arg}")
-    print(f"      - Video Scaling: {str(scaling_factor_arg)+'%' if scaling_factor_arg else 'No'}")
+    logger.info("\n    Options Used:")
+    logger.info("      - Input PDF: %s", pdf_input_path)
+    logger.info(
+        "      - SVG Method: %s",
+        svg_method_to_use if svg_method_to_use else 'None'
+    )
+    logger.info("      - Target Video Codec: %s", codec_choice_arg)
+    logger.info(
+        "      - Video Scaling: %s",
+        str(scaling_factor_arg)+'%' if scaling_factor_arg else 'No'
+    )
     # Use original args.vaapi for final message as use_vaapi_arg might have been changed
-    print(f"      - VAAPI: {'Requested (enabled if possible)' if args.vaapi else 'Not Requested'}")
+    logger.info(
+        "      - VAAPI: %s",
+        'Requested (enabled if possible)' if args.vaapi else 'Not Requested'
+    )
 
     # Keyboard controls reminder
-    print("\n    Keyboard Controls:")
-    print("      - Arrows/PgUp/PgDn/Space: Navigate slides")
-    print("      - Home/End: Go to first/last slide")
-    print("      - F: Toggle fullscreen")
-    print("      - M: Toggle thumbnail menu")
-    print("      - Esc: Close thumbnail menu")
-
-    print("\n***** ORCHESTRATOR FINISHED *****")
+    logger.info("\n    Keyboard Controls:")
+    logger.info("      - Arrows/PgUp/PgDn/Space: Navigate slides")
+    logger.info("      - Home/End: Go to first/last slide")
+    logger.info("      - F: Toggle fullscreen")
+    logger.info("      - M: Toggle thumbnail menu")
+    logger.info("      - Esc: Close thumbnail menu")
+
+    logger.info("\n***** ORCHESTRATOR FINISHED *****")
+    _flush_output()
     sys.exit(0) # Exit with success code
 
 
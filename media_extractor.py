@@ -3,7 +3,8 @@
 media_extractor.py
 
 Handles media extraction and processing using a two-step strategy:
-1. Optional HIGH-QUALITY Scaling (CPU) to an intermediate H.264 file.
+1. Optional HIGH-QUALITY Scaling (CPU) to an intermediate H.264 file, or
+   within the final transcode when one follows.
 2. Optional Final Transcoding (VAAPI attempt with CPU fallback) to target format.
 Includes an intermediate H.264 transcoding step for sources incompatible
 with VAAPI decoding, prioritizing quality preservation.
@@ -11,13 +12,20 @@ Applies specific, tested FFmpeg command structures and pixel formats,
 and corrects handling of failed transcodes. Adheres to PEP 8.
 """
 
+import concurrent.futures
+import contextlib
+import hashlib
 import json
+import logging
 import os
-import shutil
+import shlex
 import subprocess
 import sys
 import tempfile
-import traceback
+import threading
+import types
+
+logger = logging.getLogger(__name__)
 
 # Third-party imports
 try:
@@ -29,11 +37,106 @@ except ImportError:
 except Exception as import_error:
     MAGIC_IMPORTED_SUCCESSFULLY = False
     magic = None
-    print(f"WARN: Failed to import or initialize python-magic: {import_error}")
-    print("      MIME type detection will rely solely on PDF metadata.")
+    logger.warning(
+        "WARN: Failed to import or initialize python-magic: %s",
+        import_error
+    )
+    logger.info("      MIME type detection will rely solely on PDF metadata.")
 
-# Local import
+# Local imports
 import config
+import utils
+
+
+class _CharFilterTable(dict):
+    """
+    str.translate() table keeping alphanumeric characters and those in
+    `kept_chars`, and mapping any other one to `replacement` (None deletes
+    it). Entries are computed on first use, so the table covers all of
+    Unicode like str.isalnum() does.
+    """
+
+    def __init__(self, kept_chars, replacement):
+        super().__init__()
+        self.kept_chars = kept_chars
+        self.replacement = replacement
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if char.isalnum() or char in self.kept_chars:
+            value = codepoint
+        else:
+            value = self.replacement
+        self[codepoint] = value
+        return value
+
+
+# Sanitizes output file names and MIME subtypes used as extensions
+_SAFE_FILENAME_TABLE = _CharFilterTable('_-', '_')
+_SAFE_SUBTYPE_TABLE = _CharFilterTable('-+', None)
+
+# Extensions of common MIME types absent from config.CODEC_FORMAT_MAP
+_COMMON_MIME_EXTENSIONS = types.MappingProxyType({
+    'video/mp4': '.mp4', 'video/quicktime': '.mov', 'video/webm': '.webm',
+    'video/x-matroska': '.mkv', 'video/x-msvideo': '.avi',
+    'video/mpeg': '.mpg', 'audio/mpeg': '.mp3', 'audio/aac': '.aac',
+    'audio/ogg': '.ogg', 'audio/wav': '.wav', 'audio/flac': '.flac',
+    'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif',
+    'image/webp': '.webp', 'image/svg+xml': '.svg',
+    'application/octet-stream': '.bin',
+})
+
+
+def _reserve_temp_path(directory, prefix, suffix):
+    """
+    Creates an empty, uniquely named file for ffmpeg to overwrite (-y) and
+    returns its path; only the descriptor is opened, and closed at once.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=directory)
+    os.close(fd)
+    return path
+
+
+def _remove_file(path):
+    """
+    Deletes a file with a single unlink() call.
+
+    Returns:
+        bool: True if it was deleted; False if there was none, or it could
+              not be deleted (logged).
+    """
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning(
+            "    WARN: Failed deleting %s: %s", os.path.basename(path), e
+        )
+        return False
+
+
+class _CommandLine:
+    """
+    Renders a command list as a shell-quoted line, only when a log record
+    using it as an argument is actually emitted.
+    """
+    __slots__ = ('command',)
+
+    def __init__(self, command):
+        self.command = command
+
+    def __str__(self):
+        return shlex.join(self.command)
+
+
+def _exists_nonempty(path):
+    """True if `path` exists and is not empty, with a single stat() call."""
+    try:
+        return os.stat(path).st_size > 0
+    except OSError:
+        return False
 
 
 class MediaProcessor:
@@ -50,27 +153,107 @@ class MediaProcessor:
         'h264', 'hevc', 'vp9', 'av1', 'mpeg2video', 'vc1'
     ]
     PREFERRED_FORMATS = config.PREFERRED_FORMATS
+    # ffmpeg errors meaning the VAAPI driver/device itself cannot do the job
+    # (retrying through an intermediate file would fail the same way)
+    VAAPI_DRIVER_ERROR_MARKERS = (
+        'No support for codec',
+        'Failed setup for format vaapi',
+        'hwaccel initialisation returned error',
+        'Failed to initialise VAAPI connection',
+    )
+    # (Lowercase) ffmpeg stderr parts showing the driver has no low-power
+    # encoding entrypoint for a '-low_power 1' encode: the low-power one is
+    # named ("does not support entrypoint 8 (VAEntrypointEncSliceLP)"), as
+    # an unsupported profile also reports a missing entrypoint
+    VAAPI_LOW_POWER_ERROR_MARKERS = (
+        'vaentrypointencslicelp',
+        'low-power encoding is not supported',
+    )
+    # Pixel formats a stream already in the target codec can be copied with
+    # (what the target encoders produce, and browsers play)
+    STREAM_COPY_PIX_FMTS = ('yuv420p',)
+    # Leading bytes of a buffer given to libmagic: container signatures sit
+    # at the start, and it need not scan (or run text checks on) whole videos
+    MAGIC_SNIFF_BYTES = 8192
 
     def __init__(self, config_obj, media_output_dir, ffmpeg_path=None,
                  ffprobe_path=None, scaling_factor=None, use_vaapi=False,
-                 codec_choice=None):
-        """Initializes the media processor."""
+                 codec_choice=None, ffmpeg_threads=None, vaapi_lock=None,
+                 cache_dir=None):
+        """
+        Initializes the media processor.
+
+        process_annotation() may be called from several threads at once:
+        reads from the PDF and libmagic calls (neither is thread-safe) are
+        serialized, and so are VAAPI runs, which share one render device.
+        When running concurrent jobs, pass ffmpeg_threads to bound the
+        threads of each encode (replaces the -threads value of config).
+        The VAAPI runs of one processor are serialized by a thread lock;
+        processors of several processes must share vaapi_lock (e.g. a
+        multiprocessing.Lock) for their runs to be serialized too.
+        cache_dir is the directory of the records letting later runs reuse
+        the processed media (None: no reuse).
+        """
         self.config = config_obj
         self.media_output_dir = media_output_dir
+        self.cache_dir = cache_dir
         self.ffmpeg_path = ffmpeg_path
         self.ffprobe_path = ffprobe_path
+        self._library_lock = threading.Lock()
+        self._vaapi_lock = vaapi_lock if vaapi_lock is not None else threading.Lock()
+        # Set once a VAAPI driver error was seen: later media skip VAAPI
+        self._vaapi_degraded = False
+        # Set once the driver rejected '-low_power 1' (VAAPI_LOW_POWER)
+        self._low_power_rejected = False
+        # ffprobe results keyed by (real path, mtime_ns, size): a file is
+        # only probed again once it has been rewritten
+        self._probe_cache = {}
+        # Cache key -> Future of the annotation record, one per distinct
+        # media of this run (see process_annotation)
+        self._shared_results = {}
+        self._shared_results_lock = threading.Lock()
+        # MIME type -> extension; CODEC_FORMAT_MAP entries win over the
+        # common ones, and the first codec listed wins for a shared type
+        self._mime_to_ext = {}
+        for details in self.config.CODEC_FORMAT_MAP.values():
+            if 'mime' in details:
+                self._mime_to_ext.setdefault(details['mime'],
+                                             details.get('ext', '.bin'))
+        for mime, ext in _COMMON_MIME_EXTENSIONS.items():
+            self._mime_to_ext.setdefault(mime, ext)
+        self.ffmpeg_common_options = list(self.config.FFMPEG_COMMON_OPTIONS)
+        if ffmpeg_threads and '-threads' in self.ffmpeg_common_options:
+            threads_value_index = self.ffmpeg_common_options.index('-threads') + 1
+            self.ffmpeg_common_options[threads_value_index] = str(ffmpeg_threads)
+        # Option groups of the ffmpeg commands, fixed for the whole run
+        init_device_str = "vaapi=va"
+        if self.config.VAAPI_DEVICE_PATH:
+            init_device_str += f":{self.config.VAAPI_DEVICE_PATH}"
+        self._vaapi_init_options = ('-init_hw_device', init_device_str)
+        self._container_options = {
+            codec: tuple(details.get('container_opts', ()))
+            for codec, details in self.config.CODEC_FORMAT_MAP.items()
+        }
+        # The same encoder thread count for the other (CPU) encodes
+        self.ffmpeg_thread_options = []
+        if '-threads' in self.ffmpeg_common_options:
+            threads_index = self.ffmpeg_common_options.index('-threads')
+            self.ffmpeg_thread_options = (
+                self.ffmpeg_common_options[threads_index:threads_index + 2]
+            )
 
         self.enable_transcoding = (
             self.config.ENABLE_TRANSCODING and bool(self.ffmpeg_path)
         )
         if self.config.ENABLE_TRANSCODING and not self.ffmpeg_path:
-            print("WARN: Transcoding enabled but ffmpeg not found. Disabling.")
+            logger.warning("WARN: Transcoding enabled but ffmpeg not found. Disabling.")
 
         self.user_codec_choice = codec_choice
         self._validate_and_set_scaling(scaling_factor)
         self._determine_target_format(codec_choice)
         self._validate_vaapi_request(use_vaapi)
         self._initialize_magic()
+        self._settings_digest = self._compute_settings_digest()
 
     def _validate_and_set_scaling(self, scaling_factor_input):
         """Validates and stores the requested scaling factor."""
@@ -80,16 +263,19 @@ class MediaProcessor:
                 factor = int(scaling_factor_input)
                 if 1 <= factor <= 100:
                     self.scaling_factor = factor
-                    print(f"INFO: Video scaling requested: {self.scaling_factor}%.")
+                    logger.info(
+                        "INFO: Video scaling requested: %s%%.",
+                        self.scaling_factor
+                    )
                 else:
-                    print(
-                        f"WARN: Scaling factor ({scaling_factor_input}) "
-                        f"out of range (1-100). Ignored."
+                    logger.warning(
+                        "WARN: Scaling factor (%s) out of range (1-100). Ignored.",
+                        scaling_factor_input
                     )
             except (ValueError, TypeError):
-                print(
-                    f"WARN: Invalid scaling factor ({scaling_factor_input}). "
-                    f"Ignored."
+                logger.warning(
+                    "WARN: Invalid scaling factor (%s). Ignored.",
+                    scaling_factor_input
                 )
 
     def _determine_target_format(self, codec_choice_input):
@@ -97,163 +283,491 @@ class MediaProcessor:
         if (codec_choice_input is not None and
                 codec_choice_input in self.config.ALLOWED_VIDEO_CODECS):
             self.target_codec = codec_choice_input
-            print(f"INFO: User requested target video codec: {self.target_codec}")
+            logger.info(
+                "INFO: User requested target video codec: %s",
+                self.target_codec
+            )
         else:
             self.target_codec = self.config.DEFAULT_VIDEO_CODEC
             if codec_choice_input is not None:
-                print(
-                    f"WARN: Invalid codec '{codec_choice_input}'. "
-                    f"Using default: {self.target_codec}"
+                logger.warning(
+                    "WARN: Invalid codec '%s'. Using default: %s",
+                    codec_choice_input, self.target_codec
                 )
             else:
-                print(f"INFO: Using default target video codec: {self.target_codec}")
+                logger.info(
+                    "INFO: Using default target video codec: %s",
+                    self.target_codec
+                )
+        self._set_target_format()
 
+    def _set_target_format(self):
+        """Sets the extension, MIME type and container options of target_codec."""
         format_info = self.config.CODEC_FORMAT_MAP.get(self.target_codec)
         if not format_info:
-            print(
-                f"ERROR: Config error! Codec '{self.target_codec}' "
-                f"not in CODEC_FORMAT_MAP."
+            logger.error(
+                "ERROR: Config error! Codec '%s' not in CODEC_FORMAT_MAP.",
+                self.target_codec
             )
-            print("       Falling back to H.264/MP4.")
+            logger.info("       Falling back to H.264/MP4.")
             self.target_codec = 'h264'
             format_info = self.config.CODEC_FORMAT_MAP['h264']
 
         self.target_extension = format_info.get('ext', '.mp4')
         self.target_mime_type = format_info.get('mime', 'video/mp4')
-        self.target_container_opts = format_info.get('container_opts', [])
+        self.target_container_opts = format_info.get('container_opts', ())
 
-        print(
-            f"INFO: Effective target format details: "
-            f"Codec={self.target_codec}, Extension={self.target_extension}, "
-            f"MIME={self.target_mime_type}"
+        logger.info(
+            "INFO: Effective target format details: Codec=%s, Extension=%s, MIME=%s",
+            self.target_codec, self.target_extension, self.target_mime_type
         )
 
     def _validate_vaapi_request(self, use_vaapi_input):
         """Checks prerequisites for attempting VAAPI."""
         self.use_vaapi = False
+        # Encoders of the ffmpeg binary (None: unknown, assume configured
+        # ones exist); only listed when VAAPI is requested
+        self.ffmpeg_encoders = None
+        self.unusable_vaapi_encoders = frozenset()
         if not use_vaapi_input:
             return
         if not self.ffmpeg_path:
-            print("WARN: VAAPI requested, but ffmpeg missing.")
+            logger.warning("WARN: VAAPI requested, but ffmpeg missing.")
             return
         if not sys.platform.startswith('linux'):
-            print("WARN: VAAPI requested, but not Linux.")
+            logger.warning("WARN: VAAPI requested, but not Linux.")
             return
         if not any(codec in self.config.FFMPEG_CODEC_OPTIONS_VAAPI
                    for codec in self.config.ALLOWED_VIDEO_CODECS):
-            print("WARN: VAAPI requested, but no VAAPI encoders configured.")
+            logger.warning("WARN: VAAPI requested, but no VAAPI encoders configured.")
             return
         if not self.ffprobe_path:
-            print("WARN: VAAPI requested, but ffprobe missing "
-                  "(decode capability check limited).")
-        try:
-            has_render_node = any(
-                d.startswith('renderD') for d in os.listdir('/dev/dri/')
+            logger.warning(
+                "WARN: VAAPI requested, but ffprobe missing (decode capability check "
+                "limited)."
             )
-            if not has_render_node and not self.config.VAAPI_DEVICE_PATH:
-                print("WARN: No VAAPI render devices found in /dev/dri/ "
-                      "and no VAAPI_DEVICE_PATH set in config.")
-        except FileNotFoundError:
-            print("INFO: /dev/dri directory not found.")
+        try:
+            # Cached per process (and inherited by forked workers)
+            render_nodes = utils.find_vaapi_render_nodes()
+            if render_nodes is None:
+                logger.info("INFO: /dev/dri directory not found.")
+            elif not render_nodes and not self.config.VAAPI_DEVICE_PATH:
+                logger.warning(
+                    "WARN: No VAAPI render devices found in /dev/dri/ and no "
+                    "VAAPI_DEVICE_PATH set in config."
+                )
         except Exception as e:
-            print(f"WARN: Error checking /dev/dri: {e}")
+            logger.warning("WARN: Error checking /dev/dri: %s", e)
+
+        # Cached per process: an ffmpeg built without the VAAPI encoders
+        # goes straight to the CPU path instead of failing an attempt
+        self.ffmpeg_encoders = utils.find_ffmpeg_encoders(self.ffmpeg_path)
+        target_vaapi_options = self.config.FFMPEG_CODEC_OPTIONS_VAAPI.get(
+            self.target_codec
+        )
+        if target_vaapi_options and not self._has_ffmpeg_encoder(target_vaapi_options):
+            logger.warning(
+                "WARN: ffmpeg has no VAAPI encoder for '%s'. VAAPI will only be used "
+                "for decoding.",
+                self.target_codec
+            )
 
-        print("INFO: VAAPI acceleration enabled. Will attempt usage.")
+        # Test-encode a frame with each VAAPI encoder that may be used, so an
+        # encoder the driver does not support (e.g. HEVC on older iGPUs)
+        # goes straight to the CPU instead of failing every media's attempt
+        tested_encoders = set()
+        unusable_encoders = set()
+        for codec_options in (target_vaapi_options,
+                              self.config.FFMPEG_PRE_RESIZE_OPTIONS_VAAPI):
+            if (not codec_options or '-c:v' not in codec_options
+                    or not self._has_ffmpeg_encoder(codec_options)):
+                continue
+            encoder = codec_options[codec_options.index('-c:v') + 1]
+            if encoder in tested_encoders:
+                continue
+            tested_encoders.add(encoder)
+            if not utils.vaapi_encoder_works(self.ffmpeg_path, encoder,
+                                             self.config.VAAPI_DEVICE_PATH):
+                logger.warning(
+                    "WARN: VAAPI encoder '%s' failed a test encode (unsupported by "
+                    "the GPU driver?). Using the CPU instead.",
+                    encoder
+                )
+                unusable_encoders.add(encoder)
+        self.unusable_vaapi_encoders = frozenset(unusable_encoders)
+        if target_vaapi_options and not self._has_ffmpeg_encoder(target_vaapi_options):
+            self._apply_vaapi_fallback_codec()
+
+        logger.info("INFO: VAAPI acceleration enabled. Will attempt usage.")
         self.use_vaapi = True
 
+    def _apply_vaapi_fallback_codec(self):
+        """
+        Switches the target codec to config VAAPI_FALLBACK_CODEC when its
+        VAAPI encoder works, the requested one being unusable. Without it
+        (the default) the requested codec is kept and encoded on the CPU.
+        """
+        fallback_codec = self.config.VAAPI_FALLBACK_CODEC
+        if not fallback_codec or fallback_codec == self.target_codec:
+            return
+        fallback_options = self.config.FFMPEG_CODEC_OPTIONS_VAAPI.get(fallback_codec)
+        if (fallback_codec not in self.config.CODEC_FORMAT_MAP
+                or not fallback_options or '-c:v' not in fallback_options
+                or not self._has_ffmpeg_encoder(fallback_options)):
+            logger.warning(
+                "WARN: VAAPI_FALLBACK_CODEC '%s' has no VAAPI encoder configured "
+                "or available. Keeping '%s' on the CPU.",
+                fallback_codec, self.target_codec
+            )
+            return
+        encoder = fallback_options[fallback_options.index('-c:v') + 1]
+        if not utils.vaapi_encoder_works(self.ffmpeg_path, encoder,
+                                         self.config.VAAPI_DEVICE_PATH):
+            logger.warning(
+                "WARN: VAAPI_FALLBACK_CODEC encoder '%s' failed a test encode too. "
+                "Keeping '%s' on the CPU.",
+                encoder, self.target_codec
+            )
+            self.unusable_vaapi_encoders |= {encoder}
+            return
+        logger.warning(
+            "WARN: No usable VAAPI encoder for '%s'. Switching the target codec to "
+            "'%s' (VAAPI_FALLBACK_CODEC).",
+            self.target_codec, fallback_codec
+        )
+        if self.user_codec_choice:
+            # Videos already in the fallback format are then kept as is
+            self.user_codec_choice = fallback_codec
+        self.target_codec = fallback_codec
+        self._set_target_format()
+
+    def _note_vaapi_driver_error(self, stderr):
+        """
+        Disables VAAPI for the remaining media if an ffmpeg stderr shows a
+        VAAPI driver error.
+        """
+        if any(marker in stderr for marker in self.VAAPI_DRIVER_ERROR_MARKERS):
+            if not self._vaapi_degraded:
+                logger.warning(
+                    "    WARN: VAAPI driver error detected. Using the CPU for the "
+                    "remaining media."
+                )
+            self._vaapi_degraded = True
+
+    def _use_vaapi_low_power(self):
+        """Tells whether VAAPI encodes get '-low_power 1'."""
+        return self.config.VAAPI_LOW_POWER and not self._low_power_rejected
+
+    def _note_low_power_rejection(self, stderr):
+        """
+        Disables '-low_power 1' for the remaining media if an ffmpeg stderr
+        shows the driver does not support it. Returns True in that case.
+        """
+        stderr_lower = stderr.lower()
+        if not any(marker in stderr_lower
+                   for marker in self.VAAPI_LOW_POWER_ERROR_MARKERS):
+            return False
+        if not self._low_power_rejected:
+            logger.warning(
+                "    WARN: VAAPI low-power encoding not supported. Using the "
+                "default VAAPI encoder."
+            )
+        self._low_power_rejected = True
+        return True
+
+    def _has_ffmpeg_encoder(self, codec_options):
+        """
+        Tells whether ffmpeg provides the encoder selected ('-c:v') by
+        codec_options, and it did not fail its VAAPI test encode; True when
+        it cannot be known.
+        """
+        if '-c:v' not in codec_options:
+            return True
+        encoder = codec_options[codec_options.index('-c:v') + 1]
+        if encoder in self.unusable_vaapi_encoders:
+            return False
+        return self.ffmpeg_encoders is None or encoder in self.ffmpeg_encoders
+
     def _initialize_magic(self):
         """Initializes python-magic if available."""
         self.magic_available = False
         self.mime_checker = None
         if MAGIC_IMPORTED_SUCCESSFULLY and magic:
+            magic_exception = getattr(magic, 'MagicException', ())
             try:
-                self.mime_checker = magic.Magic(mime=True)
-                self.magic_available = True
-                print("INFO: python-magic initialized.")
-            except magic.MagicException as e:
-                print(f"ERROR: python-magic init failed: {e}. Check libmagic.")
+                self.mime_checker = utils.get_magic()
+                self.magic_available = self.mime_checker is not None
+                logger.info("INFO: python-magic initialized.")
+            except magic_exception as e:
+                logger.error("ERROR: python-magic init failed: %s. Check libmagic.", e)
                 self.magic_available = False
             except Exception as e:
-                print(f"WARN: Unexpected error initializing python-magic: {e}")
+                logger.warning(
+                    "WARN: Unexpected error initializing python-magic: %s",
+                    e
+                )
                 self.magic_available = False
         else:
-             print("INFO: python-magic not available or import failed.")
+             logger.info("INFO: python-magic not available or import failed.")
 
     def _get_file_extension_from_mime(self, mime_type):
         """Determines file extension from MIME type."""
         if not isinstance(mime_type, str) or '/' not in mime_type:
             return ".bin"
 
-        main_type, sub_type_full = mime_type.split('/', 1)
-        sub_type = sub_type_full.split(';')[0].lower().strip()
-
-        for details in self.config.CODEC_FORMAT_MAP.values():
-            if details.get('mime') == mime_type:
-                return details.get('ext', '.bin')
-
-        common_mime_map = {
-            'video/mp4': '.mp4', 'video/quicktime': '.mov', 'video/webm': '.webm',
-            'video/x-matroska': '.mkv', 'video/x-msvideo': '.avi',
-            'video/mpeg': '.mpg', 'audio/mpeg': '.mp3', 'audio/aac': '.aac',
-            'audio/ogg': '.ogg', 'audio/wav': '.wav', 'audio/flac': '.flac',
-            'image/jpeg': '.jpg', 'image/png': '.png', 'image/gif': '.gif',
-            'image/webp': '.webp', 'image/svg+xml': '.svg',
-            'application/octet-stream': '.bin',
-        }
-        if mime_type in common_mime_map:
-            return common_mime_map[mime_type]
+        extension = self._mime_to_ext.get(mime_type)
+        if extension is not None:
+            return extension
 
-        safe_subtype = ''.join(
-            c for c in sub_type if c.isalnum() or c in ['-', '+']
-        )
+        sub_type = mime_type.split('/', 1)[1].split(';')[0].lower().strip()
+        safe_subtype = sub_type.translate(_SAFE_SUBTYPE_TABLE)
         if safe_subtype:
             return f".{safe_subtype}"
 
         return ".bin"
 
+    def _compute_settings_digest(self):
+        """
+        Hashes every setting the processed media depends on, so results
+        cached with other settings are not reused.
+        """
+        settings = [
+            self.target_codec, self.target_extension, self.user_codec_choice,
+            self.scaling_factor,
+            self.use_vaapi, sorted(self.unusable_vaapi_encoders),
+            self.enable_transcoding,
+            bool(self.ffprobe_path), self.magic_available,
+            self.config.MAX_PRE_RESIZE_WIDTH, self.config.MAX_PRE_RESIZE_HEIGHT,
+            self.config.FFMPEG_PRE_RESIZE_OPTIONS,
+            self.config.FFMPEG_PRE_RESIZE_OPTIONS_VAAPI,
+            self.config.FFMPEG_SCALE_OPTIONS,
+            self.config.VAAPI_LOW_POWER, self.config.ALLOW_OPUS_IN_MP4,
+            dict(self.config.FFMPEG_CODEC_OPTIONS_CPU),
+            dict(self.config.FFMPEG_CODEC_OPTIONS_VAAPI),
+            # The configured options: a -threads value set for concurrent
+            # jobs does not change the output, nor invalidate the cache
+            self.config.FFMPEG_COMMON_OPTIONS,
+            self._container_options,
+            dict(self.PREFERRED_FORMATS),
+        ]
+        return hashlib.blake2b(
+            json.dumps(settings, sort_keys=True, default=str).encode('utf-8'),
+            digest_size=16
+        ).hexdigest()
+
+    def _compute_cache_key(self, stream_data):
+        """Hashes the embedded media stream together with the settings."""
+        stream_hash = hashlib.blake2b(stream_data, digest_size=16)
+        stream_hash.update(self._settings_digest.encode('ascii'))
+        return stream_hash.hexdigest()
+
+    def _cache_record_path(self, safe_base):
+        """Path of the cache record of the media named safe_base."""
+        return os.path.join(self.cache_dir, safe_base + '.json')
+
+    def _load_cached_result(self, safe_base, cache_key):
+        """
+        Returns the (output path, MIME type) of a previous run for this
+        media, or None if there is none, it was made from other
+        data/settings, or its output file has changed since (size or
+        modification time).
+        """
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._cache_record_path(safe_base), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            output_path = os.path.join(self.media_output_dir, record['fileName'])
+            output_stat = os.stat(output_path)
+            if (record['key'] != cache_key or
+                    output_stat.st_size != record['size'] or
+                    output_stat.st_mtime_ns != record['mtimeNs']):
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return output_path, record['contentType']
+
+    def _store_cached_result(self, safe_base, cache_key, output_path, mime_type):
+        """Records the processed media for the next run (best effort)."""
+        if self.cache_dir is None:
+            return
+        record_path = self._cache_record_path(safe_base)
+        try:
+            output_stat = os.stat(output_path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(record_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'key': cache_key,
+                    'fileName': os.path.basename(output_path),
+                    'size': output_stat.st_size,
+                    'mtimeNs': output_stat.st_mtime_ns,
+                    'contentType': mime_type,
+                }, f)
+        except OSError as e:
+            logger.warning("    WARN: Could not write media cache record: %s", e)
+
+    def _detect_mime(self, content_type_pdf, buffer=None, path=None):
+        """
+        Detects the MIME type of media content with python-magic, from an
+        in-memory buffer or a file, falling back to the PDF's content type.
+
+        Args:
+            content_type_pdf (str): Content type declared in the PDF.
+            buffer (bytes-like, optional): The media content (only its first
+                                      MAGIC_SNIFF_BYTES bytes are examined).
+            path (str, optional): Path to the media file (if no buffer).
+
+        Returns:
+            str: The detected MIME type ('application/octet-stream' if unknown).
+        """
+        detected_mime = "application/octet-stream"
+        if self.magic_available and self.mime_checker:
+            try:
+                with self._library_lock:
+                    if buffer is not None:
+                        magic_mime = self.mime_checker.from_buffer(
+                            bytes(buffer[:self.MAGIC_SNIFF_BYTES])
+                        )
+                    else:
+                        magic_mime = self.mime_checker.from_file(path)
+                if magic_mime and magic_mime != "application/octet-stream":
+                    detected_mime = magic_mime
+                    logger.info("    MIME detected by magic: '%s'", detected_mime)
+                elif content_type_pdf and content_type_pdf != "application/octet-stream":
+                    detected_mime = content_type_pdf
+                    logger.info(
+                        "    Magic inconclusive, using MIME from PDF: '%s'",
+                        content_type_pdf
+                    )
+            except Exception as e:
+                logger.warning("    WARN: Magic failed: %s", e)
+                if content_type_pdf and content_type_pdf != "application/octet-stream":
+                    detected_mime = content_type_pdf
+                    logger.info(
+                        "    Using MIME from PDF due to magic error: '%s'",
+                        content_type_pdf
+                    )
+        elif content_type_pdf and content_type_pdf != "application/octet-stream":
+             detected_mime = content_type_pdf
+             logger.info(
+                 "    Using MIME from PDF (magic unavailable): '%s'",
+                 content_type_pdf
+             )
+        return detected_mime
+
     def _get_video_info(self, input_path):
-        """Gets video width, height, codec using ffprobe."""
-        if not self.ffprobe_path or not os.path.exists(input_path):
+        """Gets video width, height, codec using ffprobe (cached per file)."""
+        if not self.ffprobe_path:
             return None
+        try:
+            file_stat = os.stat(input_path)
+        except OSError:
+            return None
+        cache_key = (
+            os.path.realpath(input_path), file_stat.st_mtime_ns, file_stat.st_size
+        )
+        if cache_key not in self._probe_cache:
+            self._probe_cache[cache_key] = self._probe_video_info(input_path)
+        return self._probe_cache[cache_key]
+
+    def _probe_video_info(self, input_path):
+        """
+        Runs ffprobe to get the video width, height, codec and pixel format,
+        and the codec of the first audio stream.
+        """
         try:
             command = [
-                self.ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
-                '-show_entries', 'stream=width,height,codec_name',
-                '-of', 'json', input_path
+                self.ffprobe_path, '-v', 'error',
+                '-show_entries', 'stream=codec_type,codec_name,width,height,pix_fmt',
+                # One "key=value|key=value" line per stream: a few bytes to
+                # parse, whatever the order ffprobe prints the fields in
+                '-of', 'compact=p=0', input_path
             ]
             result = subprocess.run(
                 command, capture_output=True, text=True, check=True,
                 encoding='utf-8', errors='replace'
             )
-            data = json.loads(result.stdout)
-            if not data.get('streams'):
+            streams = [
+                dict(field.split('=', 1) for field in line.split('|') if '=' in field)
+                for line in result.stdout.splitlines()
+            ]
+            stream = next(
+                (s for s in streams if s.get('codec_type') == 'video'), None
+            )
+            if not stream:
                 return None
-            stream = data['streams'][0]
+            audio_stream = next(
+                (s for s in streams if s.get('codec_type') == 'audio'), {}
+            )
+            audio_codec = audio_stream.get('codec_name')
             width = stream.get('width')
             height = stream.get('height')
             codec = stream.get('codec_name')
-            if width and height and codec:
+            if width and height and codec and 'N/A' not in (width, height, codec):
+                pix_fmt = stream.get('pix_fmt')
                 info = {
                     'width': int(width),
                     'height': int(height),
-                    'codec_name': str(codec)
+                    'codec_name': str(codec),
+                    'pix_fmt': pix_fmt if pix_fmt != 'N/A' else None,
+                    'audio_codec': audio_codec if audio_codec != 'N/A' else None
                 }
-                print(
-                    f"    Video info: {info['width']}x{info['height']}, "
-                    f"Codec: {info['codec_name']}"
+                logger.info(
+                    "    Video info: %sx%s, Codec: %s",
+                    info['width'], info['height'], info['codec_name']
                 )
                 return info
             else:
                 return None
-        except (subprocess.CalledProcessError, json.JSONDecodeError) as probe_err:
-            print(f"    WARN: ffprobe failed for {os.path.basename(input_path)}: {probe_err}")
+        except (subprocess.CalledProcessError, ValueError) as probe_err:
+            logger.warning(
+                "    WARN: ffprobe failed for %s: %s",
+                os.path.basename(input_path), probe_err
+            )
             return None
         except Exception as e:
-            print(f"    ERROR: Unexpected error getting video info: {e}")
+            logger.error("    ERROR: Unexpected error getting video info: %s", e)
             return None
 
+    def _run_ffmpeg(self, command, kept_bytes=1000):
+        """
+        Runs an ffmpeg command, keeping only the ends of its stderr.
+
+        stderr is read in binary as it is produced instead of being buffered
+        whole (verbose builds can write megabytes), and only the kept ends
+        are decoded; stdout is discarded.
+
+        Args:
+            command (list): The command line to run.
+            kept_bytes (int): Number of bytes kept from the beginning and
+                              from the end of stderr.
+
+        Returns:
+            subprocess.CompletedProcess: The result. Its stderr holds the
+            decoded first and last `kept_bytes` bytes of the output, so
+            slices of up to `kept_bytes` from either end match the full
+            (ASCII) text.
+        """
+        with subprocess.Popen(
+                command, stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE) as process:
+            stderr_head = process.stderr.read(kept_bytes)
+            stderr_tail = bytearray()
+            for chunk in iter(lambda: process.stderr.read(65536), b''):
+                stderr_tail += chunk
+                del stderr_tail[:-kept_bytes]
+            returncode = process.wait()
+        stderr_text = (stderr_head + stderr_tail).decode('utf-8', errors='replace')
+        return subprocess.CompletedProcess(
+            command, returncode, stdout=None, stderr=stderr_text
+        )
+
     def _perform_pre_resize(self, input_path, video_info):
-        """Performs fast CPU pre-resize if video exceeds MAX limits."""
+        """
+        Performs a fast pre-resize if video exceeds MAX limits: on the GPU
+        when VAAPI is enabled and the source is decodable, else (or if that
+        fails) on the CPU.
+        """
         if not self.ffmpeg_path or not video_info:
             return False, input_path
 
@@ -265,78 +779,148 @@ class MediaProcessor:
         if not max_w or not max_h or (width <= max_w and height <= max_h):
             return False, input_path # No pre-resize needed
 
-        print(
-            f"    INFO: Video dims ({width}x{height}) > limit ({max_w}x{max_h}). "
-            f"Pre-resizing..."
+        logger.info(
+            "    INFO: Video dims (%sx%s) > limit (%sx%s). Pre-resizing...",
+            width, height, max_w, max_h
         )
         temp_path = None
         success = False
         original_input_path = input_path # Keep track of the original path
         try:
-            input_dir = os.path.dirname(input_path)
-            input_base = os.path.splitext(os.path.basename(input_path))[0]
+            input_dir, input_filename = os.path.split(input_path)
+            input_base = os.path.splitext(input_filename)[0]
             temp_suffix = '.preresize.mp4'
-            with tempfile.NamedTemporaryFile(
-                    mode='wb', delete=False, dir=input_dir,
-                    prefix=f"{input_base}_", suffix=temp_suffix) as temp_file:
-                temp_path = temp_file.name
+            temp_path = _reserve_temp_path(
+                input_dir, f"{input_base}_", temp_suffix
+            )
 
-            scale_filter = (
-                f"scale=w='min(iw,trunc({max_w}/2)*2)':"
+            scale_size = (
+                f"w='min(iw,trunc({max_w}/2)*2)':"
                 f"h='min(ih,trunc({max_h}/2)*2)':"
-                f"force_original_aspect_ratio=decrease:flags=bicubic"
+                f"force_original_aspect_ratio=decrease"
             )
+            # Only a size cap before the real encode: the cheapest scaler
+            # is good enough
+            scale_filter = f"scale={scale_size}:flags=fast_bilinear"
 
             command = [self.ffmpeg_path, '-y', '-i', input_path]
             command.extend(['-vf', scale_filter])
             command.extend(self.config.FFMPEG_PRE_RESIZE_OPTIONS)
+            command.extend(self.ffmpeg_thread_options)
             command.append(temp_path)
 
-            print(f"       CMD PRE-RESIZE: {' '.join(command)}")
-            result = subprocess.run(
-                command, capture_output=True, text=True, check=False,
-                encoding='utf-8', errors='replace'
-            )
+            if (self.use_vaapi and not self._vaapi_degraded and
+                    video_info['codec_name'] in self.VAAPI_DECODABLE_CODECS and
+                    self._has_ffmpeg_encoder(
+                        self.config.FFMPEG_PRE_RESIZE_OPTIONS_VAAPI
+                    )):
+                # Decode, scale and encode on the GPU first
+                vaapi_command = [self.ffmpeg_path, '-y']
+                vaapi_command.extend(self._vaapi_init_options)
+                vaapi_command.extend([
+                    '-hwaccel', 'vaapi', '-hwaccel_device', 'va',
+                    '-hwaccel_output_format', 'vaapi', '-i', input_path
+                ])
+                vaapi_command.extend(
+                    ['-vf', f"scale_vaapi={scale_size}:format=nv12"]
+                )
+                vaapi_command.extend(self.config.FFMPEG_PRE_RESIZE_OPTIONS_VAAPI)
+                low_power = self._use_vaapi_low_power()
+                if low_power:
+                    vaapi_command.extend(['-low_power', '1'])
+                vaapi_command.append(temp_path)
+
+                logger.info(
+                    "       CMD PRE-RESIZE (VAAPI): %s",
+                    _CommandLine(vaapi_command)
+                )
+                with self._vaapi_lock:
+                    result = self._run_ffmpeg(vaapi_command)
+                if result.returncode == 0 and _exists_nonempty(temp_path):
+                    command = None  # No CPU fallback needed
+                elif not (low_power and
+                          self._note_low_power_rejection(result.stderr)):
+                    self._note_vaapi_driver_error(result.stderr)
+                if command:
+                    logger.warning(
+                        "    WARN: VAAPI pre-resize failed (code: %s). Falling back "
+                        "to CPU.",
+                        result.returncode
+                    )
 
-            if (result.returncode == 0 and os.path.exists(temp_path)
-                    and os.path.getsize(temp_path) > 0):
-                print(f"       Pre-resize OK: {os.path.basename(temp_path)}")
-                shutil.move(temp_path, input_path)
-                print("       Original file overwritten by pre-resized version.")
+            if command:
+                logger.info("       CMD PRE-RESIZE: %s", _CommandLine(command))
+                result = self._run_ffmpeg(command)
+
+            if result.returncode == 0 and _exists_nonempty(temp_path):
+                logger.info("       Pre-resize OK: %s", os.path.basename(temp_path))
+                os.replace(temp_path, input_path)
+                logger.info("       Original file overwritten by pre-resized version.")
                 success = True
             else:
-                print(f"    ERROR: Pre-resize failed (code: {result.returncode}).")
-                print(f"      Stderr: ...{result.stderr[-500:]}")
+                logger.error(
+                    "    ERROR: Pre-resize failed (code: %s).",
+                    result.returncode
+                )
+                logger.info("      Stderr: ...%s", result.stderr[-500:])
                 success = False
                 input_path = original_input_path
 
         except Exception as e:
-            print(f"    ERROR: Unexpected exception during pre-resize: {e}")
+            logger.error("    ERROR: Unexpected exception during pre-resize: %s", e)
             success = False
             input_path = original_input_path
         finally:
-            if not success and temp_path and os.path.exists(temp_path):
-                print("       Cleaning failed temp pre-resize file.")
-                try:
-                    os.remove(temp_path)
-                except OSError as del_err:
-                    print(f"       WARN: Failed cleaning temp file: {del_err}")
+            if not success and temp_path and _remove_file(temp_path):
+                logger.info("       Cleaned failed temp pre-resize file.")
 
         return success, input_path
 
-    def _perform_intermediate_h264_encode(self, input_path, intermediate_h264_output_path):
+    def _perform_intermediate_h264_encode(self, input_path, intermediate_h264_output_path,
+                                          source_codec_name=None):
         """
         Performs a fast, high-quality CPU transcode to an intermediate
         H.264/MP4 file. Designed for sources incompatible with VAAPI decoding,
         prioritizing quality preservation over size for this temporary file.
+
+        If the source is already H.264 (only its container was the problem),
+        a stream-copy remux to MP4 is tried first.
         """
         if not self.ffmpeg_path:
-            print("    ERROR: Cannot perform intermediate encode - ffmpeg path not set.")
+            logger.error("    ERROR: Cannot perform intermediate encode - ffmpeg path not set.")
             return False
 
-        print(
-            f"    Creating intermediate H.264 (near-lossless) for VAAPI compatibility: "
-            f"{os.path.basename(intermediate_h264_output_path)}"
+        if source_codec_name == 'h264':
+            remux_cmd = [
+                self.ffmpeg_path, '-y',
+                '-i', input_path,
+                '-map', '0:v:0', '-map', '0:a:0?',
+                '-c', 'copy',              # No re-encode: H.264 already
+                '-movflags', '+faststart',
+                intermediate_h264_output_path
+            ]
+            logger.info("      CMD INTERMEDIATE H264 (Remux): %s", _CommandLine(remux_cmd))
+            try:
+                result = self._run_ffmpeg(remux_cmd)
+                if result.returncode == 0 and _exists_nonempty(intermediate_h264_output_path):
+                    logger.info("      Intermediate H.264 remux successful.")
+                    return True
+                logger.warning(
+                    "    WARN: Intermediate H.264 remux failed (code: %s). "
+                    "Transcoding instead.",
+                    result.returncode
+                )
+            except Exception as e:
+                logger.warning(
+                    "    WARN: Exception during intermediate H.264 remux: %s. "
+                    "Transcoding instead.",
+                    e
+                )
+
+        logger.info(
+            "    Creating intermediate H.264 (near-lossless) for VAAPI "
+            "compatibility: %s",
+            os.path.basename(intermediate_h264_output_path)
         )
 
         intermediate_cmd = [
@@ -347,133 +931,213 @@ class MediaProcessor:
             '-crf', '17',          # Near-lossless quality
             '-c:a', 'copy',        # Copy audio stream without re-encoding
             '-movflags', '+faststart', # Standard for MP4 web playback
-            intermediate_h264_output_path
         ]
+        intermediate_cmd.extend(self.ffmpeg_thread_options)
+        intermediate_cmd.append(intermediate_h264_output_path)
 
-        print(f"      CMD INTERMEDIATE H264 (Near-Lossless): {' '.join(intermediate_cmd)}")
+        logger.info(
+            "      CMD INTERMEDIATE H264 (Near-Lossless): %s",
+            _CommandLine(intermediate_cmd)
+        )
         try:
-            result = subprocess.run(
-                intermediate_cmd, capture_output=True, text=True, check=False,
-                encoding='utf-8', errors='replace'
-            )
-            if (result.returncode == 0 and os.path.exists(intermediate_h264_output_path)
-                    and os.path.getsize(intermediate_h264_output_path) > 0):
-                print("      Intermediate H.264 step successful.")
+            result = self._run_ffmpeg(intermediate_cmd)
+            if result.returncode == 0 and _exists_nonempty(intermediate_h264_output_path):
+                logger.info("      Intermediate H.264 step successful.")
                 return True
             else:
-                print(f"    ERROR: Intermediate H.264 step failed! (code: {result.returncode})")
+                logger.error(
+                    "    ERROR: Intermediate H.264 step failed! (code: %s)",
+                    result.returncode
+                )
                 stderr_head = result.stderr[:500]
                 stderr_tail = result.stderr[-500:]
-                print(f"      Stderr (beginning): {stderr_head}...")
-                print(f"      Stderr (end): ...{stderr_tail}")
-                if os.path.exists(intermediate_h264_output_path):
-                     try: os.remove(intermediate_h264_output_path)
-                     except OSError: pass
+                logger.info("      Stderr (beginning): %s...", stderr_head)
+                logger.info("      Stderr (end): ...%s", stderr_tail)
+                _remove_file(intermediate_h264_output_path)
                 return False
         except Exception as e:
-            print(f"    ERROR: Exception during intermediate H.264 step: {e}")
-            traceback.print_exc(limit=1)
-            if os.path.exists(intermediate_h264_output_path):
-                 try: os.remove(intermediate_h264_output_path)
-                 except OSError: pass
+            logger.exception("    ERROR: Exception during intermediate H.264 step: %s", e)
+            _remove_file(intermediate_h264_output_path)
             return False
 
     # --- Main Processing Workflow ---
 
+    def process_annotations_batch(self, page_num, annotations, max_workers=1):
+        """
+        Runs process_annotation() for several annotations of a page.
+
+        ffmpeg/ffprobe run in child processes, so up to max_workers
+        annotations are processed concurrently by threads sharing this
+        processor (pikepdf stream objects cannot be sent to other processes).
+
+        Args:
+            page_num (int): The 0-based index of the page.
+            annotations (list): (annot_index, annot_info) pairs, where
+                                annot_info is a dict from
+                                PdfAnalyzer.find_media_annotations().
+            max_workers (int): Maximum number of concurrent annotations.
+
+        Returns:
+            list: The result of process_annotation() for each annotation,
+                  in the order of `annotations`.
+        """
+        def process_one(annotation):
+            annot_index, annot_info = annotation
+            logger.info("    Processing media annotation %s...", annot_index+1)
+            return self.process_annotation(
+                page_num, annot_index, annot_info['stream_ref'],
+                annot_info['rect'],
+                annot_info.get('content_type', 'application/octet-stream')
+            )
+
+        max_workers = min(max_workers, len(annotations))
+        if max_workers <= 1:
+            return [process_one(annotation) for annotation in annotations]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(process_one, annotations))
+
     def process_annotation(self, page_num, annot_index, stream_ref, pdf_rect,
                            content_type_pdf):
         """Main workflow using multi-step scaling/transcoding."""
-        print(
-            f"--- Processing Annotation: Page {page_num + 1}, "
-            f"Index {annot_index + 1} ---"
+        logger.info(
+            "--- Processing Annotation: Page %s, Index %s ---",
+            page_num + 1, annot_index + 1
         )
 
         # --- 1. Extraction ---
-        # ... (Extraction code as before) ...
         try:
-            stream_bytes = stream_ref.read_bytes()
-            if not stream_bytes:
-                print("    ERROR: Extracted stream is empty.")
+            with self._library_lock:
+                # The decoded data in qpdf's buffer, viewed without copying
+                # it into a bytes object (videos can be hundreds of MB)
+                stream_data = memoryview(stream_ref.get_stream_buffer())
+                stream_id_part = (f"{stream_ref.objgen[0]}_{stream_ref.objgen[1]}"
+                                  if hasattr(stream_ref, 'objgen')
+                                  else f'p{page_num+1}a{annot_index+1}s')
+            if not stream_data.nbytes:
+                logger.error("    ERROR: Extracted stream is empty.")
                 return None
         except Exception as e:
-            print(f"    ERROR: Reading stream failed: {e}")
+            logger.error("    ERROR: Reading stream failed: %s", e)
             return None
-        stream_id_part = (f"{stream_ref.objgen[0]}_{stream_ref.objgen[1]}"
-                          if hasattr(stream_ref, 'objgen')
-                          else f'p{page_num+1}a{annot_index+1}s')
         base_filename_raw = (
             f"slide_{page_num+1}_annot_{annot_index+1}_{stream_id_part}"
         )
-        safe_base = "".join(
-            c if c.isalnum() or c in ['_', '-'] else '_'
-            for c in base_filename_raw
-        )
-        temp_ext = ".tmp.bin"
-        temp_fname = safe_base + temp_ext
-        initial_absolute_temp_path = os.path.join(
-            self.media_output_dir, temp_fname
+        safe_base = base_filename_raw.translate(_SAFE_FILENAME_TABLE)
+        cache_key = self._compute_cache_key(stream_data)
+
+        # --- Reuse the result of another annotation of this run ---
+        # The same media embedded several times, with the same settings,
+        # gives the same output: it is processed once and shared
+        with self._shared_results_lock:
+            shared_future = self._shared_results.get(cache_key)
+            is_owner = shared_future is None
+            if is_owner:
+                shared_future = concurrent.futures.Future()
+                self._shared_results[cache_key] = shared_future
+        if not is_owner:
+            stream_data.release()
+            shared_record = shared_future.result()
+            if not shared_record:
+                logger.error("    ERROR: Processing the shared media failed.")
+                return None
+            logger.info(
+                "    Reusing media shared with another annotation: %s",
+                os.path.basename(shared_record["absolutePath"])
+            )
+            return dict(shared_record, pageIndex=page_num,
+                        annotIndex=annot_index, pdfRect=pdf_rect)
+
+        record = None
+        try:
+            record = self._process_new_media(
+                page_num, annot_index, pdf_rect, content_type_pdf,
+                stream_data, safe_base, cache_key
+            )
+            return record
+        finally:
+            shared_future.set_result(record)
+
+    def _process_new_media(self, page_num, annot_index, pdf_rect,
+                           content_type_pdf, stream_data, safe_base, cache_key):
+        """Saves, scales and transcodes a media stream not yet processed."""
+        # --- Reuse the result of a previous run ---
+        cached_result = self._load_cached_result(safe_base, cache_key)
+        if cached_result:
+            stream_data.release()
+            cached_path, cached_mime = cached_result
+            relative_path = os.path.join(
+                self.config.MEDIA_OUTPUT_DIR_NAME, os.path.basename(cached_path)
+            ).replace("\\", "/")
+            logger.info(
+                "    Reusing media processed by a previous run: %s",
+                os.path.basename(cached_path)
+            )
+            logger.info(
+                "--- Finished Annotation. Final relative path: %s ---",
+                relative_path
+            )
+            return {
+                "pageIndex": page_num, "annotIndex": annot_index,
+                "outputPath": relative_path, "absolutePath": cached_path,
+                "contentTypeDetected": cached_mime, "pdfRect": pdf_rect
+            }
+
+        # --- 2. Identify and Save ---
+        # The MIME type is detected from the bytes still in memory, so the
+        # media is written once, directly under its final name
+        detected_mime = self._detect_mime(content_type_pdf, buffer=stream_data)
+        final_extension = self._get_file_extension_from_mime(detected_mime)
+        final_filename_initial_guess = safe_base + final_extension
+        extracted_path = os.path.join(
+            self.media_output_dir, final_filename_initial_guess
         )
         try:
             os.makedirs(self.media_output_dir, exist_ok=True)
-            with open(initial_absolute_temp_path, "wb") as f:
-                f.write(stream_bytes)
-            print(f"    Extracted to temporary file: {temp_fname}")
+            with open(extracted_path, "wb") as f:
+                f.write(stream_data)
+            logger.info("    Extracted to: %s", final_filename_initial_guess)
         except OSError as e:
-            print(f"    ERROR: Saving extracted media failed: {e}")
+            logger.error("    ERROR: Saving extracted media failed: %s", e)
             return None
+        finally:
+            stream_data.release()  # Free the decoded data right away
 
-        # --- 2. Pre-resize (>4K) and Identify ---
-        current_path = initial_absolute_temp_path
+        # --- Pre-resize (>4K) ---
+        current_path = extracted_path
         video_info = self._get_video_info(current_path)
         source_codec = video_info.get('codec_name') if video_info else None
-        resized, current_path = self._perform_pre_resize(current_path, video_info)
-        if resized:
-            video_info = self._get_video_info(current_path)
-            source_codec = video_info.get('codec_name') if video_info else None
-        # ... (MIME detection as before) ...
-        detected_mime = "application/octet-stream"
-        if self.magic_available and self.mime_checker:
-            try:
-                magic_mime = self.mime_checker.from_file(current_path)
-                if magic_mime and magic_mime != "application/octet-stream":
-                    detected_mime = magic_mime
-                    print(f"    MIME detected by magic: '{detected_mime}'")
-                elif content_type_pdf and content_type_pdf != "application/octet-stream":
-                    detected_mime = content_type_pdf
-                    print(f"    Magic inconclusive, using MIME from PDF: '{content_type_pdf}'")
-            except Exception as e:
-                print(f"    WARN: Magic failed: {e}")
-                if content_type_pdf and content_type_pdf != "application/octet-stream":
-                    detected_mime = content_type_pdf
-                    print(f"    Using MIME from PDF due to magic error: '{content_type_pdf}'")
-        elif content_type_pdf and content_type_pdf != "application/octet-stream":
-             detected_mime = content_type_pdf
-             print(f"    Using MIME from PDF (magic unavailable): '{content_type_pdf}'")
-        final_extension = self._get_file_extension_from_mime(detected_mime)
-        final_filename_initial_guess = safe_base + final_extension
-        final_path_initial_guess = os.path.join(
-            self.media_output_dir, final_filename_initial_guess
+        # Every intermediate step copies the audio: it stays in this codec
+        source_audio_codec = video_info.get('audio_codec') if video_info else None
+        needs_scaling = self.scaling_factor is not None and self.scaling_factor != 100
+        # A video that gets scaled has the pre-resize limits applied by the
+        # scaling step itself: decoded and encoded once instead of twice
+        pre_resize_in_scaling = (
+            needs_scaling and self.enable_transcoding and
+            detected_mime.startswith("video/")
         )
-        if current_path != final_path_initial_guess:
-            try:
-                print(f"    Renaming '{os.path.basename(current_path)}' to '{final_filename_initial_guess}'")
-                if os.path.exists(final_path_initial_guess):
-                    print(f"    WARN: Target file '{final_filename_initial_guess}' exists, removing.")
-                    os.remove(final_path_initial_guess)
-                shutil.move(current_path, final_path_initial_guess)
-                current_path = final_path_initial_guess
-            except OSError as e:
-                print(f"    ERROR: Rename failed: {e}")
-                print(f"    WARN: Proceeding with current filename: {os.path.basename(current_path)}")
-        if not video_info or resized:
+        # Scaling is done by the final encode itself when the scaled video
+        # would be transcoded again anyway (the scaling step writes H.264/MP4)
+        fuse_scaling = (
+            pre_resize_in_scaling and
+            bool(self._final_transcode_reasons('h264', '.mp4'))
+        )
+        if pre_resize_in_scaling:
+            resized = False
+        else:
+            resized, current_path = self._perform_pre_resize(current_path, video_info)
+        if resized:
+            # The file now holds the re-encoded stream: identify it again
             video_info = self._get_video_info(current_path)
             source_codec = video_info.get('codec_name') if video_info else None
+            detected_mime = self._detect_mime(content_type_pdf, path=current_path)
         is_video = detected_mime.startswith("video/")
         if not is_video:
-             print(f"    INFO: Content '{detected_mime}' not video. Processing complete.")
-             if initial_absolute_temp_path != current_path and os.path.exists(initial_absolute_temp_path):
-                  try: os.remove(initial_absolute_temp_path)
-                  except OSError: pass
+             logger.info(
+                 "    INFO: Content '%s' not video. Processing complete.",
+                 detected_mime
+             )
+             if extracted_path != current_path:
+                  _remove_file(extracted_path)
              return None
 
         # --- 3. Step 1 (Optional): Scaling ---
@@ -483,51 +1147,54 @@ class MediaProcessor:
         codec_for_final_encode = source_codec
         ext_for_final_encode = os.path.splitext(current_path)[1].lower()
         mime_for_final_encode = detected_mime
-        needs_scaling = self.scaling_factor is not None and self.scaling_factor != 100
-        if needs_scaling and is_video and self.enable_transcoding:
-            print("--- Step 1: Scaling (High Quality Intermediate) ---")
+        if fuse_scaling:
+            logger.info("--- Step 1: Scaling (in the final encode) ---")
+        elif needs_scaling and is_video and self.enable_transcoding:
+            logger.info("--- Step 1: Scaling (High Quality Intermediate) ---")
             scaled_intermediate_suffix = ".scale_hq_inter.mp4"
             scaled_intermediate_path = os.path.join(
                 self.media_output_dir, safe_base + scaled_intermediate_suffix
             )
             scale_ok = self._perform_scaling_step(current_path, scaled_intermediate_path)
             if scale_ok:
-                print("    Scaling to intermediate file successful.")
+                logger.info("    Scaling to intermediate file successful.")
                 path_for_final_encode = scaled_intermediate_path
                 codec_for_final_encode = 'h264'
                 ext_for_final_encode = '.mp4'
                 mime_for_final_encode = 'video/mp4'
-                if current_path != initial_absolute_temp_path and os.path.exists(current_path):
-                    try:
-                        os.remove(current_path)
-                        print(f"    Deleted pre-scaled file: {os.path.basename(current_path)}")
-                    except OSError as e:
-                        print(f"    WARN: Failed deleting pre-scaled file: {e}")
+                if _remove_file(current_path):
+                    logger.info(
+                        "    Deleted pre-scaled file: %s",
+                        os.path.basename(current_path)
+                    )
             else:
-                print("    WARN: Scaling step failed. Using previous file for final encode.")
-                if scaled_intermediate_path and os.path.exists(scaled_intermediate_path):
-                    try: os.remove(scaled_intermediate_path)
-                    except OSError: pass
+                logger.warning("    WARN: Scaling step failed. Using previous file for final encode.")
+                _remove_file(scaled_intermediate_path)
                 scaled_intermediate_path = None
+                if pre_resize_in_scaling:
+                    # The pre-resize was left to the scaling step: run it now
+                    resized, current_path = self._perform_pre_resize(
+                        current_path, video_info
+                    )
+                    if resized:
+                        video_info = self._get_video_info(current_path)
+                        codec_for_final_encode = (
+                            video_info.get('codec_name') if video_info else None
+                        )
+                        mime_for_final_encode = self._detect_mime(
+                            content_type_pdf, path=current_path
+                        )
 
         # --- 4. Step 2: Final Transcoding Logic (REVISED) ---
-        print("--- Step 2: Final Transcoding Check ---")
-        final_transcode_needed, reasons = False, []
-        # ... (logic to determine final_transcode_needed and reasons as before) ...
-        is_preferred_format = False
-        preferred_codecs = self.PREFERRED_FORMATS.get(ext_for_final_encode)
-        if preferred_codecs and codec_for_final_encode in preferred_codecs:
-            is_preferred_format = True
-        if not is_preferred_format:
-             final_transcode_needed = True
-             reasons.append("Format not preferred")
-        if self.user_codec_choice:
-            requested_info = self.config.CODEC_FORMAT_MAP.get(self.user_codec_choice)
-            requested_ext = requested_info.get('ext', '.err').lower() if requested_info else '.err'
-            if (self.user_codec_choice != codec_for_final_encode or
-                    requested_ext != ext_for_final_encode):
-                final_transcode_needed = True
-                reasons.append(f"Explicit change to {self.user_codec_choice}")
+        logger.info("--- Step 2: Final Transcoding Check ---")
+        reasons = self._final_transcode_reasons(
+            codec_for_final_encode, ext_for_final_encode
+        )
+        scale_exprs = None
+        if fuse_scaling:
+            reasons.append("Scaling")
+            scale_exprs = self._scale_dimension_exprs()
+        final_transcode_needed = bool(reasons)
 
         # --- Variables for tracking results ---
         final_output_path = os.path.join(
@@ -541,19 +1208,23 @@ class MediaProcessor:
         final_encode_success = False # Overall success flag
 
         if final_transcode_needed and self.enable_transcoding:
-            print(
-                f"    Decision: Final transcode required. Reasons: "
-                f"[{', '.join(sorted(list(set(reasons))))}]"
+            logger.info(
+                "    Decision: Final transcode required. Reasons: [%s]",
+                ', '.join(sorted(list(set(reasons))))
             )
 
             # Check VAAPI capabilities based on CURRENT input and TARGET output
             decode_vaapi_possible = (
-                self.use_vaapi and codec_for_final_encode and
+                self.use_vaapi and not self._vaapi_degraded and
+                codec_for_final_encode and
                 codec_for_final_encode in self.VAAPI_DECODABLE_CODECS
             )
             encode_vaapi_possible = (
-                self.use_vaapi and
-                self.target_codec in self.config.FFMPEG_CODEC_OPTIONS_VAAPI
+                self.use_vaapi and not self._vaapi_degraded and
+                self.target_codec in self.config.FFMPEG_CODEC_OPTIONS_VAAPI and
+                self._has_ffmpeg_encoder(
+                    self.config.FFMPEG_CODEC_OPTIONS_VAAPI[self.target_codec]
+                )
             )
 
             # --- Revised Transcoding Strategy ---
@@ -561,30 +1232,48 @@ class MediaProcessor:
             source_codec_for_next_step = codec_for_final_encode
             attempt_decode_vaapi_next_step = decode_vaapi_possible
 
+            # Phase 0: Is the video stream already what the encode would
+            # produce? Then only the container (and audio) needs converting
+            if (scale_exprs is None and video_info and
+                    path_for_final_encode == current_path and
+                    codec_for_final_encode == self.target_codec and
+                    video_info.get('pix_fmt') in self.STREAM_COPY_PIX_FMTS):
+                logger.info(
+                    "    Attempt 0: Stream copy (video already %s)...",
+                    self.target_codec
+                )
+                final_encode_success = self._perform_stream_copy_step(
+                    path_for_final_encode, final_output_path, self.target_codec,
+                    source_audio_codec
+                )
+
             # Phase 1: Can we encode the target with VAAPI?
-            if encode_vaapi_possible:
+            if encode_vaapi_possible and not final_encode_success:
                 # Phase 1a: Is direct VAAPI pipeline possible? (Source decodable)
                 if decode_vaapi_possible:
-                    print("    Attempt 1: Direct VAAPI Pipeline...")
+                    logger.info("    Attempt 1: Direct VAAPI Pipeline...")
                     success_direct_vaapi = self._perform_final_encode_step(
                         input_path=input_for_next_step,
                         final_output_path=final_output_path,
                         target_codec=self.target_codec,
                         source_codec_name=source_codec_for_next_step,
                         attempt_vaapi_decode=True,
-                        use_vaapi_for_encode_attempt=True
+                        use_vaapi_for_encode_attempt=True,
+                        scale_exprs=scale_exprs,
+                        source_audio_codec=source_audio_codec
                     )
                     if success_direct_vaapi:
                         final_encode_success = True
                     else:
-                        print("    WARN: Direct VAAPI pipeline failed.")
+                        logger.warning("    WARN: Direct VAAPI pipeline failed.")
                         # Continue to check if intermediate step is needed
 
                 # Phase 1b: If direct VAAPI failed OR wasn't possible, try intermediate H.264
-                if not final_encode_success:
+                # (not after a driver error: VAAPI would fail again)
+                if not final_encode_success and not self._vaapi_degraded:
                     # Create intermediate H.264 if source wasn't decodable or direct VAAPI failed
                     if not decode_vaapi_possible:
-                         print("    INFO: Source codec not VAAPI decodable, attempting intermediate H.264.")
+                         logger.info("    INFO: Source codec not VAAPI decodable, attempting intermediate H.264.")
                     #else: # Means direct VAAPI failed, also try intermediate
                     #     print("    INFO: Direct VAAPI failed, attempting intermediate H.264.")
 
@@ -594,7 +1283,8 @@ class MediaProcessor:
                     )
                     intermediate_ok = self._perform_intermediate_h264_encode(
                         input_path=path_for_final_encode, # Start from original/scaled input
-                        intermediate_h264_output_path=intermediate_h264_file
+                        intermediate_h264_output_path=intermediate_h264_file,
+                        source_codec_name=codec_for_final_encode
                     )
 
                     if intermediate_ok:
@@ -604,22 +1294,24 @@ class MediaProcessor:
                         attempt_decode_vaapi_next_step = True # H.264 is decodable
 
                         # Phase 1c: Try VAAPI again, now from H.264 intermediate
-                        print("    Attempt 2: VAAPI Pipeline from Intermediate H.264...")
+                        logger.info("    Attempt 2: VAAPI Pipeline from Intermediate H.264...")
                         success_vaapi_from_h264 = self._perform_final_encode_step(
                             input_path=input_for_next_step,
                             final_output_path=final_output_path,
                             target_codec=self.target_codec,
                             source_codec_name=source_codec_for_next_step,
                             attempt_vaapi_decode=attempt_decode_vaapi_next_step,
-                            use_vaapi_for_encode_attempt=True # Still target VAAPI encode
+                            use_vaapi_for_encode_attempt=True, # Still target VAAPI encode
+                            scale_exprs=scale_exprs,
+                            source_audio_codec=source_audio_codec
                         )
                         if success_vaapi_from_h264:
                             final_encode_success = True
                         else:
-                             print("    WARN: VAAPI pipeline from H.264 intermediate failed.")
+                             logger.warning("    WARN: VAAPI pipeline from H.264 intermediate failed.")
                              # Proceed to CPU fallback using the intermediate file
                     else:
-                         print("    WARN: Intermediate H.264 step failed. Will proceed to CPU fallback from original source.")
+                         logger.warning("    WARN: Intermediate H.264 step failed. Will proceed to CPU fallback from original source.")
                          # Keep input_for_next_step as the original/scaled path
                          input_for_next_step = path_for_final_encode
                          source_codec_for_next_step = codec_for_final_encode
@@ -631,10 +1323,12 @@ class MediaProcessor:
                  cpu_input_path = intermediate_h264_file if intermediate_h264_file and os.path.exists(intermediate_h264_file) else path_for_final_encode
                  cpu_source_codec = 'h264' if cpu_input_path == intermediate_h264_file else codec_for_final_encode
                  cpu_attempt_decode = True if cpu_source_codec == 'h264' else decode_vaapi_possible # Can still try VAAPI decode for H.264
+                 if self._vaapi_degraded:
+                     cpu_attempt_decode = False # VAAPI decode is broken too
 
-                 print(
-                     f"    Attempt 3: CPU Fallback Encode from "
-                     f"'{os.path.basename(cpu_input_path)}'..."
+                 logger.info(
+                     "    Attempt 3: CPU Fallback Encode from '%s'...",
+                     os.path.basename(cpu_input_path)
                  )
                  success_cpu = self._perform_final_encode_step(
                      input_path=cpu_input_path,
@@ -642,91 +1336,99 @@ class MediaProcessor:
                      target_codec=self.target_codec,
                      source_codec_name=cpu_source_codec,
                      attempt_vaapi_decode=cpu_attempt_decode, # Allow VAAPI decode if possible
-                     use_vaapi_for_encode_attempt=False # Force CPU encode
+                     use_vaapi_for_encode_attempt=False, # Force CPU encode
+                     scale_exprs=scale_exprs,
+                     source_audio_codec=source_audio_codec
                  )
                  if success_cpu:
                      final_encode_success = True
                  else:
-                     print("    ERROR: Final CPU fallback encode failed.")
+                     logger.error("    ERROR: Final CPU fallback encode failed.")
 
             # --- Update Results Based on Overall Success ---
             if final_encode_success:
-                print(f"    Final transcode OK. Using: {final_output_filename}")
+                logger.info("    Final transcode OK. Using: %s", final_output_filename)
                 resulting_path = final_output_path
                 resulting_filename = final_output_filename
                 resulting_mime = self.target_mime_type
             else:
                 # All attempts failed, keep the input file from before this stage
-                print(
-                    f"    WARN: All transcode attempts FAILED. Using input file "
-                    f"'{os.path.basename(path_for_final_encode)}' as is."
-                )
                 resulting_path = path_for_final_encode
                 resulting_filename = os.path.basename(resulting_path)
+                logger.warning(
+                    "    WARN: All transcode attempts FAILED. Using input file '%s' "
+                    "as is.",
+                    resulting_filename
+                )
                 resulting_mime = mime_for_final_encode
                 # Try to rename to target filename if extension differs
                 if resulting_path != final_output_path:
                     try:
-                        print(
-                            f"    Attempting to rename '{resulting_filename}' to "
-                            f"target name '{final_output_filename}' after failed transcode."
+                        logger.info(
+                            "    Attempting to rename '%s' to target name '%s' after "
+                            "failed transcode.",
+                            resulting_filename, final_output_filename
                         )
-                        if os.path.exists(final_output_path):
-                            os.remove(final_output_path)
-                        shutil.move(resulting_path, final_output_path)
+                        # Same directory: atomic rename, overwriting
+                        os.replace(resulting_path, final_output_path)
                         resulting_path = final_output_path
-                        resulting_filename = os.path.basename(resulting_path)
+                        resulting_filename = final_output_filename
                     except OSError as e:
-                        print(f"    ERROR: Renaming failed input file: {e}")
-                        resulting_filename = os.path.basename(resulting_path)
+                        logger.error("    ERROR: Renaming failed input file: %s", e)
 
         elif is_video: # Transcode not needed
-            print("    Decision: Final transcode not required or skipped.")
+            logger.info("    Decision: Final transcode not required or skipped.")
             resulting_path = path_for_final_encode
             resulting_filename = os.path.basename(resulting_path)
             resulting_mime = mime_for_final_encode
             if resulting_path != final_output_path:
                  try:
-                    print(f"    Renaming '{resulting_filename}' to final target name '{final_output_filename}' (no transcode).")
-                    if os.path.exists(final_output_path): os.remove(final_output_path)
-                    shutil.move(resulting_path, final_output_path)
+                    logger.info(
+                        "    Renaming '%s' to final target name '%s' (no transcode).",
+                        resulting_filename, final_output_filename
+                    )
+                    os.replace(resulting_path, final_output_path)
                     resulting_path = final_output_path
-                    resulting_filename = os.path.basename(resulting_path)
+                    resulting_filename = final_output_filename
                  except OSError as e:
-                    print(f"    ERROR: Renaming to final name failed: {e}")
-                    resulting_filename = os.path.basename(resulting_path)
+                    logger.error("    ERROR: Renaming to final name failed: %s", e)
 
 
         # --- 5. Cleanup and Return ---
-        # ... (Cleanup logic for intermediate_h264_file, initial_absolute_temp_path, scaled_intermediate_path as before) ...
-        if intermediate_h264_file and os.path.exists(intermediate_h264_file):
-             try:
-                 os.remove(intermediate_h264_file)
-                 print(f"    Cleaned up intermediate H.264 file: {os.path.basename(intermediate_h264_file)}")
-             except OSError as e:
-                 print(f"    WARN: Failed cleanup of intermediate H.264 file: {e}")
-        if (initial_absolute_temp_path != resulting_path and
-                os.path.exists(initial_absolute_temp_path)):
-            try: os.remove(initial_absolute_temp_path)
-            except OSError: pass
+        # ... (Cleanup logic for intermediate_h264_file, extracted_path, scaled_intermediate_path as before) ...
+        if intermediate_h264_file and _remove_file(intermediate_h264_file):
+            logger.info(
+                "    Cleaned up intermediate H.264 file: %s",
+                os.path.basename(intermediate_h264_file)
+            )
+        if extracted_path != resulting_path:
+            _remove_file(extracted_path)
         if (scaled_intermediate_path and
                 scaled_intermediate_path != resulting_path and
-                os.path.exists(scaled_intermediate_path)):
-            try:
-                os.remove(scaled_intermediate_path)
-                print("    Cleaned up unused intermediate scaled file.")
-            except OSError as e:
-                print(f"    WARN: Failed final cleanup of intermediate scaled file: {e}")
+                _remove_file(scaled_intermediate_path)):
+            logger.info("    Cleaned up unused intermediate scaled file.")
 
         if not os.path.exists(resulting_path):
-             print(f"    CRITICAL ERROR: Final file missing after processing: {resulting_path}")
+             logger.error(
+                 "    CRITICAL ERROR: Final file missing after processing: %s",
+                 resulting_path
+             )
              return None
 
         relative_path = os.path.join(
             self.config.MEDIA_OUTPUT_DIR_NAME, resulting_filename
         ).replace("\\", "/")
 
-        print(f"--- Finished Annotation. Final relative path: {relative_path} ---")
+        # A failed transcode is retried by the next run instead of reused
+        if not (final_transcode_needed and self.enable_transcoding and
+                not final_encode_success):
+            self._store_cached_result(
+                safe_base, cache_key, resulting_path, resulting_mime
+            )
+        logger.info(
+            "--- Finished Annotation. Final relative path: %s ---",
+            relative_path
+        )
         return {
             "pageIndex": page_num, "annotIndex": annot_index,
             "outputPath": relative_path, "absolutePath": resulting_path,
@@ -734,87 +1436,191 @@ class MediaProcessor:
         }
 
 
+    def _final_transcode_reasons(self, codec_name, extension):
+        """
+        Lists why a video with this codec and extension must be transcoded
+        to the target format (empty if it can be used as is).
+        """
+        reasons = []
+        preferred_codecs = self.PREFERRED_FORMATS.get(extension)
+        if not (preferred_codecs and codec_name in preferred_codecs):
+            reasons.append("Format not preferred")
+        if self.user_codec_choice:
+            requested_info = self.config.CODEC_FORMAT_MAP.get(self.user_codec_choice)
+            requested_ext = requested_info.get('ext', '.err').lower() if requested_info else '.err'
+            if (self.user_codec_choice != codec_name or
+                    requested_ext != extension):
+                reasons.append(f"Explicit change to {self.user_codec_choice}")
+        return reasons
+
+    def _scale_dimension_exprs(self):
+        """
+        Returns the FFmpeg (width, height) expressions applying the scaling
+        factor, capped to the pre-resize limits (MAX_PRE_RESIZE_WIDTH/HEIGHT)
+        with the aspect ratio kept, rounded down to even sizes.
+        """
+        factor = f"{self.scaling_factor / 100.0}"
+        max_w = self.config.MAX_PRE_RESIZE_WIDTH
+        max_h = self.config.MAX_PRE_RESIZE_HEIGHT
+        if max_w and max_h:
+            # Same limits as _perform_pre_resize(), in the same scale
+            factor = f"min({factor},min({max_w}/iw,{max_h}/ih))"
+        return (f"trunc(iw*{factor}/2)*2", f"trunc(ih*{factor}/2)*2")
+
     def _perform_scaling_step(self, input_path, intermediate_output_path):
         """
         Performs CPU scaling to a temporary intermediate H.264/MP4 file
-        using high quality settings to preserve detail.
+        using high quality settings to preserve detail. The result is also
+        kept within the pre-resize limits (MAX_PRE_RESIZE_WIDTH/HEIGHT), so
+        scaled videos need no separate pre-resize.
         """
         if not self.ffmpeg_path or self.scaling_factor is None:
             return False
 
-        print(f"    Scaling '{os.path.basename(input_path)}' to HQ intermediate MP4...")
-        scale_ratio = self.scaling_factor / 100.0
-        scale_filter = (
-            f"scale=w='trunc(iw*{scale_ratio}/2)*2':"
-            f"h='trunc(ih*{scale_ratio}/2)*2':flags=lanczos"
+        logger.info(
+            "    Scaling '%s' to HQ intermediate MP4...",
+            os.path.basename(input_path)
         )
+        width_expr, height_expr = self._scale_dimension_exprs()
+        scale_filter = f"scale=w='{width_expr}':h='{height_expr}':flags=lanczos"
 
         scale_cmd = [
             self.ffmpeg_path, '-y',
             '-i', input_path,
             '-vf', scale_filter,
-            '-c:v', 'libx264',
-            '-preset', 'fast',
-            '-crf', '18',
-            '-c:a', 'copy',
-            '-movflags', '+faststart',
-            intermediate_output_path
         ]
+        scale_cmd.extend(self.config.FFMPEG_SCALE_OPTIONS)
+        scale_cmd.extend(self.ffmpeg_thread_options)
+        scale_cmd.append(intermediate_output_path)
 
-        print(f"      CMD SCALE STEP (HQ): {' '.join(scale_cmd)}")
+        logger.info("      CMD SCALE STEP (HQ): %s", _CommandLine(scale_cmd))
         try:
-            result = subprocess.run(
-                scale_cmd, capture_output=True, text=True, check=False,
-                encoding='utf-8', errors='replace'
-            )
-            if (result.returncode == 0 and os.path.exists(intermediate_output_path)
-                    and os.path.getsize(intermediate_output_path) > 0):
-                print("      Scaling step successful.")
+            result = self._run_ffmpeg(scale_cmd)
+            if result.returncode == 0 and _exists_nonempty(intermediate_output_path):
+                logger.info("      Scaling step successful.")
                 return True
             else:
-                print(f"    ERROR: Scaling step failed! (code: {result.returncode})")
+                logger.error(
+                    "    ERROR: Scaling step failed! (code: %s)",
+                    result.returncode
+                )
                 stderr_head = result.stderr[:500]
                 stderr_tail = result.stderr[-500:]
-                print(f"      Stderr (beginning): {stderr_head}...")
-                print(f"      Stderr (end): ...{stderr_tail}")
-                if os.path.exists(intermediate_output_path):
-                     try: os.remove(intermediate_output_path)
-                     except OSError: pass
+                logger.info("      Stderr (beginning): %s...", stderr_head)
+                logger.info("      Stderr (end): ...%s", stderr_tail)
+                _remove_file(intermediate_output_path)
                 return False
         except Exception as e:
-            print(f"    ERROR: Exception during scaling step: {e}")
-            traceback.print_exc(limit=1)
-            if os.path.exists(intermediate_output_path):
-                 try: os.remove(intermediate_output_path)
-                 except OSError: pass
+            logger.exception("    ERROR: Exception during scaling step: %s", e)
+            _remove_file(intermediate_output_path)
             return False
 
 
+    def _audio_options(self, output_path, source_audio_codec=None):
+        """
+        Returns the audio options for the output container: a stream copy
+        when the source audio (source_audio_codec, from ffprobe) is already
+        in the codec it would be encoded to.
+        """
+        extension = os.path.splitext(output_path)[1].lower()
+        if extension == '.webm' or (extension == '.mp4' and
+                                    self.config.ALLOW_OPUS_IN_MP4):
+            audio_codec, audio_opts = 'opus', ['-c:a', 'libopus', '-b:a', '96k']
+        else:
+            audio_codec, audio_opts = 'aac', ['-c:a', 'aac', '-b:a', '128k']
+        if source_audio_codec == audio_codec:
+            return ['-c:a', 'copy']
+        return audio_opts
+
+    def _perform_stream_copy_step(self, input_path, final_output_path, target_codec,
+                                  source_audio_codec=None):
+        """
+        Copies the video stream, already in the target codec, into the
+        target container; only the audio is encoded (as by the final encode).
+        Returns True on success, False on failure.
+        """
+        temp_output_path = None
+        try:
+            final_dir, final_filename = os.path.split(final_output_path)
+            final_base, final_ext = os.path.splitext(final_filename)
+            temp_output_path = _reserve_temp_path(
+                final_dir, f"{final_base}_copy_", final_ext
+            )
+
+            copy_cmd = [
+                self.ffmpeg_path, '-y',
+                '-i', input_path,
+                '-map', '0:v:0', '-map', '0:a:0?',
+                '-c:v', 'copy',
+            ]
+            copy_cmd.extend(
+                self._audio_options(final_output_path, source_audio_codec)
+            )
+            copy_cmd.extend(self._container_options.get(target_codec, ()))
+            copy_cmd.append(temp_output_path)
+
+            logger.info("    CMD STREAM COPY: %s", _CommandLine(copy_cmd))
+            result = self._run_ffmpeg(copy_cmd)
+            if result.returncode == 0 and _exists_nonempty(temp_output_path):
+                os.replace(temp_output_path, final_output_path)
+                temp_output_path = None
+                logger.info("    Stream copy successful.")
+                return True
+            logger.warning(
+                "    WARN: Stream copy failed (code: %s). Encoding instead.",
+                result.returncode
+            )
+            return False
+        except Exception as e:
+            logger.warning("    WARN: Exception during stream copy: %s. Encoding instead.", e)
+            return False
+        finally:
+            if temp_output_path:
+                _remove_file(temp_output_path)
+
     def _perform_final_encode_step(self, input_path, final_output_path, target_codec,
                                    source_codec_name, attempt_vaapi_decode,
-                                   use_vaapi_for_encode_attempt):
+                                   use_vaapi_for_encode_attempt, scale_exprs=None,
+                                   source_audio_codec=None):
         """
         Performs the final transcode step (VAAPI attempt or CPU),
         using specific command structures based on working tests.
+        scale_exprs, the (width, height) expressions of
+        _scale_dimension_exprs(), scales the video in the same run;
+        source_audio_codec lets matching audio be copied.
         Returns True on success, False on failure.
         """
         if not self.ffmpeg_path:
-            print("    ERROR: Cannot perform final encode - ffmpeg path not set.")
+            logger.error("    ERROR: Cannot perform final encode - ffmpeg path not set.")
+            return False
+        # Looked up before the temp file is reserved, so a missing entry
+        # leaves nothing behind
+        if use_vaapi_for_encode_attempt:
+            codec_options = self.config.FFMPEG_CODEC_OPTIONS_VAAPI.get(target_codec)
+        else:
+            codec_options = self.config.FFMPEG_CODEC_OPTIONS_CPU.get(target_codec)
+        if not codec_options:
+            logger.error(
+                "    ERROR: Missing %s encode options for '%s' in config.",
+                'VAAPI' if use_vaapi_for_encode_attempt else 'CPU', target_codec
+            )
             return False
 
         temp_output_path = None
         final_encode_ok = False
         try:
-            final_dir = os.path.dirname(final_output_path)
-            final_base, final_ext = os.path.splitext(os.path.basename(final_output_path))
+            final_dir, final_filename = os.path.split(final_output_path)
+            final_base, final_ext = os.path.splitext(final_filename)
             attempt_type = 'vaapi' if use_vaapi_for_encode_attempt else 'cpu'
             temp_prefix = f"{final_base}_final_{attempt_type}_"
-            with tempfile.NamedTemporaryFile(
-                    mode='wb', delete=False, dir=final_dir,
-                    prefix=temp_prefix, suffix=final_ext) as tf:
-                temp_output_path = tf.name
+            temp_output_path = _reserve_temp_path(
+                final_dir, temp_prefix, final_ext
+            )
         except Exception as e:
-            print(f"    ERROR: Creating temporary final encode file failed: {e}")
+            logger.error(
+                "    ERROR: Creating temporary final encode file failed: %s",
+                e
+            )
             return False
 
         ffmpeg_cmd = [self.ffmpeg_path, '-y']
@@ -823,13 +1629,10 @@ class MediaProcessor:
         vaapi_instance_name = "va"
 
         if vaapi_needed_overall:
-            init_device_str = f"vaapi={vaapi_instance_name}"
-            if self.config.VAAPI_DEVICE_PATH:
-                init_device_str += f":{self.config.VAAPI_DEVICE_PATH}"
-                log_parts.append(f"init_hw({self.config.VAAPI_DEVICE_PATH})")
-            else:
-                log_parts.append("init_hw(default)")
-            ffmpeg_cmd.extend(['-init_hw_device', init_device_str])
+            ffmpeg_cmd.extend(self._vaapi_init_options)
+            log_parts.append(
+                f"init_hw({self.config.VAAPI_DEVICE_PATH or 'default'})"
+            )
             if use_vaapi_for_encode_attempt or attempt_vaapi_decode: # Filter device needed for VAAPI filters OR decode
                  ffmpeg_cmd.extend(['-filter_hw_device', vaapi_instance_name])
                  log_parts.append("filter_hw_dev")
@@ -853,20 +1656,37 @@ class MediaProcessor:
 
         vf_parts = []
         extra_output_opts = []
+        cpu_scale_filter = None
+        if scale_exprs:
+            cpu_scale_filter = (
+                f"scale=w='{scale_exprs[0]}':h='{scale_exprs[1]}':flags=lanczos"
+            )
         if use_vaapi_for_encode_attempt:
             if not hw_decode_active:
                 # This might happen if the intermediate step failed, but we still try VAAPI encode
-                print("    WARN: Attempting VAAPI encode filter chain without active VAAPI decode input. May fail.")
-                # Let FFmpeg try, it might handle internal conversion or fail predictably
-                vf_parts.append("format=pix_fmts=nv12") # Ensure format for encoder anyway? Risky.
-                log_parts.append("vf(format=nv12_for_vaapi)")
-                # Or maybe just skip filters? Let's skip filters if decode failed.
-                # vf_parts = [] # Safer?
+                logger.warning("    WARN: Attempting VAAPI encode filter chain without active VAAPI decode input. May fail.")
+                if cpu_scale_filter:
+                    vf_parts.append(cpu_scale_filter)
+                    log_parts.append("vf(scale)")
+                # Software frames: converted to NV12, then uploaded to VA
+                # surfaces (on the -filter_hw_device) for the encoder
+                vf_parts.append("format=pix_fmts=nv12")
+                vf_parts.append("hwupload")
+                log_parts.append("vf(format=nv12,hwupload)")
             else:
-                # Normal VAAPI encode path from VAAPI decode
-                vf_parts.append("hwupload") # May be redundant, but safe
-                vf_parts.append("scale_vaapi=w=iw:h=ih:format=nv12")
-                log_parts.append("vf(hwupload,scale_vaapi(format=nv12))")
+                # Normal VAAPI encode path from VAAPI decode: the frames are
+                # already VA surfaces (no hwupload), scale_vaapi only
+                # converts them to NV12 for the encoder (e.g. from P010)
+                if scale_exprs:
+                    # Scaled on the GPU, no round trip through system memory
+                    vf_parts.append(
+                        f"scale_vaapi=w='{scale_exprs[0]}':h='{scale_exprs[1]}'"
+                        f":format=nv12"
+                    )
+                    log_parts.append("vf(scale_vaapi(scale,format=nv12))")
+                else:
+                    vf_parts.append("scale_vaapi=w=iw:h=ih:format=nv12")
+                    log_parts.append("vf(scale_vaapi(format=nv12))")
         else: # CPU Encode path
             if hw_decode_active:
                 vf_parts.append("hwdownload")
@@ -875,80 +1695,93 @@ class MediaProcessor:
             elif target_codec == 'av1':
                 vf_parts.append("format=pix_fmts=yuv420p")
                 log_parts.append("vf(format=yuv420p)")
+            if cpu_scale_filter:
+                vf_parts.append(cpu_scale_filter)
+                log_parts.append("vf(scale)")
 
         if vf_parts:
             ffmpeg_cmd.extend(['-vf', ",".join(vf_parts)])
 
-        codec_options = None
-        encoder_log = ""
         if use_vaapi_for_encode_attempt:
-            codec_options = self.config.FFMPEG_CODEC_OPTIONS_VAAPI.get(target_codec)
-            if codec_options:
-                encoder_log = f"Encode({target_codec}_vaapi)"
-                log_parts.append("VAAPI_Encode")
-            else:
-                raise ValueError(f"Missing VAAPI config for {target_codec}")
+            encoder_log = f"Encode({target_codec}_vaapi)"
+            log_parts.append("VAAPI_Encode")
         else:
-            codec_options = self.config.FFMPEG_CODEC_OPTIONS_CPU.get(target_codec)
-            if codec_options:
-                encoder_log = f"Encode({target_codec}_cpu)"
-                if hw_decode_active: log_parts.append("(VAAPI Decode->CPU Encode)")
-            else:
-                raise ValueError(f"Missing CPU config for {target_codec}")
+            encoder_log = f"Encode({target_codec}_cpu)"
+            if hw_decode_active: log_parts.append("(VAAPI Decode->CPU Encode)")
 
         ffmpeg_cmd.extend(codec_options)
+        low_power = use_vaapi_for_encode_attempt and self._use_vaapi_low_power()
+        if low_power:
+            ffmpeg_cmd.extend(['-low_power', '1'])
+            encoder_log += "(low_power)"
         log_parts.append(encoder_log)
 
-        audio_opts = []
-        target_ext_lower = os.path.splitext(final_output_path)[1].lower()
-        if target_ext_lower == '.webm':
-            audio_opts = ['-c:a', 'libopus', '-b:a', '96k']
-            log_parts.append("Audio(Opus)")
+        audio_opts = self._audio_options(final_output_path, source_audio_codec)
+        if 'copy' in audio_opts:
+            log_parts.append("Audio(copy)")
         else:
-            audio_opts = ['-c:a', 'aac', '-b:a', '128k']
-            log_parts.append("Audio(AAC)")
+            log_parts.append("Audio(Opus)" if 'libopus' in audio_opts else "Audio(AAC)")
         ffmpeg_cmd.extend(audio_opts)
 
-        ffmpeg_cmd.extend(self.config.FFMPEG_COMMON_OPTIONS)
-        target_format_info = self.config.CODEC_FORMAT_MAP.get(target_codec)
-        container_opts = target_format_info.get('container_opts', []) if target_format_info else []
-        if container_opts: ffmpeg_cmd.extend(container_opts)
+        ffmpeg_cmd.extend(self.ffmpeg_common_options)
+        ffmpeg_cmd.extend(self._container_options.get(target_codec, ()))
         if extra_output_opts: ffmpeg_cmd.extend(extra_output_opts)
         ffmpeg_cmd.append(temp_output_path)
 
-        print(f"    CMD FINAL ENCODE ({', '.join(log_parts)}): {' '.join(ffmpeg_cmd)}")
+        logger.info(
+            "    CMD FINAL ENCODE (%s): %s",
+            ', '.join(log_parts), _CommandLine(ffmpeg_cmd)
+        )
 
+        # Only one VAAPI pipeline at a time on the (single) render device
+        vaapi_guard = (self._vaapi_lock if vaapi_needed_overall
+                       else contextlib.nullcontext())
+        retry_without_low_power = False
         try:
-            result = subprocess.run(
-                ffmpeg_cmd, capture_output=True, text=True, check=False,
-                encoding='utf-8', errors='replace'
-            )
-            if (result.returncode == 0 and os.path.exists(temp_output_path)
-                    and os.path.getsize(temp_output_path) > 0):
-                print("    Final encode attempt successful.")
-                shutil.move(temp_output_path, final_output_path)
-                print(f"    Moved result to: '{os.path.basename(final_output_path)}'")
+            with vaapi_guard:
+                result = self._run_ffmpeg(ffmpeg_cmd)
+            if result.returncode == 0 and _exists_nonempty(temp_output_path):
+                logger.info("    Final encode attempt successful.")
+                os.replace(temp_output_path, final_output_path)
+                logger.info("    Moved result to: '%s'", final_filename)
                 final_encode_ok = True
                 temp_output_path = None
             else:
-                print(f"    ERROR: Final encode FFmpeg failed! (code: {result.returncode})")
+                logger.error(
+                    "    ERROR: Final encode FFmpeg failed! (code: %s)",
+                    result.returncode
+                )
                 if os.path.exists(temp_output_path) and os.path.getsize(temp_output_path) == 0:
-                    print("      Reason: Output file is 0 bytes.")
+                    logger.info("      Reason: Output file is 0 bytes.")
                 stderr_head = result.stderr[:1000]; stderr_tail = result.stderr[-1000:]
-                print(f"      Stderr (beginning): {stderr_head}...")
-                print(f"      Stderr (end): ...{stderr_tail}")
+                logger.info("      Stderr (beginning): %s...", stderr_head)
+                logger.info("      Stderr (end): ...%s", stderr_tail)
+                if low_power and self._note_low_power_rejection(result.stderr):
+                    retry_without_low_power = True
+                elif vaapi_needed_overall:
+                    self._note_vaapi_driver_error(result.stderr)
                 final_encode_ok = False
         except FileNotFoundError:
-            print(f"    ERROR: ffmpeg not found at '{self.ffmpeg_path}'.")
+            logger.error("    ERROR: ffmpeg not found at '%s'.", self.ffmpeg_path)
             final_encode_ok = False
         except Exception as e:
-            print(f"    ERROR: Unexpected error during final encode ffmpeg: {e}")
-            traceback.print_exc(limit=1)
+            logger.exception(
+                "    ERROR: Unexpected error during final encode ffmpeg: %s",
+                e
+            )
             final_encode_ok = False
         finally:
-            if temp_output_path and os.path.exists(temp_output_path):
-                print(f"    Cleaning failed/unused final encode temp file: {os.path.basename(temp_output_path)}")
-                try: os.remove(temp_output_path)
-                except OSError as delete_error: print(f"      WARN: Failed cleaning temp file: {delete_error}")
+            if temp_output_path and _remove_file(temp_output_path):
+                logger.info(
+                    "    Cleaned failed/unused final encode temp file: %s",
+                    os.path.basename(temp_output_path)
+                )
 
+        if retry_without_low_power:
+            logger.info("    Retrying the VAAPI encode without low-power mode...")
+            return self._perform_final_encode_step(
+                input_path, final_output_path, target_codec, source_codec_name,
+                attempt_vaapi_decode, use_vaapi_for_encode_attempt, scale_exprs,
+                source_audio_codec
+            )
         return final_encode_ok
@@ -4,13 +4,105 @@ pdf_processor.py
 Handles PDF analysis (dimensions, media annotations).
 """
 
-import traceback
+import logging
 import os  # For example usage
 
 import pikepdf
 
 import config  # For fallback dimensions
 
+logger = logging.getLogger(__name__)
+
+# Annotation subtypes that can carry media (built once, not per annotation)
+_MEDIA_ANNOTATION_SUBTYPES = (
+    pikepdf.Name.Screen,
+    pikepdf.Name.Movie,
+    pikepdf.Name.RichMedia,
+)
+# Names compared in the annotation walk: each pikepdf.Name.X access
+# builds a new Name object
+_NAME_RENDITION = pikepdf.Name.Rendition
+_NAME_MOVIE = pikepdf.Name.Movie
+_NAME_MEDIA_RENDITION = pikepdf.Name.MR
+_NAME_MEDIA_CLIP_DATA = pikepdf.Name.MCD
+_NAME_FILESPEC = pikepdf.Name.Filespec
+# Content type hint of a media stream whose PDF entries give none
+_DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+# Readers accept the %PDF- header anywhere in the first KiB of the file
+_PDF_HEADER_SCAN_BYTES = 1024
+
+
+def _has_pdf_header(pdf_path):
+    """
+    Tells whether the file starts like a PDF.
+
+    Returns True when the file cannot be read: pikepdf then reports the
+    error itself.
+    """
+    try:
+        with open(pdf_path, 'rb') as pdf_file:
+            return b'%PDF-' in pdf_file.read(_PDF_HEADER_SCAN_BYTES)
+    except OSError:
+        return True
+
+
+def _embedded_file_stream(data_spec):
+    """Returns the stream embedded by a file specification, or None."""
+    if not (data_spec and data_spec.get('/Type') == _NAME_FILESPEC):
+        return None
+    embedded_file = data_spec.get('/EF')
+    file_stream_ref = embedded_file.get('/F') if embedded_file else None
+    if file_stream_ref and isinstance(file_stream_ref, pikepdf.Stream):
+        return file_stream_ref
+    return None
+
+
+def _stream_from_rendition(rendition):
+    """
+    Finds the media stream of a rendition dictionary.
+
+    Returns:
+        tuple: (stream or None, content type hint).
+    """
+    content_type_pdf = _DEFAULT_CONTENT_TYPE
+    # Check for Media Rendition type
+    if rendition.get('/S') != _NAME_MEDIA_RENDITION:
+        return None, content_type_pdf
+    media_clip = rendition.get('/C')
+    # Check for Media Clip Data
+    if not (media_clip and media_clip.get('/S') == _NAME_MEDIA_CLIP_DATA):
+        return None, content_type_pdf
+    if media_clip.get('/CT'):
+        content_type_pdf = str(media_clip.CT)
+    return _embedded_file_stream(media_clip.get('/D')), content_type_pdf
+
+
+def _stream_from_movie(movie_dict, page_num, annot_index):
+    """
+    Finds the media stream of a movie dictionary.
+
+    Returns:
+        tuple: (stream or None, content type hint).
+    """
+    content_type_pdf = _DEFAULT_CONTENT_TYPE
+    data_spec = movie_dict.get('/F')
+    stream_ref = _embedded_file_stream(data_spec)
+    if stream_ref:
+        # Try to get description as content type hint
+        if data_spec.get('/Desc'):
+            content_type_pdf = str(data_spec.Desc)
+    # Check if it references an external file (unsupported)
+    elif (data_spec and data_spec.get('/Type') == _NAME_FILESPEC and
+          data_spec.get('/F') and
+          isinstance(data_spec.get('/F'), pikepdf.String)):
+        logger.warning(
+            "    WARN (Page %s, Annot %s): Movie references external path "
+            "('%s'), not supported for extraction.",
+            page_num+1, annot_index, data_spec.F
+        )
+    return stream_ref, content_type_pdf
+
 
 class PdfAnalyzer:
     """Analyzes a PDF file to extract page dimensions and media annotations."""
@@ -25,20 +117,30 @@ class PdfAnalyzer:
         self.pdf_path = pdf_path
         self.pdf = None
         self.num_pages = 0
+        # Page objects of the open PDF, fetched once (see _open_pdf)
+        self._pages = ()
         self._open_pdf()
 
     def _open_pdf(self):
         """Opens the PDF file."""
+        # A file that is not a PDF fails here, not after pikepdf has
+        # scanned all of it looking for a cross-reference table
+        if not _has_pdf_header(self.pdf_path):
+            message = f"'{self.pdf_path}' is not a PDF file (no %PDF- header)."
+            logger.error("ERROR: %s", message)
+            raise ValueError(message)
         try:
             self.pdf = pikepdf.Pdf.open(self.pdf_path)
-            self.num_pages = len(self.pdf.pages)
-            print(f"PDF '{self.pdf_path}' opened, {self.num_pages} pages.")
+            # Indexing pdf.pages builds a new page object every time: the
+            # per-page methods read them from this snapshot instead
+            self._pages = tuple(self.pdf.pages)
+            self.num_pages = len(self._pages)
+            logger.info("PDF '%s' opened, %s pages.", self.pdf_path, self.num_pages)
         except pikepdf.PdfError as e_pike:
-            print(f"Pikepdf ERROR opening '{self.pdf_path}': {e_pike}")
+            logger.error("Pikepdf ERROR opening '%s': %s", self.pdf_path, e_pike)
             raise  # Re-raise to indicate failure
         except Exception as e:
-            print(f"Unknown ERROR opening '{self.pdf_path}': {e}")
-            traceback.print_exc()
+            logger.exception("Unknown ERROR opening '%s': %s", self.pdf_path, e)
             raise  # Re-raise to indicate failure
 
     def get_num_pages(self):
@@ -59,7 +161,7 @@ class PdfAnalyzer:
         if not self.pdf or not (0 <= page_num < self.num_pages):
             return None
 
-        page = self.pdf.pages[page_num]
+        page = self._pages[page_num]
         page_dimensions = None
         try:
             # Attempt to retrieve CropBox, otherwise MediaBox
@@ -75,7 +177,7 @@ class PdfAnalyzer:
 
                         # Consider page rotation
                         rotation = int(page.get('/Rotate', 0))
-                        if rotation in [90, 270]:
+                        if rotation in (90, 270):
                             # Swap width and height for rotated pages
                             page_width_pt, page_height_pt = page_height_pt, page_width_pt
 
@@ -85,25 +187,33 @@ class PdfAnalyzer:
                                 "height_pt": page_height_pt
                             }
                         else:
-                            print(
-                                f"WARN Page {page_num+1}: Calculated dimensions "
-                                f"invalid (<=0) {page_width_pt}x{page_height_pt}pt."
+                            logger.warning(
+                                "WARN Page %s: Calculated dimensions invalid (<=0) "
+                                "%sx%spt.",
+                                page_num+1, page_width_pt, page_height_pt
                             )
                     else:
-                        print(
-                            f"WARN Page {page_num+1}: Invalid Box format (not 4 "
-                            f"coordinates): {page_box_array}"
+                        logger.warning(
+                            "WARN Page %s: Invalid Box format (not 4 coordinates): %s",
+                            page_num+1, page_box_array
                         )
                 except (ValueError, TypeError) as e_coord:
-                    print(
-                        f"WARN Page {page_num+1} dims: Invalid coordinates "
-                        f"in Box {page_box_array} - {e_coord}"
+                    logger.warning(
+                        "WARN Page %s dims: Invalid coordinates in Box %s - %s",
+                        page_num+1, page_box_array, e_coord
                     )
             else:
-                print(f"WARN Page {page_num+1}: Missing /CropBox or /MediaBox.")
+                logger.warning(
+                    "WARN Page %s: Missing /CropBox or /MediaBox.",
+                    page_num+1
+                )
         except Exception as e_page_size:
-            print(f"WARN Page {page_num+1} dims (Read Error): {e_page_size}")
-            traceback.print_exc(limit=1) # Print limited traceback for context
+            logger.warning(
+                "WARN Page %s dims (Read Error): %s",
+                page_num+1, e_page_size
+            )
+            # The traceback is only formatted when debug output is enabled
+            logger.debug("Page %s dims traceback:", page_num+1, exc_info=True)
 
         return page_dimensions
 
@@ -128,21 +238,121 @@ class PdfAnalyzer:
         # If no page provided valid dimensions, use the fallback from config
         if default_dims is None:
             default_dims = config.FALLBACK_PAGE_DIMENSIONS
-            print(
-                f"CRITICAL ERROR: PDF dimensions undetermined. Using default: "
-                f"{default_dims}"
+            logger.error(
+                "CRITICAL ERROR: PDF dimensions undetermined. Using default: %s",
+                default_dims
             )
         else:
-            print(f"INFO: Reference dimensions for fallback: {default_dims}")
+            logger.info("INFO: Reference dimensions for fallback: %s", default_dims)
 
         # Apply the determined default/fallback to pages without dimensions
         for i in range(self.num_pages):
             if all_dims[i] is None:
-                print(f"INFO: Page {i+1} using default/fallback dimensions.")
+                logger.info("INFO: Page %s using default/fallback dimensions.", i+1)
                 all_dims[i] = default_dims
 
         return all_dims
 
+    def pages_with_annotations(self):
+        """
+        Returns the 0-based indices of the pages that have annotations.
+
+        Only these pages can hold media: the others need not be searched.
+        """
+        return frozenset(
+            page_num for page_num, page in enumerate(self._pages)
+            if page.get('/Annots')
+        )
+
+    def _analyze_annotation(self, page_num, annot_index, annot):
+        """
+        Returns the info of a media annotation with an embedded stream.
+
+        Returns None for any other annotation. The pikepdf objects walked
+        to find the stream are locals here, released once it returns.
+        """
+        annot_type = annot.get('/Subtype')
+        # Check for media-related annotation types
+        if annot_type not in _MEDIA_ANNOTATION_SUBTYPES:
+            return None
+        annot_info = {'pageIndex': page_num, 'annotIndex': annot_index}
+        annot_info['subtype'] = str(annot_type).lstrip('/')
+        rect = annot.get('/Rect')
+        if not rect:
+            logger.warning(
+                "    WARN Annot %s (Page %s): Type %s but missing /Rect.",
+                annot_index, page_num+1, annot_type
+            )
+            return None  # Skip useless annotation
+
+        # Validate and store Rect
+        try:
+            coords = [float(c) for c in rect]
+            # Basic validation: 4 coords, non-zero width/height
+            if (len(coords) == 4 and
+                    coords[0] < coords[2] and
+                    coords[1] < coords[3]):
+                annot_info['rect'] = {
+                    "llx": coords[0], "lly": coords[1],
+                    "urx": coords[2], "ury": coords[3]
+                }
+            else:
+                logger.error(
+                    "    ERR Rect (Page %s, Annot %s): Invalid "
+                    "coords %s",
+                    page_num+1, annot_index, rect
+                )
+                return None  # Skip useless annotation
+        except (ValueError, TypeError) as e_rect:
+            logger.error(
+                "    ERR Rect (Page %s, Annot %s): Conversion %s - %s",
+                page_num+1, annot_index, rect, e_rect
+            )
+            return None  # Skip useless annotation
+
+        # Look for Rendition or Movie actions/dictionaries
+        rendition = None
+        movie_dict = None
+        action = annot.get('/A')
+        if action:
+            action_type = action.get('/S')
+            if action_type == _NAME_RENDITION:
+                rendition = action.get('/R')
+            elif action_type == _NAME_MOVIE:
+                movie_dict = action.get('/Movie')
+        # Fallback checks if not in Action dictionary
+        if not rendition:
+            rendition = annot.get('/R')  # Common in Screen annots
+        if not movie_dict:
+            movie_dict = annot.get('/Movie')
+        # Simplification for RichMedia /MA, assuming it contains
+        # a valid reference if other methods fail.
+        # More complex logic could be added here if needed.
+
+        # Search for the associated media stream
+        if rendition:
+            stream_ref, content_type_pdf = _stream_from_rendition(rendition)
+        # Process Movie dictionary if found (and no rendition)
+        elif movie_dict:
+            stream_ref, content_type_pdf = _stream_from_movie(
+                movie_dict, page_num, annot_index
+            )
+        else:
+            stream_ref = None
+
+        # Store info if a stream was successfully found
+        if stream_ref:
+            annot_info['stream_ref'] = stream_ref
+            annot_info['content_type'] = content_type_pdf
+            return annot_info
+        # Log if annotation looks like media but no stream found
+        logger.warning(
+            "    WARN: (Page %s, Annot %s) Type %s found but no "
+            "associated/embedded data stream.",
+            page_num+1, annot_index, annot_type
+        )
+        return None
+
     def find_media_annotations(self, page_num):
         """
         Finds media annotations on a specific page and returns their basic info.
@@ -159,152 +369,37 @@ class PdfAnalyzer:
         if not self.pdf or not (0 <= page_num < self.num_pages):
             return []
 
-        page = self.pdf.pages[page_num]
+        page = self._pages[page_num]
         media_annotations_info = []
 
-        if not page.get('/Annots'):
+        annotations = page.get('/Annots')
+        if not annotations:
             return []  # No annotations on this page
 
         try:
-            for annot_index, annot in enumerate(page.Annots):
-                annot_info = {'pageIndex': page_num, 'annotIndex': annot_index}
+            for annot_index, annot in enumerate(annotations):
                 try:
-                    annot_type = annot.get('/Subtype')
-                    # Check for media-related annotation types
-                    if annot_type in [
-                        pikepdf.Name.Screen,
-                        pikepdf.Name.Movie,
-                        pikepdf.Name.RichMedia
-                    ]:
-                        annot_info['subtype'] = str(annot_type).lstrip('/')
-                        rect = annot.get('/Rect')
-                        if not rect:
-                            print(
-                                f"    WARN Annot {annot_index} "
-                                f"(Page {page_num+1}): Type {annot_type} "
-                                f"but missing /Rect."
-                            )
-                            continue  # Skip useless annotation
-
-                        # Validate and store Rect
-                        try:
-                            coords = [float(c) for c in rect]
-                            # Basic validation: 4 coords, non-zero width/height
-                            if (len(coords) == 4 and
-                                    coords[0] < coords[2] and
-                                    coords[1] < coords[3]):
-                                annot_info['rect'] = {
-                                    "llx": coords[0], "lly": coords[1],
-                                    "urx": coords[2], "ury": coords[3]
-                                }
-                            else:
-                                print(
-                                    f"    ERR Rect (Page {page_num+1}, "
-                                    f"Annot {annot_index}): Invalid "
-                                    f"coords {rect}"
-                                )
-                                continue  # Skip useless annotation
-                        except (ValueError, TypeError) as e_rect:
-                            print(
-                                f"    ERR Rect (Page {page_num+1}, "
-                                f"Annot {annot_index}): Conversion "
-                                f"{rect} - {e_rect}"
-                            )
-                            continue  # Skip useless annotation
-
-                        # Search for the associated media stream
-                        stream_ref = None
-                        # Default content type hint
-                        content_type_pdf = "application/octet-stream"
-                        action = annot.get('/A')
-                        rendition = None
-                        movie_dict = None
-
-                        # Look for Rendition or Movie actions/dictionaries
-                        if action:
-                            if action.get('/S') == pikepdf.Name.Rendition:
-                                rendition = action.get('/R')
-                            elif action.get('/S') == pikepdf.Name.Movie:
-                                movie_dict = action.get('/Movie')
-                        # Fallback checks if not in Action dictionary
-                        if not rendition and annot.get('/R'):
-                            rendition = annot.get('/R')  # Common in Screen annots
-                        if not movie_dict and annot.get('/Movie'):
-                            movie_dict = annot.get('/Movie')
-                        # Simplification for RichMedia /MA, assuming it contains
-                        # a valid reference if other methods fail.
-                        # More complex logic could be added here if needed.
-
-                        # Process Rendition if found
-                        if rendition:
-                            # Check for Media Rendition type
-                            if rendition.get('/S') == pikepdf.Name.MR:
-                                media_clip = rendition.get('/C')
-                                # Check for Media Clip Data
-                                if media_clip and media_clip.get('/S') == pikepdf.Name.MCD:
-                                    if media_clip.get('/CT'):
-                                        content_type_pdf = str(media_clip.CT)
-                                    data_spec = media_clip.get('/D')
-                                    # Check for embedded file specification
-                                    if (data_spec and
-                                            data_spec.get('/Type') == pikepdf.Name.Filespec):
-                                        embedded_file = data_spec.get('/EF')
-                                        file_stream_ref = embedded_file.get('/F') if embedded_file else None
-                                        if (file_stream_ref and
-                                                isinstance(file_stream_ref, pikepdf.Stream)):
-                                            stream_ref = file_stream_ref
-                        # Process Movie dictionary if found (and no rendition stream)
-                        elif movie_dict:
-                            data_spec = movie_dict.get('/F')
-                            if (data_spec and
-                                    data_spec.get('/Type') == pikepdf.Name.Filespec):
-                                embedded_file = data_spec.get('/EF')
-                                file_stream_ref = embedded_file.get('/F') if embedded_file else None
-                                # Check if it's an embedded stream
-                                if (file_stream_ref and
-                                        isinstance(file_stream_ref, pikepdf.Stream)):
-                                    stream_ref = file_stream_ref
-                                    # Try to get description as content type hint
-                                    if data_spec.get('/Desc'):
-                                        content_type_pdf = str(data_spec.Desc)
-                                # Check if it references an external file (unsupported)
-                                elif (data_spec.get('/F') and
-                                      isinstance(data_spec.get('/F'), pikepdf.String)):
-                                    print(
-                                        f"    WARN (Page {page_num+1}, "
-                                        f"Annot {annot_index}): Movie "
-                                        f"references external path "
-                                        f"('{data_spec.F}'), not supported "
-                                        f"for extraction."
-                                    )
-
-                        # Store info if a stream was successfully found
-                        if stream_ref:
-                            annot_info['stream_ref'] = stream_ref
-                            annot_info['content_type'] = content_type_pdf
-                            media_annotations_info.append(annot_info)
-                        else:
-                            # Log if annotation looks like media but no stream found
-                            print(
-                                f"    WARN: (Page {page_num+1}, "
-                                f"Annot {annot_index}) Type {annot_type} found "
-                                f"but no associated/embedded data stream."
-                            )
-
+                    annot_info = self._analyze_annotation(
+                        page_num, annot_index, annot
+                    )
+                    if annot_info:
+                        media_annotations_info.append(annot_info)
                 except Exception as e_annot_item:
                     # Catch errors processing a single annotation
-                    print(
-                        f"  !!! ERR processing annotation {annot_index} "
-                        f"(Page {page_num + 1}): {e_annot_item}"
+                    logger.error(
+                        "  !!! ERR processing annotation %s (Page %s): %s",
+                        annot_index, page_num + 1, e_annot_item
                     )
-                    traceback.print_exc(limit=1)
+                    logger.debug("Annotation %s traceback:", annot_index,
+                                 exc_info=True)
         except Exception as e_page_process:
             # Catch errors processing the annotations array for the page
-            print(
-                f"!!! ERR processing annotations page {page_num + 1}: "
-                f"{e_page_process}"
+            logger.error(
+                "!!! ERR processing annotations page %s: %s",
+                page_num + 1, e_page_process
             )
-            traceback.print_exc(limit=1)
+            logger.debug("Page %s annotations traceback:", page_num + 1,
+                         exc_info=True)
 
         return media_annotations_info
 
@@ -314,9 +409,10 @@ class PdfAnalyzer:
             try:
                 self.pdf.close()
                 self.pdf = None
-                print(f"PDF '{self.pdf_path}' closed.")
+                self._pages = ()
+                logger.info("PDF '%s' closed.", self.pdf_path)
             except Exception as e_close:
-                print(f"WARN: Error during PDF close: {e_close}")
+                logger.warning("WARN: Error during PDF close: %s", e_close)
 
     def __enter__(self):
         """Enter the runtime context related to this object."""
@@ -329,6 +425,7 @@ class PdfAnalyzer:
 
 # Example usage (if executed directly)
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # Use the default PDF specified in config for testing
     test_pdf = config.DEFAULT_PDF_FILE
     if not os.path.exists(test_pdf):
@@ -359,5 +456,4 @@ if __name__ == '__main__':
                                 f"PDF Type: {annot_data.get('content_type')}"
                             )
         except Exception as e_main:
-            print(f"\nError in example usage: {e_main}")
-            traceback.print_exc(limit=2)
+            logger.exception("\nError in example usage: %s", e_main)
@@ -6,23 +6,128 @@ Handles the conversion of PDF pages to SVG files using either PyMuPDF (fitz)
 or the external pdf2svg command-line tool.
 """
 
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
 import os
 import subprocess
-import traceback
-# Local import
-import config
+
+logger = logging.getLogger(__name__)
 
 # Conditional import for PyMuPDF (fitz)
 try:
     import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
+    # The unrelated 'fitz' package of PyPI has the same name
+    PYMUPDF_AVAILABLE = hasattr(fitz, 'open')
 except ImportError:
     PYMUPDF_AVAILABLE = False
     fitz = None  # Define fitz as None to avoid runtime errors if not imported
 except Exception as import_error:
     PYMUPDF_AVAILABLE = False
     fitz = None
-    print(f"ERROR: Unexpected error importing PyMuPDF (fitz): {import_error}")
+    logger.error("ERROR: Unexpected error importing PyMuPDF (fitz): %s", import_error)
+
+
+# Low-level MuPDF bindings of PyMuPDF (1.23+), used to write the SVG of a
+# page straight into its file; older versions go through get_svg_image()
+_MUPDF = getattr(fitz, 'mupdf', None)
+# Cancel event of the current render worker process (see _init_render_worker)
+_worker_cancel_event = None
+if _MUPDF is not None and not hasattr(_MUPDF, 'fz_new_svg_device'):
+    _MUPDF = None
+
+
+def _save_page_svg(page, output_path, text_as_path):
+    """Writes the SVG of a PyMuPDF page to output_path."""
+    if _MUPDF is None:
+        svg_data = page.get_svg_image(text_as_path=text_as_path).encode("utf-8")
+        # Binary mode: the encoded SVG goes to the file in one write,
+        # without the per-file text wrapper and its buffer copies
+        with open(output_path, "wb") as svg_file:
+            svg_file.write(svg_data)
+        return
+    # What get_svg_image() does, except that the SVG device writes into the
+    # file: the page's SVG is never held in a buffer, a str and its encoding
+    text_option = (_MUPDF.FZ_SVG_TEXT_AS_PATH if text_as_path
+                   else _MUPDF.FZ_SVG_TEXT_AS_TEXT)
+    bounds = _MUPDF.fz_bound_page(page.this)
+    svg_output = _MUPDF.FzOutput(output_path, 0)
+    try:
+        device = _MUPDF.fz_new_svg_device(
+            svg_output, bounds.x1 - bounds.x0, bounds.y1 - bounds.y0,
+            text_option, 1
+        )
+        _MUPDF.fz_run_page(page.this, device, _MUPDF.FzMatrix(),
+                           _MUPDF.FzCookie())
+        _MUPDF.fz_close_device(device)
+    finally:
+        svg_output.fz_close_output()
+
+
+def _write_page_svgs(doc, page_indices, svg_output_dir, svg_extension,
+                     text_as_path, cancel_event=None):
+    """
+    Writes the SVG of the given pages of an open PyMuPDF document, stopping
+    before the next page once cancel_event (if any) is set.
+
+    Returns:
+        list: The 0-based indices of the pages whose SVG was written.
+    """
+    written_pages = []
+    for page_index in page_indices:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        page = doc.load_page(page_index)  # 0-based index
+        svg_filename = f"page_{page_index + 1}{svg_extension}"
+        output_path = os.path.join(svg_output_dir, svg_filename)
+        # Written under a temporary name, then renamed: an interrupted run
+        # never leaves a truncated page_N.svg behind
+        partial_path = output_path + ".part"
+
+        try:
+            # text_as_path=True embeds fonts as paths (more robust rendering)
+            # but can increase file size.
+            _save_page_svg(page, partial_path, text_as_path)
+            os.replace(partial_path, output_path)
+            written_pages.append(page_index)
+        except Exception as page_error:
+            logger.error(
+                "ERROR (PyMuPDF): Failed to convert page %s: %s",
+                page_index + 1, page_error
+            )
+            # Attempt to clean up the incomplete output file
+            if os.path.exists(partial_path):
+                try:
+                    os.remove(partial_path)
+                except OSError:
+                    logger.warning(
+                        "  WARN: Could not remove failed SVG file %s",
+                        partial_path
+                    )
+    return written_pages
+
+
+def _file_signature(file_stat):
+    """[size, mtime_ns] of a file, as kept in the SVG cache record."""
+    return [file_stat.st_size, file_stat.st_mtime_ns]
+
+
+def _init_render_worker(cancel_event):
+    """Render worker initializer: keeps the converter's cancel event."""
+    global _worker_cancel_event
+    _worker_cancel_event = cancel_event
+
+
+def _render_pages(pdf_path, page_indices, svg_output_dir, svg_extension,
+                  text_as_path):
+    """Worker process entry point: opens the PDF and renders some pages."""
+    with fitz.open(pdf_path) as doc:
+        return _write_page_svgs(doc, page_indices, svg_output_dir,
+                                svg_extension, text_as_path,
+                                _worker_cancel_event)
 
 
 class SvgConverter:
@@ -31,7 +136,8 @@ class SvgConverter:
     """
 
     def __init__(self, config_obj, svg_output_dir, method='pymupdf',
-                 pdf2svg_path=None):
+                 pdf2svg_path=None, workers=1,
+                 text_as_path=None, cancel_event=None):
         """
         Initializes the SVG converter.
 
@@ -43,6 +149,15 @@ class SvgConverter:
                           Defaults to 'pymupdf'.
             pdf2svg_path (str, optional): The path to the pdf2svg executable.
                                           Required if method is 'pdf2svg'.
+            workers (int): Number of worker processes rendering the pages
+                           with 'pymupdf', each opening the PDF itself.
+                           Defaults to 1 (pages rendered in this process).
+            text_as_path (bool, optional): Whether PyMuPDF draws the text
+                                           as glyph outlines. Defaults to
+                                           config SVG_TEXT_AS_PATH.
+            cancel_event (optional): An event of the 'spawn' multiprocessing
+                                     context; once set, PyMuPDF renders no
+                                     further page (the run was aborted).
 
         Raises:
             ImportError: If 'pymupdf' method is chosen but PyMuPDF (fitz)
@@ -56,6 +171,10 @@ class SvgConverter:
         self.svg_extension = self.config.SVG_OUTPUT_EXTENSION or '.svg'
         self.method = method.lower()
         self.pdf2svg_path = pdf2svg_path
+        self.workers = max(1, workers)
+        self.text_as_path = (self.config.SVG_TEXT_AS_PATH
+                             if text_as_path is None else text_as_path)
+        self.cancel_event = cancel_event
 
         if self.method == 'pymupdf':
             if not PYMUPDF_AVAILABLE:
@@ -64,7 +183,7 @@ class SvgConverter:
                     "installed or could not be imported. "
                     "Please install it (`pip install PyMuPDF`)."
                 )
-            print("INFO: SvgConverter initialized using PyMuPDF (fitz).")
+            logger.info("INFO: SvgConverter initialized using PyMuPDF (fitz).")
         elif self.method == 'pdf2svg':
             if not self.pdf2svg_path or not os.path.isfile(self.pdf2svg_path):
                 raise ValueError(
@@ -72,124 +191,275 @@ class SvgConverter:
                     f"'{self.pdf2svg_path}' is invalid, not provided, "
                     f"or not a file."
                 )
-            print(f"INFO: SvgConverter initialized using pdf2svg "
-                  f"({self.pdf2svg_path}).")
+            logger.info(
+                "INFO: SvgConverter initialized using pdf2svg (%s).",
+                self.pdf2svg_path
+            )
         else:
             raise NotImplementedError(
                 f"Unknown SVG conversion method: '{self.method}'"
             )
 
-    def convert_all(self, pdf_path, num_pages_expected):
+    def convert_all(self, pdf_path, num_pages_expected, force_refresh=False):
         """
         Converts all expected pages of the PDF to SVG using the chosen method.
 
+        With PyMuPDF, the pages a previous run converted from the same,
+        unmodified PDF with the same settings are kept as they are.
+
         Args:
             pdf_path (str): The path to the input PDF file.
             num_pages_expected (int): The number of pages expected to be
                                       converted (usually from PdfAnalyzer).
+            force_refresh (bool): Convert every page again, even those a
+                                  previous run left. Defaults to False.
 
         Returns:
             bool: True if all expected pages were converted successfully,
                   False otherwise.
         """
         if not os.path.exists(pdf_path):
-            print(f"ERROR: Input PDF file not found for SVG conversion: "
-                  f"'{pdf_path}'")
+            logger.error(
+                "ERROR: Input PDF file not found for SVG conversion: '%s'",
+                pdf_path
+            )
             return False
         if num_pages_expected <= 0:
-            print(f"ERROR: Invalid number of expected pages "
-                  f"({num_pages_expected}) for SVG conversion.")
+            logger.error(
+                "ERROR: Invalid number of expected pages (%s) for SVG conversion.",
+                num_pages_expected
+            )
             return False
 
         try:
             os.makedirs(self.svg_output_dir, exist_ok=True)
-            print(f"SVG conversion (method: {self.method}) outputting to: "
-                  f"{self.svg_output_dir}")
+            logger.info(
+                "SVG conversion (method: %s) outputting to: %s",
+                self.method, self.svg_output_dir
+            )
 
             if self.method == 'pymupdf':
-                return self._convert_with_pymupdf(pdf_path, num_pages_expected)
+                return self._convert_with_pymupdf(pdf_path, num_pages_expected,
+                                                  force_refresh)
             elif self.method == 'pdf2svg':
                 return self._convert_with_pdf2svg(pdf_path, num_pages_expected)
             else:
                 # Should not happen due to __init__ check, but safeguard
-                print(f"INTERNAL ERROR: Method {self.method} not supported "
-                      "in convert_all.")
+                logger.error(
+                    "INTERNAL ERROR: Method %s not supported in convert_all.",
+                    self.method
+                )
                 return False
         except Exception as general_error:
-            print(f"ERROR: Unexpected general error during SVG conversion "
-                  f"({self.method}): {general_error}")
-            traceback.print_exc()
+            logger.exception(
+                "ERROR: Unexpected general error during SVG conversion (%s): %s",
+                self.method, general_error
+            )
             return False
 
-    def _convert_with_pymupdf(self, pdf_path, num_pages_expected):
+    def _convert_with_pymupdf(self, pdf_path, num_pages_expected,
+                              force_refresh=False):
         """Internal logic for converting pages using PyMuPDF."""
         created_files_count = 0
         doc = None
+        cache_key = self._svg_cache_key(pdf_path)
         try:
             doc = fitz.open(pdf_path)
             num_pages_actual = doc.page_count
 
             if num_pages_actual != num_pages_expected:
-                print(f"WARN (PyMuPDF): Actual page count ({num_pages_actual}) "
-                      f"differs from expected ({num_pages_expected}). "
-                      f"Attempting to convert {num_pages_expected} pages.")
-
-            for page_index in range(num_pages_expected):
-                if page_index >= num_pages_actual:
-                    print(f"ERROR (PyMuPDF): Page index {page_index + 1} is "
-                          f"out of bounds ({num_pages_actual} actual pages). "
-                          "Cannot generate SVG.")
-                    continue  # Skip this page, will result in overall failure
-
-                page = doc.load_page(page_index)  # 0-based index
-                svg_filename = f"page_{page_index + 1}{self.svg_extension}"
-                output_path = os.path.join(self.svg_output_dir, svg_filename)
+                logger.warning(
+                    "WARN (PyMuPDF): Actual page count (%s) differs from expected "
+                    "(%s). Attempting to convert %s pages.",
+                    num_pages_actual, num_pages_expected, num_pages_expected
+                )
 
-                try:
-                    # text_as_path=True embeds fonts as paths (more robust rendering)
-                    # but can increase file size.
-                    svg_text = page.get_svg_image(text_as_path=True)
-                    with open(output_path, "w", encoding="utf-8") as svg_file:
-                        svg_file.write(svg_text)
-                    created_files_count += 1
-                except Exception as page_error:
-                    print(f"ERROR (PyMuPDF): Failed to convert page "
-                          f"{page_index + 1}: {page_error}")
-                    # Attempt to clean up potentially corrupt output file
-                    if os.path.exists(output_path):
-                        try:
-                            os.remove(output_path)
-                        except OSError:
-                            print(f"  WARN: Could not remove failed SVG file "
-                                  f"{output_path}")
+            for page_index in range(num_pages_actual, num_pages_expected):
+                logger.error(
+                    "ERROR (PyMuPDF): Page index %s is out of bounds (%s actual "
+                    "pages). Cannot generate SVG.",
+                    page_index + 1, num_pages_actual
+                )
+                # Skipped: will result in overall failure
+            num_pages_to_render = min(num_pages_expected, num_pages_actual)
+
+            # Pages left by a previous run from the same PDF and settings
+            reused_files = {}
+            if not force_refresh:
+                reused_files = self._load_reusable_svgs(cache_key)
+            pages_to_render = []
+            reused_pages = []
+            for page_index in range(num_pages_to_render):
+                if self._svg_filename(page_index) in reused_files:
+                    reused_pages.append(page_index)
+                else:
+                    pages_to_render.append(page_index)
+            if reused_pages:
+                logger.info("  Reusing %s SVG page(s) of a previous run.",
+                            len(reused_pages))
+            self._remove_svg_cache_record()
+
+            workers = min(self.workers, len(pages_to_render))
+            if workers > 1:
+                written_pages = self._render_in_workers(
+                    pdf_path, pages_to_render, workers
+                )
+            else:
+                written_pages = _write_page_svgs(
+                    doc, pages_to_render, self.svg_output_dir,
+                    self.svg_extension, self.text_as_path, self.cancel_event
+                )
+            created_files_count = len(reused_pages) + len(written_pages)
+            self._store_reusable_svgs(cache_key, reused_pages + written_pages)
 
         except fitz.fitz.FileNotFoundError:
-            print(f"ERROR (PyMuPDF): Input PDF file not found or inaccessible: "
-                  f"'{pdf_path}'")
+            logger.error(
+                "ERROR (PyMuPDF): Input PDF file not found or inaccessible: '%s'",
+                pdf_path
+            )
             return False
         except Exception as pymupdf_error:
-            print(f"ERROR: Unexpected error during PyMuPDF conversion: "
-                  f"{pymupdf_error}")
-            traceback.print_exc()
+            logger.exception(
+                "ERROR: Unexpected error during PyMuPDF conversion: %s",
+                pymupdf_error
+            )
             return False  # Ensure False is returned on unexpected errors
         finally:
             if doc:
                 doc.close()
-            print(f"SVG conversion (PyMuPDF) finished. "
-                  f"{created_files_count}/{num_pages_expected} SVG file(s) "
-                  f"generated successfully.")
+            logger.info(
+                "SVG conversion (PyMuPDF) finished. %s/%s SVG file(s) generated "
+                "successfully.",
+                created_files_count, num_pages_expected
+            )
 
         # Final success check
         if created_files_count == num_pages_expected:
-            print("  Number of generated SVG files matches expected count.")
+            logger.info("  Number of generated SVG files matches expected count.")
             return True
         else:
-            print(f"  WARN: Number of generated SVG files ({created_files_count}) "
-                  f"does not match expected count ({num_pages_expected}).")
+            logger.warning(
+                "  WARN: Number of generated SVG files (%s) does not match expected "
+                "count (%s).",
+                created_files_count, num_pages_expected
+            )
             return False
 
+    def _render_in_workers(self, pdf_path, page_indices, workers):
+        """
+        Renders the pages in worker processes, one contiguous run of the
+        pages each.
+
+        Returns:
+            list: The 0-based indices of the pages whose SVG was written.
+        """
+        num_pages = len(page_indices)
+        logger.info("  Rendering %s pages with %s worker processes.",
+                    num_pages, workers)
+        # Worker i renders page_indices[bounds[i]:bounds[i + 1]]
+        bounds = [num_pages * i // workers for i in range(workers + 1)]
+        # Spawned, not forked: this may run in a thread of a process that
+        # has other threads (and their locks) busy
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_render_worker,
+                initargs=(self.cancel_event,)) as executor:
+            return list(itertools.chain.from_iterable(executor.map(
+                _render_pages,
+                itertools.repeat(pdf_path),
+                [page_indices[start:end]
+                 for start, end in zip(bounds[:-1], bounds[1:])],
+                itertools.repeat(self.svg_output_dir),
+                itertools.repeat(self.svg_extension),
+                itertools.repeat(self.text_as_path)
+            )))
+
+    def _svg_filename(self, page_index):
+        """File name of the SVG of a page (0-based index)."""
+        return f"page_{page_index + 1}{self.svg_extension}"
+
+    def _svg_cache_key(self, pdf_path):
+        """
+        Identifies the PDF file and the settings the SVG pages depend on,
+        or returns None when the PDF cannot be examined (no reuse then).
+        """
+        try:
+            pdf_stat = os.stat(pdf_path)
+            identity = [
+                os.path.realpath(pdf_path), pdf_stat.st_size,
+                pdf_stat.st_mtime_ns, self.method, self.text_as_path,
+                getattr(fitz, 'VersionBind', None), _MUPDF is not None,
+            ]
+        except (OSError, TypeError, ValueError):
+            return None
+        return hashlib.blake2b(
+            json.dumps(identity).encode('utf-8'), digest_size=16
+        ).hexdigest()
+
+    def _svg_cache_record_path(self):
+        """Path of the record of the SVG pages written by the last run."""
+        return os.path.join(self.svg_output_dir,
+                            self.config.SVG_CACHE_RECORD_NAME)
+
+    def _load_reusable_svgs(self, cache_key):
+        """
+        Returns {file name: [size, mtime_ns]} of the SVG pages a previous
+        run wrote for this cache key and that are unchanged since, or {}.
+        """
+        if cache_key is None:
+            return {}
+        try:
+            with open(self._svg_cache_record_path(), 'r',
+                      encoding='utf-8') as record_file:
+                record = json.load(record_file)
+            if record['key'] != cache_key:
+                return {}
+            recorded_pages = record['pages']
+            with os.scandir(self.svg_output_dir) as entries:
+                return {
+                    entry.name: recorded_pages[entry.name]
+                    for entry in entries
+                    if entry.name in recorded_pages and entry.is_file() and
+                    _file_signature(entry.stat()) == recorded_pages[entry.name]
+                }
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _store_reusable_svgs(self, cache_key, page_indices):
+        """Records the given SVG pages for the next run (best effort)."""
+        if cache_key is None:
+            return
+        try:
+            pages = {}
+            for page_index in page_indices:
+                svg_filename = self._svg_filename(page_index)
+                pages[svg_filename] = _file_signature(
+                    os.stat(os.path.join(self.svg_output_dir, svg_filename))
+                )
+            with open(self._svg_cache_record_path(), 'w',
+                      encoding='utf-8') as record_file:
+                json.dump({'key': cache_key, 'pages': pages}, record_file)
+        except OSError as record_error:
+            logger.warning("  WARN: Could not write SVG cache record: %s",
+                           record_error)
+
+    def _remove_svg_cache_record(self):
+        """
+        Deletes the record of the last run before pages are rewritten, so
+        an interrupted or pdf2svg run leaves no record of other pages.
+        """
+        try:
+            os.remove(self._svg_cache_record_path())
+        except FileNotFoundError:
+            pass
+        except OSError as record_error:
+            logger.warning("  WARN: Could not remove SVG cache record: %s",
+                           record_error)
+
     def _convert_with_pdf2svg(self, pdf_path, num_pages_expected):
         """Internal logic for converting pages using pdf2svg external tool."""
+        self._remove_svg_cache_record()
         try:
             # Output pattern for pdf2svg filenames
             output_pattern = os.path.join(
@@ -197,56 +467,68 @@ class SvgConverter:
             )
 
             cmd = [self.pdf2svg_path, pdf_path, output_pattern, "all"]
-            print(f"CMD pdf2svg: {' '.join(cmd)}")
+            logger.info("CMD pdf2svg: %s", ' '.join(cmd))
 
+            # stdout is discarded: pdf2svg may print a line per page, which
+            # would otherwise be buffered and decoded for nothing. stderr is
+            # kept as bytes and only decoded when it has something to show
             result = subprocess.run(
-                cmd, capture_output=True, text=True, check=False,
-                encoding='utf-8', errors='replace'
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                check=False
             )
+            stderr_text = result.stderr.decode('utf-8', 'replace').strip()
 
             # Check if pdf2svg reported an error
             if result.returncode != 0:
-                print(f"ERROR: pdf2svg failed (exit code: {result.returncode})")
-                if result.stdout:
-                    print(f"  pdf2svg stdout:\n{result.stdout.strip()}")
-                if result.stderr:
-                    print(f"  pdf2svg stderr:\n{result.stderr.strip()}")
+                logger.error("ERROR: pdf2svg failed (exit code: %s)", result.returncode)
+                if stderr_text:
+                    logger.error("  pdf2svg stderr:\n%s", stderr_text)
                 # Check if some files were created despite the error
                 created_files = self._check_created_svg_files(num_pages_expected)
-                print(f"  {len(created_files)} SVG file(s) found after error.")
+                logger.info("  %s SVG file(s) found after error.", len(created_files))
                 return False # Treat non-zero exit code as failure
 
             else:
-                print("SVG conversion (pdf2svg) completed (exit code 0).")
-                if result.stderr:
+                logger.info("SVG conversion (pdf2svg) completed (exit code 0).")
+                if stderr_text:
                     # stderr might contain warnings even on success
-                    print(f"  pdf2svg messages (stderr):\n{result.stderr.strip()}")
+                    logger.info("  pdf2svg messages (stderr):\n%s", stderr_text)
 
                 # Verify if the expected number of files was created
                 created_files = self._check_created_svg_files(num_pages_expected)
-                print(f"  {len(created_files)} SVG file(s) found in "
-                      f"{self.svg_output_dir}.")
+                logger.info(
+                    "  %s SVG file(s) found in %s.",
+                    len(created_files), self.svg_output_dir
+                )
                 if len(created_files) == num_pages_expected:
-                    print("  Number of generated SVG files matches expected count.")
+                    logger.info(
+                        "  Number of generated SVG files matches expected count."
+                    )
                     return True
                 else:
-                    print(f"  WARN: Number of SVG files ({len(created_files)}) "
-                          f"does not match expected ({num_pages_expected}).")
+                    logger.warning(
+                        "  WARN: Number of SVG files (%s) does not match expected "
+                        "(%s).",
+                        len(created_files), num_pages_expected
+                    )
                     # Consider it a failure if pages are missing
                     return False
 
         except FileNotFoundError:
             # Should not happen if path is checked in __init__, but safeguard
-            print(f"ERROR: pdf2svg executable not found at "
-                  f"'{self.pdf2svg_path}'.")
+            logger.error(
+                "ERROR: pdf2svg executable not found at '%s'.",
+                self.pdf2svg_path
+            )
             return False
         except OSError as os_error:
-            print(f"ERROR: OS error during pdf2svg execution: {os_error}")
+            logger.error("ERROR: OS error during pdf2svg execution: %s", os_error)
             return False
         except Exception as pdf2svg_error:
-            print(f"ERROR: Unexpected error during pdf2svg conversion: "
-                  f"{pdf2svg_error}")
-            traceback.print_exc()
+            logger.exception(
+                "ERROR: Unexpected error during pdf2svg conversion: %s",
+                pdf2svg_error
+            )
             return False
 
     def _check_created_svg_files(self, expected_num_pages):
@@ -264,10 +546,13 @@ class SvgConverter:
             return svg_files # Return empty list if dir doesn't exist
 
         try:
+            # One directory read instead of a stat per expected page
+            with os.scandir(self.svg_output_dir) as entries:
+                existing = {entry.name for entry in entries if entry.is_file()}
             for i in range(1, expected_num_pages + 1):
                 svg_filename = f"page_{i}{self.svg_extension}"
-                if os.path.exists(os.path.join(self.svg_output_dir, svg_filename)):
+                if svg_filename in existing:
                     svg_files.append(svg_filename)
         except Exception as list_error:
-            print(f"Error while checking for created SVG files: {list_error}")
+            logger.error("Error while checking for created SVG files: %s", list_error)
         return svg_files
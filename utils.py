@@ -4,39 +4,171 @@ utils.py
 Utility functions and dependency checking for the PDF to SwiperJS converter.
 """
 
+import functools
+import importlib
+import importlib.util
+import json
+import logging
 import shutil
+import subprocess
 import sys
-import os  # Needed for os.path below if you re-add functions using it
-
-try:
-    import magic
-    MAGIC_AVAILABLE = True
-except ImportError:
-    MAGIC_AVAILABLE = False
-    magic = None # Define as None to avoid NameErrors later
-except Exception as import_error:
-    # Catch other potential import errors (e.g., library installed but broken)
-    MAGIC_AVAILABLE = False
-    magic = None
-    print(f"WARN: Failed to import or initialize python-magic: {import_error}")
-
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
-    fitz = None
-except Exception as import_error:
-    PYMUPDF_AVAILABLE = False
-    fitz = None
-    print(f"WARN: Failed to import PyMuPDF (fitz): {import_error}")
-
-
-def check_dependencies():
+import os
+
+logger = logging.getLogger(__name__)
+
+# Environment variable caching the check_dependencies() results. It is set
+# after a check, so child processes (and scripts that export it between
+# runs) skip the PATH lookups; tool paths are re-validated when reused, and
+# a dependency recorded as missing is looked for again.
+DEPENDENCIES_ENV_VAR = "PDF2WEB_DEPS_JSON"
+_TOOL_NAMES = ('ffmpeg', 'ffprobe', 'pdf2svg')
+# Results of the first check_dependencies() call of this process
+_checked_dependencies = None
+
+
+def _try_import(module_name):
+    """
+    Imports a library on demand, so importing this module does not load it.
+
+    Returns:
+        module or None: The module, or None if it is missing or its shared
+                        library cannot be loaded.
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+    except OSError as import_error:
+        # Library installed but its shared library (e.g. libmagic) is broken
+        logger.warning("WARN: Failed to import %s: %s", module_name, import_error)
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_magic():
+    """
+    Returns the process-wide python-magic MIME detector, building it on the
+    first call (the dependency check and MediaExtractor share it). Magic
+    serializes its own libmagic calls, so it may be used from any thread.
+
+    Returns:
+        magic.Magic or None: The 'Magic(mime=True)' instance, or None if
+                             python-magic is not installed.
+
+    Raises:
+        magic.MagicException: If libmagic fails to load; the next call
+                              tries again.
+    """
+    magic = _try_import('magic')
+    if magic is None:
+        return None
+    return magic.Magic(mime=True)
+
+
+def _is_executable(path):
+    """Tells whether path is an executable file, as shutil.which() checks."""
+    return os.access(path, os.X_OK) and not os.path.isdir(path)
+
+
+def _which_many(names):
+    """
+    Finds several executables in one walk of PATH, like shutil.which()
+    does for each: the first executable file of that name wins.
+
+    Each candidate path is probed directly; listing the PATH directories
+    instead would read every entry of /usr/bin.
+
+    Returns:
+        dict: '{name: path or None}'.
+    """
+    if sys.platform == "win32":
+        # PATHEXT and the current directory rules: left to shutil.which()
+        return {name: shutil.which(name) for name in names}
+    found = dict.fromkeys(names)
+    missing = list(names)
+    for directory in os.environ.get("PATH", os.defpath).split(os.pathsep):
+        for name in tuple(missing):
+            candidate = os.path.join(directory or os.curdir, name)
+            if _is_executable(candidate):
+                found[name] = candidate
+                missing.remove(name)
+        if not missing:
+            break
+    return found
+
+
+def _load_cached_dependencies():
+    """
+    Returns the dependency results stored in DEPENDENCIES_ENV_VAR, or None
+    if it is unset, malformed, names a tool that is no longer executable,
+    or records a dependency as missing (it may have been installed since).
+    Only the stored paths are checked: PATH is not walked again.
+    """
+    cached_json = os.environ.get(DEPENDENCIES_ENV_VAR)
+    if not cached_json:
+        return None
+    try:
+        cached = json.loads(cached_json)
+    except ValueError:
+        return None
+    if not isinstance(cached, dict):
+        return None
+    if not all(cached.get(name) for name in _TOOL_NAMES + ('pymupdf', 'magic')):
+        return None  # Missing dependency: run a full check again
+    dependencies = {}
+    for tool in _TOOL_NAMES:
+        tool_path = cached[tool]
+        if not _is_executable(tool_path):
+            return None  # Stale entry: run a full check again
+        dependencies[tool] = tool_path
+    # The libraries were checked by the process that stored the results;
+    # only confirm they are still installed (without importing them)
+    dependencies['pymupdf'] = importlib.util.find_spec('fitz') is not None
+    dependencies['magic'] = importlib.util.find_spec('magic') is not None
+    return dependencies
+
+
+def check_dependencies(force=False, verbose=True):
+    """
+    Returns the dependency check results, probing only once per process.
+
+    The first call reuses the results of DEPENDENCIES_ENV_VAR when it holds
+    valid ones, otherwise runs a full check and stores them there; later
+    calls return the same results without any lookup or output. A copy is
+    returned, so callers may modify it.
+
+    Args:
+        force (bool): Run a full check again, ignoring the cached results.
+        verbose (bool): Log the findings at INFO level; at DEBUG level if
+                        False (warnings and errors are always logged).
+
+    Returns:
+        dict: See _probe_dependencies().
+    """
+    global _checked_dependencies
+    report = logger.info if verbose else logger.debug
+    if _checked_dependencies is None or force:
+        dependencies = None if force else _load_cached_dependencies()
+        if dependencies is not None:
+            report(
+                "Using cached dependency check results ($%s).",
+                DEPENDENCIES_ENV_VAR
+            )
+        else:
+            dependencies = _probe_dependencies(verbose)
+            os.environ[DEPENDENCIES_ENV_VAR] = json.dumps(dependencies)
+        _checked_dependencies = dependencies
+    return dict(_checked_dependencies)
+
+
+def _probe_dependencies(verbose=True):
     """
     Checks for the presence of external command-line tools (ffmpeg, ffprobe,
     pdf2svg) and key Python libraries (PyMuPDF, python-magic).
 
+    Args:
+        verbose (bool): See check_dependencies().
+
     Returns:
         dict: A dictionary containing the check results. Keys are dependency
               names ('ffmpeg', 'ffprobe', 'pdf2svg', 'pymupdf', 'magic').
@@ -44,42 +176,140 @@ def check_dependencies():
               (for command-line tools) or a boolean indicating availability
               (for Python libraries).
     """
-    print("Checking dependencies...")
+    report = logger.info if verbose else logger.debug
+    report("Checking dependencies...")
+    magic = _try_import('magic')
+    tool_paths = _which_many(_TOOL_NAMES)
     dependencies = {
-        'ffmpeg': shutil.which("ffmpeg"),
-        'ffprobe': shutil.which("ffprobe"),
-        'pdf2svg': shutil.which("pdf2svg"),
-        'pymupdf': PYMUPDF_AVAILABLE,  # Uses the result from the module-level import
+        **tool_paths,
+        # Located without importing it (a fifth of a second): svg_converter
+        # imports it later, on the SVG thread
+        'pymupdf': importlib.util.find_spec('fitz') is not None,
         'magic': False  # Default to False, check below
     }
 
     # Check python-magic initialization (more robust than just import)
-    if MAGIC_AVAILABLE:
+    if magic is not None:
+        # Resolved first: evaluating a missing attribute in the except
+        # clause would raise instead (a different 'magic' module)
+        magic_exception = getattr(magic, 'MagicException', ())
         try:
-            # Attempt to instantiate the Magic class
-            _ = magic.Magic(mime=True)
+            # Attempt to instantiate the Magic class (kept for later callers)
+            get_magic()
             dependencies['magic'] = True
-            print("  python-magic: Found and initialized.")
-        except magic.MagicException as magic_runtime_error:
+            report("  python-magic: Found and initialized.")
+        except magic_exception as magic_runtime_error:
             # Specific error if libmagic files are missing/corrupt
-            print("ERROR: Failed to initialize python-magic "
-                  f"({magic_runtime_error}).\n"
-                  "  Check system's libmagic installation and paths.")
+            logger.error(
+                "ERROR: Failed to initialize python-magic (%s).\n"
+                "  Check system's libmagic installation and paths.",
+                magic_runtime_error
+            )
             dependencies['magic'] = False # Mark as unavailable
-        except Exception as magic_error:
-            # Catch other potential initialization errors
-            print(f"WARN: Error initializing python-magic: {magic_error}")
+        except (AttributeError, OSError) as magic_error:
+            # A different 'magic' module (without Magic), or libmagic unusable
+            logger.warning("WARN: Error initializing python-magic: %s", magic_error)
             dependencies['magic'] = False # Mark as unavailable
     else:
-        print("  python-magic: Library not found or import failed.")
+        report("  python-magic: Library not found or import failed.")
 
     # Log findings for command-line tools
-    for tool in ['ffmpeg', 'ffprobe', 'pdf2svg']:
-        if dependencies[tool]:
-            print(f"  {tool}: Found at {dependencies[tool]}")
+    for tool, tool_path in tool_paths.items():
+        if tool_path:
+            report("  %s: Found at %s", tool, tool_path)
         else:
-            print(f"  {tool}: Not found in PATH.")
+            report("  %s: Not found in PATH.", tool)
     # Log findings for Python libs (already logged during import/init check)
-    print(f"  pymupdf (fitz): {'Available' if dependencies['pymupdf'] else 'Unavailable'}")
+    report(
+        "  pymupdf (fitz): %s",
+        'Available' if dependencies['pymupdf'] else 'Unavailable'
+    )
 
     return dependencies
+
+
+@functools.lru_cache(maxsize=None)
+def find_vaapi_render_nodes():
+    """
+    Lists the VAAPI render nodes (/dev/dri/renderD*), probing only once per
+    process; forked page workers inherit the result.
+
+    Returns:
+        tuple or None: The names of the render nodes found (possibly empty),
+                       or None if the /dev/dri directory does not exist.
+    """
+    try:
+        with os.scandir('/dev/dri/') as entries:
+            return tuple(entry.name for entry in entries
+                         if entry.name.startswith('renderD'))
+    except FileNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def find_ffmpeg_encoders(ffmpeg_path):
+    """
+    Lists the encoders an ffmpeg binary provides (`ffmpeg -encoders`),
+    running it only once per process and binary.
+
+    Args:
+        ffmpeg_path (str): Path to the ffmpeg executable.
+
+    Returns:
+        frozenset or None: The encoder names (e.g. 'h264_vaapi'), or None
+                           if they could not be listed.
+    """
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, '-hide_banner', '-encoders'],
+            capture_output=True, text=True, check=True,
+            encoding='utf-8', errors='replace'
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # The encoder lines ("flags name description") follow a "------" line
+    lines = iter(result.stdout.splitlines())
+    for line in lines:
+        if line.strip().startswith('------'):
+            break
+    encoders = set()
+    for line in lines:
+        fields = line.split()
+        if len(fields) >= 2:
+            encoders.add(fields[1])
+    return frozenset(encoders)
+
+
+@functools.lru_cache(maxsize=None)
+def vaapi_encoder_works(ffmpeg_path, encoder, device_path=""):
+    """
+    Tells whether a VAAPI encoder works with the GPU driver, by encoding
+    one small blank frame; runs only once per process, binary and device.
+    ffmpeg lists e.g. hevc_vaapi even when the driver lacks the profile.
+
+    Args:
+        ffmpeg_path (str): Path to the ffmpeg executable.
+        encoder (str): The VAAPI encoder name (e.g. 'hevc_vaapi').
+        device_path (str): The VAAPI device, "" for ffmpeg's default one.
+
+    Returns:
+        bool: True if the test encode succeeded.
+    """
+    init_device_str = "vaapi=va"
+    if device_path:
+        init_device_str += f":{device_path}"
+    command = [
+        ffmpeg_path, '-hide_banner', '-loglevel', 'error',
+        '-init_hw_device', init_device_str, '-filter_hw_device', 'va',
+        '-f', 'lavfi', '-i', 'color=black:size=256x256',
+        '-vf', 'format=nv12,hwupload', '-frames:v', '1',
+        '-c:v', encoder, '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(
+            command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0